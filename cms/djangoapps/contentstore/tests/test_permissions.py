@@ -11,7 +11,7 @@ from contentstore.tests.modulestore_config import TEST_MODULESTORE
 from contentstore.tests.utils import AjaxEnabledTestClient
 from xmodule.modulestore.django import loc_mapper
 from xmodule.modulestore import Location
-from student.roles import CourseInstructorRole, CourseStaffRole
+from student.roles import CourseInstructorRole, CourseStaffRole, clear_role_cache
 from contentstore.views.access import has_course_access
 from student import auth
 
@@ -138,8 +138,7 @@ class TestCourseAccess(ModuleStoreTestCase):
                 # forcefully decache the groups: premise is that any real request will not have
                 # multiple objects repr the same user but this test somehow uses different instance
                 # in above add_users call
-                if hasattr(user, '_groups'):
-                    del user._groups
+                clear_role_cache(user)
 
                 self.assertTrue(has_course_access(user, copy_course_locator), "{} no copy access".format(user))
                 self.assertTrue(has_course_access(user, copy_course_location), "{} no copy access".format(user))
@@ -36,7 +36,9 @@ MODULESTORE = {
     'split': {
         'ENGINE': 'xmodule.modulestore.split_mongo.SplitMongoModuleStore',
         'DOC_STORE_CONFIG': DOC_STORE_CONFIG,
-        'OPTIONS': modulestore_options
+        # set share_documents_in_cache to keep structures and definitions in the
+        # mongo_metadata_inheritance cache as well, sharing them between processes
+        'OPTIONS': dict(modulestore_options, share_documents_in_cache=False)
     }
 }
 
@@ -43,27 +43,121 @@ class StaticContentServer(object):
                 # NOP here, but we may wish to add a "cache-hit" counter in the future
                 pass
 
-            # Check that user has access to content
-            if getattr(content, "locked", False):
-                if not hasattr(request, "user") or not request.user.is_authenticated():
-                    return HttpResponseForbidden('Unauthorized')
-                course_partial_id = "/".join([loc.org, loc.course])
-                if not request.user.is_staff and not CourseEnrollment.is_enrolled_by_partial(
-                        request.user, course_partial_id):
-                    return HttpResponseForbidden('Unauthorized')
-
-            # convert over the DB persistent last modified timestamp to a HTTP compatible
-            # timestamp, so we can simply compare the strings
-            last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
-
-            # see if the client has cached this content, if so then compare the
-            # timestamps, if they are the same then just return a 304 (Not Modified)
-            if 'HTTP_IF_MODIFIED_SINCE' in request.META:
-                if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
-                if if_modified_since == last_modified_at_str:
-                    return HttpResponseNotModified()
+            return self._response_for_content(request, loc, content)
 
+    def _response_for_content(self, request, loc, content):
+        """
+        Return the response to `request` for `content`, honoring access control,
+        conditional request headers, HEAD requests and byte ranges.
+        """
+        # Check that user has access to content
+        if getattr(content, "locked", False):
+            if not hasattr(request, "user") or not request.user.is_authenticated():
+                return HttpResponseForbidden('Unauthorized')
+            course_partial_id = "/".join([loc.org, loc.course])
+            if not request.user.is_staff and not CourseEnrollment.is_enrolled_by_partial(
+                    request.user, course_partial_id):
+                return HttpResponseForbidden('Unauthorized')
+
+        # convert over the DB persistent last modified timestamp to a HTTP compatible
+        # timestamp, so we can simply compare the strings
+        last_modified_at_str = content.last_modified_at.strftime("%a, %d-%b-%Y %H:%M:%S GMT")
+
+        # getattr b/c caching may mean some pickled instances don't have attr
+        content_digest = getattr(content, 'content_digest', None)
+        etag = '"{}"'.format(content_digest) if content_digest else None
+
+        # see if the client has cached this content, if so then compare the
+        # ETags, or failing that the timestamps, and if they are the same then
+        # just return a 304 (Not Modified)
+        if etag is not None and 'HTTP_IF_NONE_MATCH' in request.META:
+            if_none_match = request.META['HTTP_IF_NONE_MATCH']
+            if if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]:
+                return self._add_validators(HttpResponseNotModified(), last_modified_at_str, etag)
+        elif 'HTTP_IF_MODIFIED_SINCE' in request.META:
+            if_modified_since = request.META['HTTP_IF_MODIFIED_SINCE']
+            if if_modified_since == last_modified_at_str:
+                return self._add_validators(HttpResponseNotModified(), last_modified_at_str, etag)
+
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and content.length is not None:
+            try:
+                ranges = parse_range_header(request.META['HTTP_RANGE'], content.length)
+            except ValueError:
+                # A malformed Range header must be ignored
+                ranges = None
+
+            if ranges == []:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = 'bytes */{}'.format(content.length)
+                return response
+            elif ranges is not None and len(ranges) == 1:
+                # We only serve single ranges; for multiple ranges we are allowed
+                # to send the whole content instead
+                byte_range = ranges[0]
+
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=content.content_type)
+        elif byte_range is not None:
+            response = HttpResponse(
+                content.stream_data_in_range(*byte_range), content_type=content.content_type
+            )
+        else:
             response = HttpResponse(content.stream_data(), content_type=content.content_type)
-            response['Last-Modified'] = last_modified_at_str
 
-            return response
+        if byte_range is not None:
+            first_byte, last_byte = byte_range
+            response.status_code = 206
+            response['Content-Range'] = 'bytes {}-{}/{}'.format(first_byte, last_byte, content.length)
+            response['Content-Length'] = str(last_byte - first_byte + 1)
+        elif content.length is not None:
+            response['Content-Length'] = str(content.length)
+
+        response['Accept-Ranges'] = 'bytes'
+        return self._add_validators(response, last_modified_at_str, etag)
+
+    @staticmethod
+    def _add_validators(response, last_modified_at_str, etag):
+        """Set the Last-Modified and, if there is one, ETag headers of `response`."""
+        response['Last-Modified'] = last_modified_at_str
+        if etag is not None:
+            response['ETag'] = etag
+        return response
+
+
+def parse_range_header(header_value, content_length):
+    """
+    Parse the value of an HTTP Range header for content of `content_length`
+    bytes (RFC 2616 section 14.35.1).
+
+    Returns a list of (first_byte, last_byte) tuples, both inclusive, for each
+    satisfiable range in the header. An empty list means no range could be
+    satisfied. Raises ValueError if the header is malformed or isn't for bytes.
+    """
+    unit, __, byte_ranges = header_value.partition('=')
+    if unit.strip() != 'bytes':
+        raise ValueError("Unknown range unit: {}".format(unit))
+
+    byte_ranges = [byte_range.strip() for byte_range in byte_ranges.split(',') if byte_range.strip()]
+    if not byte_ranges:
+        raise ValueError("Range header has no ranges")
+
+    ranges = []
+    for byte_range in byte_ranges:
+        first, __, last = byte_range.partition('-')
+        first, last = first.strip(), last.strip()
+        if not first:
+            # a suffix range: the last `last` bytes
+            suffix_length = int(last)
+            if suffix_length > 0 and content_length > 0:
+                ranges.append((max(content_length - suffix_length, 0), content_length - 1))
+            continue
+
+        first_byte = int(first)
+        last_byte = int(last) if last else content_length - 1
+        if first_byte < 0 or (last and last_byte < first_byte):
+            raise ValueError("Invalid byte range: {}".format(byte_range))
+        if first_byte < content_length:
+            ranges.append((first_byte, min(last_byte, content_length - 1)))
+
+    return ranges
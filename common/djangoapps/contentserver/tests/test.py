@@ -9,9 +9,11 @@ from pymongo import MongoClient
 
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.test import TestCase
 from django.test.client import Client
 from django.test.utils import override_settings
 
+from contentserver.middleware import parse_range_header
 from student.models import CourseEnrollment
 
 from xmodule.contentstore.django import contentstore, _CONTENTSTORE
@@ -134,3 +136,66 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         resp = self.client.get(self.url_locked)
         self.assertEqual(resp.status_code, 200) #pylint: disable=E1103
 
+
+    def test_range_request(self):
+        """
+        Test that a single byte range is served with a 206 Partial Content.
+        """
+        content = self.contentstore.find(self.loc_unlocked)
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes=2-9')
+        self.assertEqual(resp.status_code, 206)  # pylint: disable=E1103
+        self.assertEqual(resp.content, content.data[2:10])  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Length'], '8')
+        self.assertEqual(resp['Content-Range'], 'bytes 2-9/{}'.format(content.length))
+
+    def test_unsatisfiable_range_request(self):
+        """
+        Test that a range starting past the end of the asset gets a 416.
+        """
+        content = self.contentstore.find(self.loc_unlocked)
+        resp = self.client.get(self.url_unlocked, HTTP_RANGE='bytes={}-'.format(content.length))
+        self.assertEqual(resp.status_code, 416)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Range'], 'bytes */{}'.format(content.length))
+
+    def test_etag(self):
+        """
+        Test that assets carry an ETag, and that a matching If-None-Match gets a 304.
+        """
+        resp = self.client.get(self.url_unlocked)
+        self.assertEqual(resp['Accept-Ranges'], 'bytes')
+        etag = resp['ETag']
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)  # pylint: disable=E1103
+        resp = self.client.get(self.url_unlocked, HTTP_IF_NONE_MATCH='"not-the-etag"')
+        self.assertEqual(resp.status_code, 200)  # pylint: disable=E1103
+
+    def test_head(self):
+        """
+        Test that HEAD requests get the headers of the asset but no body.
+        """
+        content = self.contentstore.find(self.loc_unlocked)
+        resp = self.client.head(self.url_unlocked)
+        self.assertEqual(resp.status_code, 200)  # pylint: disable=E1103
+        self.assertEqual(resp['Content-Length'], str(content.length))
+        self.assertEqual(resp.content, '')  # pylint: disable=E1103
+
+
+class ParseRangeHeaderTest(TestCase):
+    """
+    Tests for parsing HTTP Range headers.
+    """
+    def test_ranges(self):
+        self.assertEqual(parse_range_header('bytes=0-99', 1000), [(0, 99)])
+        self.assertEqual(parse_range_header('bytes=900-', 1000), [(900, 999)])
+        self.assertEqual(parse_range_header('bytes=-100', 1000), [(900, 999)])
+        self.assertEqual(parse_range_header('bytes=990-2000', 1000), [(990, 999)])
+        self.assertEqual(parse_range_header('bytes=0-0, 5-9', 1000), [(0, 0), (5, 9)])
+
+    def test_unsatisfiable(self):
+        self.assertEqual(parse_range_header('bytes=1000-', 1000), [])
+        self.assertEqual(parse_range_header('bytes=-0', 1000), [])
+
+    def test_malformed(self):
+        for header in ('bytes=', 'items=0-1', 'bytes=9-1', 'bytes=a-b'):
+            with self.assertRaises(ValueError):
+                parse_range_header(header, 1000)
@@ -78,6 +78,69 @@ class GlobalStaff(AccessRole):
         raise Exception("This operation is un-indexed, and shouldn't be used")
 
 
+class RoleCache(object):
+    """
+    The group-based roles of a single user, loaded with one query.
+
+    Group names are of the form "<role>_<course or org>", so besides the set of
+    group names this keeps the set of roles the user has in any course or org,
+    which answers the common question (does a student have a staff role?)
+    without working out a role's group names. It also remembers the answers to
+    course role checks, which can need the loc mapper.
+
+    The cache is kept on the user object, so it lasts as long as that object,
+    typically one request, and is cleared by `add_users` and `remove_users`.
+    """
+    def __init__(self, user):
+        self._groups = frozenset(name.lower() for name in user.groups.values_list('name', flat=True))
+        self._roles = frozenset(
+            name[:index]
+            for name in self._groups
+            for index, char in enumerate(name)
+            if char == '_'
+        )
+        self._answers = {}
+
+    def has_role(self, role):
+        """
+        Return whether the user is in a group for `role` in any course or org.
+        """
+        return role.lower() in self._roles
+
+    def in_any_group(self, group_names):
+        """
+        Return whether the user is in any of the lowercase `group_names`.
+        """
+        return not self._groups.isdisjoint(group_names)
+
+    def check(self, key, get_group_names):
+        """
+        Return whether the user is in any of the lowercase group names returned
+        by `get_group_names()`, remembering the answer under `key`.
+        """
+        if key not in self._answers:
+            self._answers[key] = self.in_any_group(get_group_names())
+        return self._answers[key]
+
+
+def get_role_cache(user):
+    """
+    Return the RoleCache for `user`, loading it if this user object has none.
+    """
+    # pylint: disable=protected-access
+    if not hasattr(user, '_roles'):
+        user._roles = RoleCache(user)
+    return user._roles
+
+
+def clear_role_cache(user):
+    """
+    Drop the RoleCache of `user`, so its roles are loaded again when next needed.
+    """
+    if hasattr(user, '_roles'):
+        del user._roles
+
+
 class GroupBasedRole(AccessRole):
     """
     A role based on membership to any of a set of groups.
@@ -101,11 +164,7 @@ class GroupBasedRole(AccessRole):
         if not (user.is_authenticated and user.is_active):
             return False
 
-        # pylint: disable=protected-access
-        if not hasattr(user, '_groups'):
-            user._groups = set(name.lower() for name in user.groups.values_list('name', flat=True))
-
-        return len(user._groups.intersection(self._group_names)) > 0
+        return get_role_cache(user).in_any_group(self._group_names)
 
     def add_users(self, *users):
         """
@@ -118,8 +177,7 @@ class GroupBasedRole(AccessRole):
         group.user_set.add(*users)
         # remove cache
         for user in users:
-            if hasattr(user, '_groups'):
-                del user._groups
+            clear_role_cache(user)
 
     def remove_users(self, *users):
         """
@@ -130,8 +188,7 @@ class GroupBasedRole(AccessRole):
             group.user_set.remove(*users)
         # remove cache
         for user in users:
-            if hasattr(user, '_groups'):
-                del user._groups
+            clear_role_cache(user)
 
     def users_with_role(self):
         """
@@ -144,16 +201,39 @@ class CourseRole(GroupBasedRole):
     """
     A named role in a particular course
     """
-    def __init__(self, role, location, course_context=None):
+    def __init__(self, role, location, course_context=None):  # pylint: disable=super-init-not-called
         """
         Location may be either a Location, a string, dict, or tuple which Location will accept
         in its constructor, or a CourseLocator. Handle all these giving some preference to
         the preferred naming.
         """
-        # TODO: figure out how to make the group name generation lazy so it doesn't force the
-        # loc mapping?
         self.location = Locator.to_locator_or_location(location)
         self.role = role
+        self.course_context = course_context
+        if isinstance(self.location, Location) and course_context is None:
+            try:
+                self.location.course_id  # pylint: disable=pointless-statement
+            except InvalidLocationError:  # will occur on old locations where location is not of category course
+                raise CourseContextRequired()
+        # The group names are only worked out when needed (see `_group_names`),
+        # as that may need the loc mapper.
+        self._course_group_names = None
+
+    @property
+    def _group_names(self):
+        """
+        The lowercase names of the groups for this role.
+        """
+        if self._course_group_names is None:
+            self._course_group_names = [name.lower() for name in self._get_group_names()]
+        return self._course_group_names
+
+    def _get_group_names(self):
+        """
+        Work out the names of the groups for this role, most preferred first.
+        """
+        course_context = self.course_context
+        role = self.role
         # direct copy from auth.authz.get_all_course_role_groupnames will refactor to one impl asap
         groupnames = []
 
@@ -162,10 +242,7 @@ class CourseRole(GroupBasedRole):
                 groupnames.append(u'{0}_{1}'.format(role, self.location.course_id))
                 course_context = self.location.course_id  # course_id is valid for translation
             except InvalidLocationError:  # will occur on old locations where location is not of category course
-                if course_context is None:
-                    raise CourseContextRequired()
-                else:
-                    groupnames.append(u'{0}_{1}'.format(role, course_context))
+                groupnames.append(u'{0}_{1}'.format(role, course_context))
             try:
                 locator = loc_mapper().translate_location_to_course_locator(course_context, self.location)
                 groupnames.append(u'{0}_{1}'.format(role, locator.package_id))
@@ -184,7 +261,35 @@ class CourseRole(GroupBasedRole):
                 # add the least desirable but sometimes occurring format.
                 groupnames.append(u'{0}_{1}'.format(role, old_location.course))  # pylint: disable=E1101, E1103
 
-        super(CourseRole, self).__init__(groupnames)
+        return groupnames
+
+    def _cache_key(self):
+        """
+        Return a key which is the same for all CourseRoles with the same group names.
+        """
+        if isinstance(self.location, Location):
+            try:
+                course_context = self.location.course_id
+            except InvalidLocationError:
+                course_context = self.course_context
+            return (self.role, self.location.org, self.location.course, course_context)
+        elif isinstance(self.location, CourseLocator):
+            return (self.role, self.location.package_id)
+        return (self.role, unicode(self.location))
+
+    def has_user(self, user):
+        """
+        Return whether the supplied django user has access to this role.
+        """
+        if not (user.is_authenticated and user.is_active):
+            return False
+
+        roles = get_role_cache(user)
+        # Most users have no course roles at all, so check that before
+        # working out the group names
+        if not roles.has_role(self.role):
+            return False
+        return roles.check(self._cache_key(), lambda: self._group_names)
 
 
 class OrgRole(GroupBasedRole):
@@ -3,12 +3,13 @@ Tests of student.roles
 """
 
 from django.test import TestCase
+from mock import patch
 
 from xmodule.modulestore import Location
 from courseware.tests.factories import UserFactory, StaffFactory, InstructorFactory
 from student.tests.factories import AnonymousUserFactory
 
-from student.roles import GlobalStaff, CourseRole, CourseStaffRole
+from student.roles import GlobalStaff, CourseRole, CourseStaffRole, CourseInstructorRole
 from xmodule.modulestore.django import loc_mapper
 from xmodule.modulestore.locator import BlockUsageLocator
 
@@ -84,3 +85,26 @@ class RolesTestCase(TestCase):
             CourseStaffRole(vertical_location, course_context=self.course.course_id).has_user(self.student),
             "Student doesn't have access to {}".format(unicode(vertical_location.url()))
         )
+
+    def test_roles_loaded_once(self):
+        """
+        All of a user's roles are loaded with one query, and checks of roles
+        the user doesn't have in any course don't resolve the role's groups.
+        """
+        other_course = Location('i4x://edX/other/course/2013_Fall')
+        CourseStaffRole(self.course).has_user(self.course_staff)
+        with self.assertNumQueries(0):
+            with patch('student.roles.loc_mapper') as mock_loc_mapper:
+                self.assertTrue(CourseStaffRole(self.course).has_user(self.course_staff))
+                self.assertFalse(CourseStaffRole(other_course).has_user(self.course_staff))
+                self.assertFalse(CourseInstructorRole(self.course).has_user(self.course_staff))
+                self.assertFalse(CourseInstructorRole(other_course).has_user(self.course_staff))
+        # Only the staff role in the other course needed its groups worked out
+        self.assertEqual(mock_loc_mapper.call_count, 1)
+
+    def test_role_cache_invalidation(self):
+        self.assertFalse(CourseInstructorRole(self.course).has_user(self.course_staff))
+        CourseInstructorRole(self.course).add_users(self.course_staff)
+        self.assertTrue(CourseInstructorRole(self.course).has_user(self.course_staff))
+        CourseStaffRole(self.course).remove_users(self.course_staff)
+        self.assertFalse(CourseStaffRole(self.course).has_user(self.course_staff))
@@ -2,7 +2,12 @@
 
 from __future__ import absolute_import
 
+import atexit
 import logging
+import os
+import Queue
+import threading
+import time
 
 import pymongo
 from pymongo import MongoClient
@@ -95,3 +100,154 @@ class MongoBackend(BaseBackend):
             # during the next event.
             msg = 'Error inserting to MongoDB event tracker backend'
             log.exception(msg)
+
+
+class BufferedMongoBackend(MongoBackend):
+    """
+    MongoDB event tracker backend that queues events in memory and inserts
+    them in batches from a background thread, so sending an event doesn't wait
+    on a round trip to MongoDB.
+
+    A batch is inserted once `batch_size` events are queued or `flush_interval`
+    seconds have passed, whichever comes first. At most `max_queue_size`
+    events are held; when the queue is full new events are dropped, or, if
+    `block_when_full` is set, `send` waits up to `block_timeout` seconds
+    (forever if None) for room before dropping the event. Queued events are
+    flushed when the process exits.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Connect to a MongoDB.
+
+        :Parameters:
+
+          - `batch_size`: maximum number of events per insert
+          - `flush_interval`: maximum seconds an event waits in the queue
+          - `max_queue_size`: maximum number of queued events
+          - `block_when_full`: wait for room in a full queue instead of
+            dropping events
+          - `block_timeout`: maximum seconds to wait for room in the queue
+          - and the parameters of `MongoBackend`
+
+        """
+        super(BufferedMongoBackend, self).__init__(**kwargs)
+
+        self.batch_size = kwargs.get('batch_size', 100)
+        self.flush_interval = kwargs.get('flush_interval', 1.0)
+        self.block_when_full = kwargs.get('block_when_full', False)
+        self.block_timeout = kwargs.get('block_timeout', None)
+
+        self._queue = Queue.Queue(maxsize=kwargs.get('max_queue_size', 10000))
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._flusher = None
+        self._flusher_pid = None
+
+        self.queued = 0
+        self.flushed = 0
+        self.dropped = 0
+
+        atexit.register(self.close)
+
+    def send(self, event):
+        """Queue the event to be inserted in to the Mongo collection"""
+        self._start_flusher()
+        try:
+            self._queue.put(event, self.block_when_full, self.block_timeout)
+        except Queue.Full:
+            self._count('dropped', 1)
+        else:
+            self._count('queued', 1)
+
+    def stats(self):
+        """
+        Return the number of events queued, flushed and dropped so far, and
+        the number currently waiting in the queue.
+        """
+        with self._lock:
+            return {
+                'queued': self.queued,
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+                'pending': self._queue.qsize(),
+            }
+
+    def flush(self):
+        """Insert every queued event on the calling thread."""
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Queue.Empty:
+                    break
+            if not batch:
+                return
+            self._insert(batch)
+
+    def close(self, timeout=None):
+        """
+        Stop the background thread, waiting at most `timeout` seconds for it
+        to finish its current batch, and flush any remaining events.
+        """
+        self._stopping.set()
+        flusher = self._flusher
+        if flusher is not None and flusher.is_alive() and flusher is not threading.current_thread():
+            flusher.join(self.flush_interval * 2 if timeout is None else timeout)
+        self.flush()
+
+    def _start_flusher(self):
+        """
+        Start the background thread, unless it is already running in this
+        process. Threads don't survive a fork, so check the pid as well.
+        """
+        if self._flusher_pid == os.getpid() or self._stopping.is_set():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher = threading.Thread(target=self._run_flusher, name='track-mongodb-flusher')
+            self._flusher.daemon = True
+            self._flusher.start()
+            self._flusher_pid = os.getpid()
+
+    def _run_flusher(self):
+        """Insert batches of queued events until the backend is closed."""
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._insert(batch)
+
+    def _next_batch(self):
+        """
+        Return up to `batch_size` queued events, waiting no longer than
+        `flush_interval` seconds for them.
+        """
+        batch = []
+        deadline = time.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(True, timeout))
+            except Queue.Empty:
+                break
+        return batch
+
+    def _insert(self, batch):
+        """Insert a list of events in to the Mongo collection"""
+        try:
+            self.collection.insert(batch, manipulate=False, continue_on_error=True)
+        except PyMongoError:
+            # As in `MongoBackend.send`, the events are lost
+            log.exception('Error inserting to MongoDB event tracker backend')
+            self._count('dropped', len(batch))
+        else:
+            self._count('flushed', len(batch))
+
+    def _count(self, counter, value):
+        """Add `value` to one of the event counters."""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + value)
@@ -3,10 +3,11 @@ from __future__ import absolute_import
 from uuid import uuid4
 
 from mock import patch
+from pymongo.errors import PyMongoError
 
 from django.test import TestCase
 
-from track.backends.mongodb import MongoBackend
+from track.backends.mongodb import BufferedMongoBackend, MongoBackend
 
 
 class TestMongoBackend(TestCase):
@@ -38,3 +39,67 @@ class TestMongoBackend(TestCase):
 
         self.assertEqual(events[0], first_argument(calls[0]))
         self.assertEqual(events[1], first_argument(calls[1]))
+
+
+class TestBufferedMongoBackend(TestCase):
+    def setUp(self):
+        self.mongo_patcher = patch('track.backends.mongodb.MongoClient')
+        self.addCleanup(self.mongo_patcher.stop)
+        self.mongo_patcher.start()
+
+    def _backend(self, **kwargs):
+        backend = BufferedMongoBackend(**kwargs)
+        self.addCleanup(backend.close)
+        return backend
+
+    def _inserted_batches(self, backend):
+        return [args[0] for _, args, _ in backend.collection.insert.mock_calls]
+
+    def test_events_are_inserted_in_batches(self):
+        # Don't let the background thread pick up any events
+        backend = self._backend(batch_size=2)
+        backend._stopping.set()
+        events = [{'test': i} for i in range(5)]
+        for event in events:
+            backend.send(event)
+
+        self.assertFalse(backend.collection.insert.called)
+
+        backend.flush()
+        self.assertEqual(self._inserted_batches(backend), [events[0:2], events[2:4], events[4:5]])
+        self.assertEqual(backend.stats(), {'queued': 5, 'flushed': 5, 'dropped': 0, 'pending': 0})
+
+    def test_full_queue_drops_events(self):
+        backend = self._backend(max_queue_size=2)
+        backend._stopping.set()
+        for i in range(3):
+            backend.send({'test': i})
+
+        backend.flush()
+        self.assertEqual(self._inserted_batches(backend), [[{'test': 0}, {'test': 1}]])
+        self.assertEqual(backend.stats(), {'queued': 2, 'flushed': 2, 'dropped': 1, 'pending': 0})
+
+    def test_full_queue_blocks(self):
+        backend = self._backend(max_queue_size=1, block_when_full=True, block_timeout=0.01)
+        backend._stopping.set()
+        backend.send({'test': 0})
+        backend.send({'test': 1})
+        self.assertEqual(backend.stats()['dropped'], 1)
+
+    def test_insert_error_drops_batch(self):
+        backend = self._backend()
+        backend._stopping.set()
+        backend.collection.insert.side_effect = PyMongoError
+        backend.send({'test': 0})
+        backend.flush()
+        self.assertEqual(backend.stats(), {'queued': 1, 'flushed': 0, 'dropped': 1, 'pending': 0})
+
+    def test_background_flush(self):
+        backend = self._backend(flush_interval=0.01)
+        events = [{'test': 1}, {'test': 2}]
+        for event in events:
+            backend.send(event)
+
+        backend.close()
+        self.assertEqual(sum(self._inserted_batches(backend), []), events)
+        self.assertFalse(backend._flusher.is_alive())
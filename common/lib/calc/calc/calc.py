@@ -7,6 +7,9 @@ Uses pyparsing to parse. Main function as of now is evaluator().
 import math
 import operator
 import numbers
+import threading
+from collections import OrderedDict
+
 import numpy
 import scipy.constants
 import functions
@@ -73,6 +76,10 @@ SUFFIXES = {
 }
 
 
+# Maximum number of parsed expressions kept by `compile_expression`.
+COMPILED_EXPRESSION_CACHE_SIZE = 1000
+
+
 class UndefinedVariable(Exception):
     """
     Indicate when a student inputs a variable which was not expected.
@@ -121,8 +128,8 @@ def eval_atom(parse_result):
 
     In the case of parenthesis, ignore them.
     """
-    # Find first number in the list
-    result = next(k for k in parse_result if isinstance(k, numbers.Number))
+    # Find first number (or array of numbers) in the list
+    result = next(k for k in parse_result if not isinstance(k, basestring))
     return result
 
 
@@ -136,7 +143,7 @@ def eval_power(parse_result):
     # `reduce` will go from left to right; reverse the list.
     parse_result = reversed(
         [k for k in parse_result
-         if isinstance(k, numbers.Number)]  # Ignore the '^' marks.
+         if not isinstance(k, basestring)]  # Ignore the '^' marks.
     )
     # Having reversed it, raise `b` to the power of `a`.
     power = reduce(lambda a, b: b ** a, parse_result)
@@ -155,10 +162,11 @@ def eval_parallel(parse_result):
     """
     if len(parse_result) == 1:
         return parse_result[0]
-    if 0 in parse_result:
+    # (Arrays are divided by below; a zero in one fails under numpy.errstate)
+    if any(isinstance(e, numbers.Number) and e == 0 for e in parse_result):
         return float('nan')
     reciprocals = [1. / e for e in parse_result
-                   if isinstance(e, numbers.Number)]
+                   if not isinstance(e, basestring)]
     return 1. / sum(reciprocals)
 
 
@@ -173,12 +181,12 @@ def eval_sum(parse_result):
     total = 0.0
     current_op = operator.add
     for token in parse_result:
-        if token == '+':
+        if not isinstance(token, basestring):
+            total = current_op(total, token)
+        elif token == '+':
             current_op = operator.add
         elif token == '-':
             current_op = operator.sub
-        else:
-            total = current_op(total, token)
     return total
 
 
@@ -191,12 +199,12 @@ def eval_product(parse_result):
     prod = 1.0
     current_op = operator.mul
     for token in parse_result:
-        if token == '*':
+        if not isinstance(token, basestring):
+            prod = current_op(prod, token)
+        elif token == '*':
             current_op = operator.mul
         elif token == '/':
             current_op = operator.truediv
-        else:
-            prod = current_op(prod, token)
     return prod
 
 
@@ -229,8 +237,7 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         return float('nan')
 
     # Parse the tree.
-    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
-    math_interpreter.parse_algebra()
+    math_interpreter = compile_expression(math_expr, case_sensitive)
 
     # Get our variables together.
     all_variables, all_functions = add_defaults(variables, functions, case_sensitive)
@@ -238,13 +245,76 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
     # ...and check them
     math_interpreter.check_variables(all_variables, all_functions)
 
+    return math_interpreter.reduce_tree(evaluate_actions(all_variables, all_functions, case_sensitive))
+
+
+def evaluate_samples(variables_list, functions, math_expr, case_sensitive=False):
+    """
+    Evaluate an expression for each of several sets of variables at once.
+
+    Returns the same list as calling `evaluator` with each dictionary in
+    `variables_list`, and raises the same exceptions. The expression is parsed
+    once and, where possible, evaluated a single time with each variable bound
+    to a numpy array of its sampled values.
+    """
+    if not variables_list:
+        return []
+    if math_expr.strip() == "":
+        return [float('nan')] * len(variables_list)
+
+    math_interpreter = compile_expression(math_expr, case_sensitive)
+
+    names = set(variables_list[0])
+    if all(set(variables) == names for variables in variables_list):
+        sampled_variables = {
+            name: numpy.array([variables[name] for variables in variables_list])
+            for name in names
+        }
+    else:
+        sampled_variables = None
+
+    # Only float and complex samples are vectorized: numpy integers would
+    # silently overflow where Python's wouldn't.
+    if sampled_variables is not None and all(
+            values.dtype.kind in 'fc' for values in sampled_variables.values()):
+        all_variables, all_functions = add_defaults(sampled_variables, functions, case_sensitive)
+        math_interpreter.check_variables(all_variables, all_functions)
+
+        # Anything that doesn't evaluate cleanly element-wise (e.g. a division
+        # by zero, which raises for Python numbers but gives inf in numpy, or a
+        # function which doesn't take arrays) is evaluated sample by sample so
+        # that the results and errors are exactly those of `evaluator`.
+        try:
+            with numpy.errstate(all='raise'):
+                result = math_interpreter.reduce_tree(
+                    evaluate_actions(all_variables, all_functions, case_sensitive)
+                )
+            result = numpy.asarray(result)
+            if result.ndim == 0:
+                return [result.item()] * len(variables_list)
+            if result.shape == (len(variables_list),):
+                return result.tolist()
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    return [
+        evaluator(variables, functions, math_expr, case_sensitive)
+        for variables in variables_list
+    ]
+
+
+def evaluate_actions(all_variables, all_functions, case_sensitive):
+    """
+    Return the actions which `ParseAugmenter.reduce_tree` uses to evaluate an
+    expression with the given variables and functions.
+    """
     # Create a recursion to evaluate the tree.
     if case_sensitive:
         casify = lambda x: x
     else:
         casify = lambda x: x.lower()  # Lowercase for case insens.
 
-    evaluate_actions = {
+    return {
         'number': eval_number,
         'variable': lambda x: all_variables[casify(x[0])],
         'function': lambda x: all_functions[casify(x[0])](x[1]),
@@ -255,7 +325,36 @@ def evaluator(variables, functions, math_expr, case_sensitive=False):
         'sum': eval_sum
     }
 
-    return math_interpreter.reduce_tree(evaluate_actions)
+
+_COMPILED_EXPRESSIONS = OrderedDict()
+_COMPILED_EXPRESSIONS_LOCK = threading.Lock()
+
+
+def compile_expression(math_expr, case_sensitive=False):
+    """
+    Return a parsed `ParseAugmenter` for `math_expr`.
+
+    Parsing is the expensive part of evaluating an expression, so the most
+    recently used COMPILED_EXPRESSION_CACHE_SIZE parses are kept and shared.
+    Callers must treat the returned object as read-only. Raises the pyparsing
+    exception if `math_expr` can't be parsed; failures aren't cached.
+    """
+    key = (math_expr, case_sensitive)
+    with _COMPILED_EXPRESSIONS_LOCK:
+        math_interpreter = _COMPILED_EXPRESSIONS.pop(key, None)
+        if math_interpreter is not None:
+            # Re-insert to mark as most recently used
+            _COMPILED_EXPRESSIONS[key] = math_interpreter
+            return math_interpreter
+
+    math_interpreter = ParseAugmenter(math_expr, case_sensitive)
+    math_interpreter.parse_algebra()
+
+    with _COMPILED_EXPRESSIONS_LOCK:
+        _COMPILED_EXPRESSIONS[key] = math_interpreter
+        while len(_COMPILED_EXPRESSIONS) > COMPILED_EXPRESSION_CACHE_SIZE:
+            _COMPILED_EXPRESSIONS.popitem(last=False)
+    return math_interpreter
 
 
 class ParseAugmenter(object):
@@ -558,3 +558,70 @@ class EvaluatorTest(unittest.TestCase):
             calc.evaluator({'r1': 5}, {}, "r1+r2")
         with self.assertRaisesRegexp(calc.UndefinedVariable, 'r1 r3'):
             calc.evaluator(variables, {}, "r1*r3", case_sensitive=True)
+
+
+class EvaluateSamplesTest(unittest.TestCase):
+    """
+    Run tests for calc.evaluate_samples, which must give exactly what
+    calc.evaluator gives for each of the samples.
+    """
+
+    def assert_same_as_evaluator(self, variables_list, math_expr, case_sensitive=False):
+        """
+        Check that `evaluate_samples` matches calling `evaluator` per sample.
+        """
+        expected = [
+            calc.evaluator(variables, {}, math_expr, case_sensitive)
+            for variables in variables_list
+        ]
+        actual = calc.evaluate_samples(variables_list, {}, math_expr, case_sensitive)
+        self.assertEqual(len(actual), len(expected))
+        for actual_value, expected_value in zip(actual, expected):
+            if numpy.isnan(expected_value):
+                self.assertTrue(numpy.isnan(actual_value))
+            else:
+                self.assertAlmostEqual(actual_value, expected_value)
+
+    def test_matches_evaluator(self):
+        variables_list = [{'x': 0.5 + i, 'y': 2.5 - i} for i in range(10)]
+        for math_expr in ["x+y", "x*y/2", "x^2-y", "sin(x)+cos(y)", "x||y", "3*k", "2", ""]:
+            self.assert_same_as_evaluator(
+                [dict(variables, k=1.5) for variables in variables_list], math_expr
+            )
+
+    def test_complex_samples(self):
+        variables_list = [{'z': complex(i, 1)} for i in range(5)]
+        self.assert_same_as_evaluator(variables_list, "z^2 + j")
+
+    def test_falls_back_on_errors(self):
+        """
+        Samples that numpy would treat differently are evaluated one by one,
+        so errors are raised just like `evaluator`.
+        """
+        variables_list = [{'x': 1.0}, {'x': 0.0}]
+        with self.assertRaises(ZeroDivisionError):
+            calc.evaluate_samples(variables_list, {}, "1/x")
+
+        self.assert_same_as_evaluator([{'x': 2.0}, {'x': 3.0}], "fact(x)")
+        with self.assertRaisesRegexp(ValueError, 'factorial'):
+            calc.evaluate_samples([{'x': 2.0}, {'x': -3.0}], {}, "fact(x)")
+
+    def test_integer_and_mismatched_samples(self):
+        self.assert_same_as_evaluator([{'x': 3}, {'x': 4}], "x^50")
+        self.assert_same_as_evaluator([{'x': 3.0}, {'x': 4.0, 'y': 1.0}], "x^2")
+
+    def test_undefined_variable(self):
+        with self.assertRaisesRegexp(calc.UndefinedVariable, 'y'):
+            calc.evaluate_samples([{'x': 1.0}, {'x': 2.0}], {}, "x+y")
+
+    def test_no_samples(self):
+        self.assertEqual(calc.evaluate_samples([], {}, "x+1"), [])
+
+    def test_compiled_expressions_are_cached(self):
+        self.assertIs(calc.compile_expression("x+1"), calc.compile_expression("x+1"))
+        self.assertIsNot(
+            calc.compile_expression("x+1"),
+            calc.compile_expression("x+1", case_sensitive=True)
+        )
+        with self.assertRaises(ParseException):
+            calc.compile_expression("1+.")
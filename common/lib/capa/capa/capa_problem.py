@@ -13,10 +13,13 @@ Main module which shows problems (of "capa" type).
 This is used by capa_module.
 """
 
+from collections import OrderedDict
 from datetime import datetime
+import hashlib
 import logging
 import os.path
 import re
+import threading
 
 from lxml import etree
 from xml.sax.saxutils import unescape
@@ -59,6 +62,143 @@ html_problem_semantics = [
 
 log = logging.getLogger(__name__)
 
+# The number of parsed problems kept by `parse_problem_text`
+PROBLEM_TEMPLATE_CACHE_SIZE = 1000
+
+_PROBLEM_TEMPLATES = OrderedDict()
+_PROBLEM_TEMPLATES_LOCK = threading.Lock()
+_PROBLEM_MAX_SCORES = {}
+
+
+def _problem_text_key(problem_text):
+    """The key that the values derived from `problem_text` are kept under."""
+    text_bytes = problem_text.encode('utf-8') if isinstance(problem_text, unicode) else problem_text
+    return hashlib.sha1(text_bytes).hexdigest()
+
+
+def parse_problem_text(problem_text, problem_id=None):
+    """
+    Convert startouttext and endouttext in `problem_text` to proper <text></text>,
+    and parse it. Returns the converted text and a new copy of its element tree.
+    If `problem_id` is given, the tree's responses, inputs and solutions are
+    given their ids (see `assign_problem_ids`), unless it has <include>s,
+    which have to be processed first.
+
+    The trees of the problems parsed most recently in this process are kept by
+    the hash of their text and their problem_id, so that building a
+    LoncapaProblem for each student only copies the tree instead of parsing it
+    and assigning its ids again. Trees with <include>s aren't kept, as the
+    included files may change.
+    """
+    key = (_problem_text_key(problem_text), problem_id)
+    with _PROBLEM_TEMPLATES_LOCK:
+        template = _PROBLEM_TEMPLATES.pop(key, None)
+        if template is not None:
+            # reinsert as the most recently used
+            _PROBLEM_TEMPLATES[key] = template
+            text, tree = template
+            return text, deepcopy(tree)
+
+    text = re.sub(r"startouttext\s*/", "text", problem_text)
+    text = re.sub(r"endouttext\s*/", "/text", text)
+    tree = etree.XML(text)
+    if tree.find('.//include') is not None:
+        return text, tree
+    if problem_id is not None:
+        assign_problem_ids(tree, problem_id)
+
+    with _PROBLEM_TEMPLATES_LOCK:
+        _PROBLEM_TEMPLATES[key] = (text, deepcopy(tree))
+        if len(_PROBLEM_TEMPLATES) > PROBLEM_TEMPLATE_CACHE_SIZE:
+            _PROBLEM_TEMPLATES.popitem(last=False)
+    return text, tree
+
+
+def _response_xpath():
+    """The xpath that finds every response in a problem's tree."""
+    return '//' + "|//".join(responsetypes.registry.registered_tags())
+
+
+def _response_inputfields(response, input_tags):
+    """Return the inputs and solutions of `response`, in document order."""
+    return [element for element in response.iterdescendants() if element.tag in input_tags]
+
+
+def assign_problem_ids(tree, problem_id):
+    """
+    Give the responses of the problem parsed into `tree`, their inputs and its
+    solutions their ids, which only depend on `problem_id` and the xml.
+    """
+    input_tags = set(inputtypes.registry.registered_tags() + solution_tags)
+    response_id = 1
+    for response in tree.xpath(_response_xpath()):
+        response.set('id', problem_id + "_" + str(response_id))
+        response_id += 1
+
+        # assign one answer_id for each input type or solution type
+        answer_id = 1
+        for entry in _response_inputfields(response, input_tags):
+            entry.attrib['response_id'] = str(response_id)
+            entry.attrib['answer_id'] = str(answer_id)
+            entry.attrib['id'] = "%s_%i_%i" % (problem_id, response_id, answer_id)
+            answer_id = answer_id + 1
+
+    # <solution>...</solution> may not be associated with any specific response; give
+    # IDs for those separately
+    # TODO: We should make the namespaces consistent and unique (e.g. %s_problem_%i).
+    solution_id = 1
+    for solution in tree.findall('.//solution'):
+        solution.attrib['id'] = "%s_solution_%i" % (problem_id, solution_id)
+        solution_id += 1
+
+
+def problem_max_score(problem_text):
+    """
+    Return the maximum score of the problem defined by `problem_text`, as
+    `LoncapaProblem.get_max_score` would, but without building the problem
+    for a student (which runs its script code). The maximum score only depends
+    on the problem's responses and their inputs.
+
+    Returns None if the score can't be known without building the problem:
+    if the problem includes other files, or its xml isn't valid.
+    """
+    key = _problem_text_key(problem_text)
+    if key in _PROBLEM_MAX_SCORES:
+        return _PROBLEM_MAX_SCORES[key]
+
+    try:
+        _, tree = parse_problem_text(problem_text)
+    except (etree.XMLSyntaxError, ValueError):
+        max_score = None
+    else:
+        max_score = _max_score_of_tree(tree)
+
+    if len(_PROBLEM_MAX_SCORES) >= PROBLEM_TEMPLATE_CACHE_SIZE:
+        _PROBLEM_MAX_SCORES.clear()
+    _PROBLEM_MAX_SCORES[key] = max_score
+    return max_score
+
+
+def _max_score_of_tree(tree):
+    """
+    Return the maximum score of the problem parsed into `tree`, finding each
+    response's inputs as `LoncapaProblem._preprocess_problem` does, or None
+    if it can't be known.
+    """
+    if tree.find('.//include') is not None:
+        return None
+
+    input_tags = set(inputtypes.registry.registered_tags() + solution_tags)
+    max_score = 0
+    for response in tree.xpath(_response_xpath()):
+        inputfields = _response_inputfields(response, input_tags)
+        responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
+        response_max_score = responsetype_cls.max_score_from_xml(response, inputfields)
+        if response_max_score is None:
+            return None
+        max_score += response_max_score
+    return max_score
+
 #-----------------------------------------------------------------------------
 # main class for this module
 
@@ -151,16 +291,16 @@ class LoncapaProblem(object):
         self.done = state.get('done', False)
         self.input_state = state.get('input_state', {})
 
-        # Convert startouttext and endouttext to proper <text></text>
-        problem_text = re.sub(r"startouttext\s*/", "text", problem_text)
-        problem_text = re.sub(r"endouttext\s*/", "/text", problem_text)
-        self.problem_text = problem_text
-
-        # parse problem XML file into an element tree
-        self.tree = etree.XML(problem_text)
+        # Convert startouttext and endouttext to proper <text></text>, parse
+        # problem XML file into an element tree, and give its responses,
+        # inputs and solutions their ids
+        self.problem_text, self.tree = parse_problem_text(problem_text, self.problem_id)
 
-        # handle any <include file="foo"> tags
-        self._process_includes()
+        # handle any <include file="foo"> tags, which parse_problem_text
+        # leaves the ids to be assigned after
+        if self.tree.find('.//include') is not None:
+            self._process_includes()
+            assign_problem_ids(self.tree, self.problem_id)
 
         # construct script processor context (eg for customresponse problems)
         self.context = self._extract_context(self.tree)
@@ -681,36 +821,16 @@ class LoncapaProblem(object):
 
     def _preprocess_problem(self, tree):  # private
         """
-        Assign IDs to all the responses
-        Assign sub-IDs to all entries (textline, schematic, etc.)
-        Annoted correctness and value
-        In-place transformation
-
-        Also create capa Response instances for each responsetype and save as self.responders
+        Create capa Response instances for each responsetype and save as self.responders.
+        The IDs of the responses and their entries (textline, schematic, etc.) must
+        have been assigned already (see `assign_problem_ids`).
 
         Obtain all responder answers and save as self.responder_answers dict (key = response)
         """
-        response_id = 1
         self.responders = {}
-        for response in tree.xpath('//' + "|//".join(responsetypes.registry.registered_tags())):
-            response_id_str = self.problem_id + "_" + str(response_id)
-            # create and save ID for this response
-            response.set('id', response_id_str)
-            response_id += 1
-
-            answer_id = 1
-            input_tags = inputtypes.registry.registered_tags()
-            inputfields = tree.xpath(
-                "|".join(['//' + response.tag + '[@id=$id]//' + x for x in (input_tags + solution_tags)]),
-                id=response_id_str
-            )
-
-            # assign one answer_id for each input type or solution type
-            for entry in inputfields:
-                entry.attrib['response_id'] = str(response_id)
-                entry.attrib['answer_id'] = str(answer_id)
-                entry.attrib['id'] = "%s_%i_%i" % (self.problem_id, response_id, answer_id)
-                answer_id = answer_id + 1
+        input_tags = set(inputtypes.registry.registered_tags() + solution_tags)
+        for response in tree.xpath(_response_xpath()):
+            inputfields = _response_inputfields(response, input_tags)
 
             # instantiate capa Response
             responsetype_cls = responsetypes.registry.get_class_for_tag(response.tag)
@@ -728,11 +848,3 @@ class LoncapaProblem(object):
                 log.debug('responder %s failed to properly return get_answers()',
                           self.responders[response])  # FIXME
                 raise
-
-        # <solution>...</solution> may not be associated with any specific response; give
-        # IDs for those separately
-        # TODO: We should make the namespaces consistent and unique (e.g. %s_problem_%i).
-        solution_id = 1
-        for solution in tree.findall('.//solution'):
-            solution.attrib['id'] = "%s_solution_%i" % (self.problem_id, solution_id)
-            solution_id += 1
@@ -4,6 +4,7 @@ from codejail.safe_exec import safe_exec as codejail_safe_exec
 from codejail.safe_exec import not_safe_exec as codejail_not_safe_exec
 from codejail.safe_exec import json_safe, SafeExecException
 from . import lazymod
+from .worker_pool import get_worker_pool
 from dogapi import dog_stats_api
 
 import hashlib
@@ -114,8 +115,11 @@ def safe_exec(code, globals_dict, random_seed=None, python_path=None, cache=None
     code_prolog = CODE_PROLOG % random_seed
 
     # Decide which code executor to use.
+    worker_pool = get_worker_pool()
     if unsafely:
         exec_fn = codejail_not_safe_exec
+    elif worker_pool is not None:
+        exec_fn = worker_pool.safe_exec
     else:
         exec_fn = codejail_safe_exec
 
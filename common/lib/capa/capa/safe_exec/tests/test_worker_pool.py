@@ -0,0 +1,100 @@
+"""Test worker_pool.py"""
+
+import os.path
+import threading
+import time
+import unittest
+
+from mock import patch
+from nose.plugins.skip import SkipTest
+
+from capa.safe_exec import safe_exec, configure_worker_pool
+from capa.safe_exec.worker_pool import get_worker_pool, SandboxWorker, SandboxWorkerPool
+from codejail.safe_exec import SafeExecException
+from codejail.jail_code import is_configured, LIMITS
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        # The pool only runs jailed code.
+        if not is_configured("python"):
+            raise SkipTest
+        configure_worker_pool(2)
+        self.addCleanup(configure_worker_pool, 0)
+
+    def test_pool_is_used(self):
+        self.assertIsInstance(get_worker_pool(), SandboxWorkerPool)
+        g = {}
+        safe_exec("a = int(math.pi)", g)
+        self.assertEqual(g['a'], 3)
+
+    def wait_for_idle_workers(self, pool, count, timeout=30):
+        """Wait for the pool's refill thread to have `count` workers waiting."""
+        deadline = time.time() + timeout
+        while pool._idle.qsize() < count and time.time() < deadline:  # pylint: disable=protected-access
+            time.sleep(0.1)
+        self.assertEqual(pool._idle.qsize(), count)  # pylint: disable=protected-access
+
+    def test_workers_are_replaced(self):
+        pool = get_worker_pool()
+        self.wait_for_idle_workers(pool, 2)
+        worker = pool.take()
+        worker.close()
+        self.wait_for_idle_workers(pool, 2)
+
+    def test_workers_are_replaced_in_background(self):
+        pool = get_worker_pool()
+        self.wait_for_idle_workers(pool, 2)
+        threads = []
+
+        def start_worker(preimports):
+            threads.append(threading.current_thread())
+            return SandboxWorker(preimports)
+
+        with patch('capa.safe_exec.worker_pool.SandboxWorker', side_effect=start_worker):
+            pool.take().close()
+            self.wait_for_idle_workers(pool, 2)
+        self.assertEqual(len(threads), 1)
+        self.assertIsNot(threads[0], threading.current_thread())
+
+    def test_no_state_between_executions(self):
+        g = {}
+        safe_exec("import sys; sys.leaked = 1", g)
+        safe_exec("import sys; a = hasattr(sys, 'leaked')", g)
+        self.assertFalse(g['a'])
+
+    def test_python_lib(self):
+        pylib = os.path.dirname(__file__) + "/test_files/pylib"
+        g = {}
+        safe_exec("import constant; a = constant.THE_CONST", g, python_path=[pylib])
+        self.assertEqual(g['a'], 23)
+
+    def test_raising_exceptions(self):
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("1/0", {})
+        self.assertIn("ZeroDivisionError", cm.exception.message)
+
+    def test_cant_do_something_forbidden(self):
+        with self.assertRaises(SafeExecException) as cm:
+            safe_exec("import os; files = os.listdir('/')", {})
+        self.assertIn("Permission denied", cm.exception.message)
+
+    def test_imports_not_charged_to_cpu_limit(self):
+        cpu = LIMITS.get("CPU")
+        if not cpu:
+            raise SkipTest
+        g = {}
+        safe_exec(
+            "import resource\n"
+            "usage = resource.getrusage(resource.RUSAGE_SELF)\n"
+            "left = resource.getrlimit(resource.RLIMIT_CPU)[0] - (usage.ru_utime + usage.ru_stime)\n",
+            g
+        )
+        # Only the little CPU used by the code itself is charged, and the
+        # imports don't leave the code a whole second more than CodeJail would
+        self.assertGreater(g['left'], cpu - 0.5)
+        self.assertLess(g['left'], cpu + 1)
+
+    def test_not_configured(self):
+        configure_worker_pool(0)
+        self.assertIsNone(get_worker_pool())
@@ -0,0 +1,337 @@
+"""
+A pool of warm CodeJail sandboxes for capa's safe_exec.
+
+Running code through `codejail.safe_exec.safe_exec` starts a new sandboxed
+Python for every execution, and the code then imports numpy and scipy again.
+The pool starts the sandboxes ahead of time instead: each worker is the same
+jailed Python that CodeJail would run (same command, user and resource
+limits), which imports the slow modules and then waits for its code and
+globals on stdin. Taking a worker for an execution has a background thread
+start another one to replace it.
+
+Each worker runs exactly one execution, in its own home directory, and then
+exits. Reusing a worker would let one submission's code see or change the
+state the next one runs in, and CodeJail's CPU limit is per process, so
+recycling after a single execution is what keeps the sandboxing the same as
+CodeJail's.
+
+The resource limits differ from CodeJail's in two ways, both because of the
+imports done before the code arrives:
+
+- A worker starts with PREIMPORT_CPU more seconds of CPU than CodeJail's
+  limit, to do its imports. Once they're done, and before it reads its code,
+  it lowers its soft and hard CPU limits to the CPU it has used so far,
+  rounded up to the whole second that RLIMIT_CPU counts in, plus CodeJail's
+  limit, and never above the hard limit it was started with. The code
+  therefore gets CodeJail's limit plus less than the second lost to
+  rounding. A worker that takes more than PREIMPORT_CPU to import is killed
+  and never runs code.
+- The memory limit (CodeJail's VMEM) covers the preimported modules, which
+  are then part of the process, so code that doesn't use them has less
+  memory than under CodeJail. Raise VMEM by their size (tens of MB for numpy
+  and scipy) if code runs close to it.
+"""
+import atexit
+import json
+import logging
+import os
+import os.path
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from Queue import Queue, Empty
+
+from codejail import jail_code
+from codejail.safe_exec import json_safe, SafeExecException
+from dogapi import dog_stats_api
+
+log = logging.getLogger(__name__)
+
+# The modules every worker imports while it waits for code to run
+PREIMPORTS = ["numpy", "scipy"]
+
+# The CPU seconds a worker may use for its imports, on top of CodeJail's
+# CPU limit for the code (see the module docstring)
+PREIMPORT_CPU = 10
+
+# The program run by each worker, mirroring the one `codejail.safe_exec` runs,
+# except that the sys.path entries come in with the code.
+WORKER_CODE = """\
+import sys
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+class DevNull(object):
+    def write(self, *args, **kwargs):
+        pass
+
+sys.stdout = DevNull()
+
+for modname in %(preimports)r:
+    try:
+        __import__(modname)
+    except ImportError:
+        pass
+
+# The imports aren't charged to the code: from here, allow it the CPU limit
+if %(cpu_limit)r:
+    import math
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    cpu_limit = int(math.ceil(used)) + %(cpu_limit)r
+    _, hard_limit = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard_limit != resource.RLIM_INFINITY:
+        cpu_limit = min(cpu_limit, hard_limit)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+
+code, g_dict, python_path = json.load(sys.stdin)
+sys.path.extend(python_path)
+
+exec code in g_dict
+
+ok_types = (type(None), int, long, float, str, unicode, list, tuple, dict)
+bad_keys = ("__builtins__",)
+def jsonable(v):
+    if not isinstance(v, ok_types):
+        return False
+    try:
+        json.dumps(v)
+    except Exception:
+        return False
+    return True
+g_dict = dict((k, v) for k, v in g_dict.iteritems() if jsonable(v) and k not in bad_keys)
+
+json.dump(g_dict, sys.__stdout__)
+"""
+
+_POOL_SIZE = 0
+_POOL_PREIMPORTS = PREIMPORTS
+_POOL = None
+_POOL_PID = None
+_POOL_LOCK = threading.Lock()
+
+
+def configure_worker_pool(size, preimports=None):
+    """
+    Keep `size` warm sandboxes per process for `safe_exec` (0 turns the pool
+    off), which import `preimports` (default `PREIMPORTS`) while they wait.
+
+    The pool is only used once CodeJail is configured to run python.
+    """
+    global _POOL_SIZE, _POOL_PREIMPORTS, _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.close()
+            _POOL = None
+        _POOL_SIZE = size
+        _POOL_PREIMPORTS = PREIMPORTS if preimports is None else preimports
+
+
+def get_worker_pool():
+    """
+    Return the process's SandboxWorkerPool, or None if it isn't configured or
+    CodeJail can't run python. Forked processes make their own pool.
+    """
+    global _POOL, _POOL_PID  # pylint: disable=global-statement
+    if not _POOL_SIZE or not jail_code.is_configured("python"):
+        return None
+    with _POOL_LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            _POOL, _POOL_PID = SandboxWorkerPool(_POOL_SIZE, _POOL_PREIMPORTS), os.getpid()
+        return _POOL
+
+
+def _set_worker_process_limits():
+    """
+    Set CodeJail's resource limits on a worker process, but with PREIMPORT_CPU
+    more seconds of CPU for its imports. The worker lowers its CPU limit
+    itself once they're done.
+
+    This runs in the forked process before it starts the worker, so changing
+    CodeJail's limits here doesn't change them for the process running the
+    pool.
+    """
+    cpu = jail_code.LIMITS.get("CPU")
+    if cpu:
+        jail_code.LIMITS["CPU"] = cpu + PREIMPORT_CPU
+    jail_code.set_process_limits()
+
+
+class SandboxWorker(object):
+    """
+    A jailed Python started ahead of time, which runs one piece of code.
+    """
+    def __init__(self, preimports):
+        self.homedir = tempfile.mkdtemp(prefix="codejail-")
+        # The sandbox user needs to be able to read it, as with CodeJail
+        os.chmod(self.homedir, 0775)
+        tmptmp = os.path.join(self.homedir, "tmp")
+        os.mkdir(tmptmp)
+        os.chmod(tmptmp, 0777)
+        with open(os.path.join(self.homedir, "jailed_code"), "wb") as jailed:
+            jailed.write(WORKER_CODE % {'preimports': preimports, 'cpu_limit': jail_code.LIMITS.get("CPU")})
+
+        command = jail_code.COMMANDS["python"]
+        cmd = []
+        if command.get('user'):
+            cmd.extend(['sudo', '-u', command['user']])
+        cmd.extend(command['cmdline_start'])
+        cmd.append("jailed_code")
+
+        # close_fds, so that a worker doesn't hold the other workers' stdin
+        # open, which would keep them from seeing the end of their code.
+        self.process = subprocess.Popen(
+            cmd, preexec_fn=_set_worker_process_limits, cwd=self.homedir, env={"TMPDIR": "tmp"},
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, close_fds=True,
+        )
+
+    def is_alive(self):
+        """Is the worker still waiting for its code?"""
+        return self.process.poll() is None
+
+    def safe_exec(self, code, globals_dict, python_path=None, slug=None):
+        """
+        Run `code` with `globals_dict` as `codejail.safe_exec.safe_exec` would,
+        updating `globals_dict` with the resulting globals.
+        """
+        try:
+            path_names = []
+            for pydir in python_path or ():
+                pybase = os.path.basename(pydir)
+                dest = os.path.join(self.homedir, pybase)
+                if os.path.isdir(pydir):
+                    shutil.copytree(pydir, dest)
+                else:
+                    shutil.copy(pydir, dest)
+                path_names.append(pybase)
+
+            if slug:
+                log.debug("Executing jailed code %s in a warm sandbox", slug)
+
+            stdin = json.dumps([code, json_safe(globals_dict), path_names])
+            # The real time limit starts when the code is handed over, not
+            # when the worker started waiting.
+            realtime = jail_code.LIMITS.get("REALTIME")
+            if realtime:
+                jail_code.ProcessKillerThread(self.process, limit=realtime).start()
+            stdout, stderr = self.process.communicate(stdin)
+        finally:
+            self.close()
+
+        if self.process.returncode != 0:
+            raise SafeExecException("Couldn't execute jailed code: %s" % stderr)
+        globals_dict.update(json.loads(stdout))
+
+    def close(self):
+        """Stop the worker if it's still waiting, and remove its home directory."""
+        if self.is_alive():
+            # Without any code to read, the worker exits
+            self.process.stdin.close()
+            self.process.wait()
+        shutil.rmtree(self.homedir, ignore_errors=True)
+
+
+class SandboxWorkerPool(object):
+    """
+    Keeps `size` SandboxWorkers waiting, replacing each one as it is taken.
+    The workers are started by a background thread, so that executions don't
+    wait for them.
+
+    Reports to datadog how many workers were waiting when one was needed
+    (capa.safe_exec.pool.idle_workers), how many executions were running
+    (capa.safe_exec.pool.busy_workers), executions which had to start a
+    worker (capa.safe_exec.pool.cold_start), and how long executions took
+    (capa.safe_exec.pool.exec_time).
+    """
+    def __init__(self, size, preimports=PREIMPORTS):
+        self.size = size
+        self.preimports = preimports
+        self._idle = Queue()
+        self._busy = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._pid = os.getpid()
+        # One item for each worker the refill thread should start
+        self._wanted = Queue()
+        for _ in xrange(size):
+            self._wanted.put(None)
+        refill_thread = threading.Thread(target=self._refill, name="sandbox-worker-refill")
+        refill_thread.daemon = True
+        refill_thread.start()
+        atexit.register(self.close)
+
+    def _refill(self):
+        """Start a worker for each one wanted, until the pool is closed."""
+        while True:
+            self._wanted.get()
+            if self._closed:
+                return
+            try:
+                worker = SandboxWorker(self.preimports)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Couldn't start a sandbox worker")
+                continue
+            if self._closed:
+                worker.close()
+                return
+            self._idle.put(worker)
+
+    def take(self):
+        """
+        Return a waiting worker, starting a new one if none are, and have
+        another started in the background to take its place.
+        """
+        dog_stats_api.histogram('capa.safe_exec.pool.idle_workers', self._idle.qsize())
+        worker = None
+        while worker is None:
+            try:
+                worker = self._idle.get_nowait()
+            except Empty:
+                dog_stats_api.increment('capa.safe_exec.pool.cold_start')
+                worker = SandboxWorker(self.preimports)
+                break
+            if not worker.is_alive():
+                # It died waiting, so it can't be trusted to run code
+                log.warning("Discarding a sandbox worker which exited with %s", worker.process.returncode)
+                worker.close()
+                worker = None
+
+        if not self._closed:
+            self._wanted.put(None)
+        return worker
+
+    def safe_exec(self, code, globals_dict, python_path=None, slug=None):
+        """
+        Run `code` in a warm sandbox. Takes the same arguments, and has the
+        same effects, as `codejail.safe_exec.safe_exec`.
+        """
+        worker = self.take()
+        with self._lock:
+            self._busy += 1
+            dog_stats_api.gauge('capa.safe_exec.pool.busy_workers', self._busy)
+        start = time.time()
+        try:
+            worker.safe_exec(code, globals_dict, python_path=python_path, slug=slug)
+        finally:
+            dog_stats_api.histogram('capa.safe_exec.pool.exec_time', time.time() - start)
+            with self._lock:
+                self._busy -= 1
+
+    def close(self):
+        """Stop the waiting workers, and the thread starting new ones."""
+        self._closed = True
+        self._wanted.put(None)
+        if os.getpid() != self._pid:
+            # The workers belong to the process this one was forked from
+            return
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except Empty:
+                return
+            worker.close()
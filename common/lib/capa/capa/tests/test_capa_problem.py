@@ -0,0 +1,154 @@
+"""
+Tests of building LoncapaProblems from their xml.
+"""
+import textwrap
+import unittest
+
+from mock import patch
+
+from capa.capa_problem import parse_problem_text, problem_max_score
+from .response_xml_factory import (
+    AnnotationResponseXMLFactory, MultipleChoiceResponseXMLFactory, NumericalResponseXMLFactory
+)
+from . import new_loncapa_problem
+
+
+class ParseProblemTextTest(unittest.TestCase):
+    """
+    Tests of the parsed problem templates shared by LoncapaProblems.
+    """
+    def test_converts_outtext(self):
+        text, tree = parse_problem_text("<problem><startouttext />Hi<endouttext /></problem>")
+        self.assertEqual(text, "<problem><text>Hi</text></problem>")
+        self.assertEqual(tree.find('text').text, "Hi")
+
+    def test_returns_copies(self):
+        xml_str = "<problem><p>Copied</p></problem>"
+        _, first_tree = parse_problem_text(xml_str)
+        first_tree.set('id', 'changed')
+        first_tree.remove(first_tree.find('p'))
+
+        _, second_tree = parse_problem_text(xml_str)
+        self.assertIsNone(second_tree.get('id'))
+        self.assertEqual(second_tree.find('p').text, "Copied")
+
+    def test_problems_preprocess_their_own_copy(self):
+        xml_str = NumericalResponseXMLFactory().build_xml(answer="5", tolerance="1%")
+        first = new_loncapa_problem(xml_str)
+        second = new_loncapa_problem(xml_str)
+
+        self.assertIsNot(first.tree, second.tree)
+        self.assertEqual(first.get_html(), second.get_html())
+        self.assertEqual(first.grade_answers({'1_2_1': '5'}).get_correctness('1_2_1'), 'correct')
+        self.assertEqual(second.grade_answers({'1_2_1': '4'}).get_correctness('1_2_1'), 'incorrect')
+
+    def test_assigns_ids(self):
+        xml_str = textwrap.dedent("""
+            <problem>
+                <stringresponse answer="a">
+                    <textline/>
+                    <solution>Because</solution>
+                </stringresponse>
+                <stringresponse answer="b">
+                    <textline/>
+                </stringresponse>
+            </problem>
+        """)
+        for _ in range(2):
+            _, tree = parse_problem_text(xml_str, '1')
+            self.assertEqual([response.get('id') for response in tree.findall('stringresponse')], ['1_1', '1_2'])
+            self.assertEqual([textline.get('id') for textline in tree.iter('textline')], ['1_2_1', '1_3_1'])
+            self.assertEqual(tree.find('.//solution').get('id'), '1_solution_1')
+
+        # ids are kept apart for each problem_id
+        _, tree = parse_problem_text(xml_str, '2')
+        self.assertEqual(tree.find('stringresponse').get('id'), '2_1')
+        _, tree = parse_problem_text(xml_str)
+        self.assertIsNone(tree.find('stringresponse').get('id'))
+
+    def test_responders_get_assigned_ids(self):
+        xml_str = MultipleChoiceResponseXMLFactory().build_xml(choices=[False, True], num_responses=2)
+        for problem in (new_loncapa_problem(xml_str), new_loncapa_problem(xml_str)):
+            answer_ids = sorted(
+                answer_id for responder in problem.responders.values() for answer_id in responder.answer_ids
+            )
+            self.assertEqual(answer_ids, ['1_2_1', '1_3_1'])
+
+    def test_includes_not_kept(self):
+        xml_str = textwrap.dedent("""
+            <problem>
+                <include file="missing.xml"/>
+            </problem>
+        """)
+        _, first_tree = parse_problem_text(xml_str)
+        _, second_tree = parse_problem_text(xml_str)
+        self.assertIsNotNone(second_tree.find('include'))
+        self.assertIsNot(first_tree, second_tree)
+
+
+class ProblemMaxScoreTest(unittest.TestCase):
+    """
+    Tests of the max scores computed without building LoncapaProblems.
+    """
+    def assert_same_max_score(self, xml_str):
+        max_score = new_loncapa_problem(xml_str).get_max_score()
+        self.assertEqual(problem_max_score(xml_str), max_score)
+
+    def test_one_input(self):
+        self.assert_same_max_score(NumericalResponseXMLFactory().build_xml(answer="5"))
+
+    def test_multiple_inputs(self):
+        self.assert_same_max_score(
+            NumericalResponseXMLFactory().build_xml(answer="5", num_responses=2, num_inputs=1)
+        )
+
+    def test_points(self):
+        xml_str = textwrap.dedent("""
+            <problem>
+                <stringresponse answer="a">
+                    <textline points="3"/>
+                </stringresponse>
+                <customresponse cfn="check">
+                    <textline points="2"/>
+                    <textline/>
+                </customresponse>
+                <script type="loncapa/python">
+            def check(expect, ans):
+                return True
+                </script>
+            </problem>
+        """)
+        self.assert_same_max_score(xml_str)
+        self.assertEqual(problem_max_score(xml_str), 6)
+
+    def test_choices(self):
+        self.assert_same_max_score(
+            MultipleChoiceResponseXMLFactory().build_xml(choices=[False, True, False])
+        )
+
+    def test_annotation(self):
+        xml_str = AnnotationResponseXMLFactory().build_xml(
+            title="title", text="text", comment="comment", comment_prompt="prompt",
+            tag_prompt="tag prompt", options=[('green', 'correct'), ('blue', 'incorrect')]
+        )
+        self.assert_same_max_score(xml_str)
+        self.assertEqual(problem_max_score(xml_str), 2)
+
+    def test_includes(self):
+        xml_str = "<problem><include file='missing.xml'/></problem>"
+        self.assertIsNone(problem_max_score(xml_str))
+
+    def test_invalid(self):
+        self.assertIsNone(problem_max_score("<problem><stringresponse></problem>"))
+        self.assertIsNone(problem_max_score(
+            "<problem><stringresponse answer='a'><textline points='many'/></stringresponse></problem>"
+        ))
+        self.assertIsNone(problem_max_score("<problem><numericalresponse answer='1'/></problem>"))
+
+    def test_not_built(self):
+        # The max score doesn't need the problem to have been built
+        xml_str = NumericalResponseXMLFactory().build_xml(answer="6")
+        with patch('capa.capa_problem.safe_exec') as mock_safe_exec:
+            self.assertEqual(problem_max_score(xml_str), 1)
+        self.assertFalse(mock_safe_exec.called)
+        self.assert_same_max_score(xml_str)
@@ -48,6 +48,29 @@ def compare_with_tolerance(complex1, complex2, tolerance=default_tolerance, rela
         return abs(complex1 - complex2) <= tolerance
 
 
+def tolerance_bounds(number, tolerance=default_tolerance):
+    """
+    Return (low, high) bounds on the real numbers that `compare_with_tolerance`
+    could find equal to the real `number` with `tolerance` (a string, as for
+    `compare_with_tolerance`), or None if there are no such bounds.
+
+    The bounds are slightly wider than needed, to allow for rounding, so the
+    numbers within them still need to be compared.
+    """
+    if tolerance.endswith('%'):
+        relative = abs(evaluator(dict(), dict(), tolerance[:-1]) * 0.01)
+        if relative >= 1:
+            return None
+        # abs(number - other) <= relative * max(abs(number), abs(other)), and
+        # abs(other) <= abs(number) + abs(number - other)
+        width = relative * abs(number) / (1 - relative)
+    else:
+        width = abs(evaluator(dict(), dict(), tolerance))
+
+    width = width * (1 + 1e-9) + 1e-300
+    return number - width, number + width
+
+
 def contextualize_text(text, context):  # private
     """
     Takes a string with variables. E.g. $a+$b.
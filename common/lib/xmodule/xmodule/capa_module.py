@@ -5,6 +5,7 @@ import sys
 
 from pkg_resources import resource_string
 
+from capa.capa_problem import problem_max_score
 from .capa_base import CapaMixin, CapaFields, ComplexEncoder
 from .progress import Progress
 from xmodule.x_module import XModule, module_attr
@@ -160,6 +161,19 @@ class CapaDescriptor(CapaFields, RawDescriptor):
             path[8:],
         ]
 
+    def static_max_score(self):
+        """
+        The maximum score of the problem, computed from its xml without
+        building it for a student, or None if that isn't possible.
+
+        What a problem's scripts do can depend on the student's seed, so
+        problems with scripts are only scored statically if they aren't
+        randomized, and so build the same way for every student.
+        """
+        if self.rerandomize != 'never' and '<script' in self.data:
+            return None
+        return problem_max_score(self.data)
+
     @property
     def non_editable_metadata_fields(self):
         non_editable_fields = super(CapaDescriptor, self).non_editable_metadata_fields
@@ -7,7 +7,8 @@ Currently experimental - not for instructor use, yet.
 import logging
 import json
 import random
-import copy
+from bisect import bisect_left, bisect_right
+from math import isinf, isnan
 
 from pkg_resources import resource_string
 
@@ -17,12 +18,18 @@ from xmodule.x_module import XModule
 from xmodule.raw_module import RawDescriptor
 from xblock.fields import Scope, String, Integer, Boolean, Dict, List
 
-from capa.responsetypes import FormulaResponse
+from calc import evaluator
+from capa.responsetypes import FormulaResponse, NumericalResponse
+from capa.util import tolerance_bounds
 
 from django.utils.html import escape
 
 log = logging.getLogger(__name__)
 
+# The NumericalAnswerIndexes used in this process, by tolerance and answers
+_ANSWER_INDEXES = {}
+ANSWER_INDEX_CACHE_SIZE = 1000
+
 
 class CrowdsourceHinterFields(object):
     """Defines fields for the crowdsource hinter module."""
@@ -53,6 +60,53 @@ class CrowdsourceHinterFields(object):
                          scope=Scope.user_state, default=False)
 
 
+class NumericalAnswerIndex(object):
+    """
+    The answers of a numerical response hinter sorted by their values, so that
+    the answers that may be equal to an answer with a tolerance can be found
+    without comparing it to every answer.
+    """
+    def __init__(self, answers, tolerance):
+        self.tolerance = tolerance
+        # Answers without a real value can't be sorted, so are always candidates
+        self.unindexed = []
+        indexed = []
+        for answer in answers:
+            value = self.real_value(answer)
+            if value is None:
+                self.unindexed.append(answer)
+            else:
+                indexed.append((value, answer))
+        indexed.sort()
+        self.values = [value for value, _ in indexed]
+        self.answers = [answer for _, answer in indexed]
+
+    @staticmethod
+    def real_value(answer):
+        """
+        Return the value of `answer` if it is a finite real number, otherwise None.
+        """
+        try:
+            value = complex(evaluator(dict(), dict(), answer))
+        except Exception:  # pylint: disable=broad-except
+            # Left for compare_answer to deal with
+            return None
+        if value.imag != 0 or isinf(value.real) or isnan(value.real):
+            return None
+        return value.real
+
+    def candidates(self, answer):
+        """
+        Return the answers that may be equal to `answer` with the tolerance.
+        """
+        value = self.real_value(answer)
+        bounds = tolerance_bounds(value, self.tolerance) if value is not None else None
+        if bounds is None:
+            return self.answers + self.unindexed
+        low, high = bounds
+        return self.answers[bisect_left(self.values, low):bisect_right(self.values, high)] + self.unindexed
+
+
 class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
     """
     An Xmodule that makes crowdsourced hints.
@@ -74,6 +128,9 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
           'js': []}
     js_module_name = "Hinter"
 
+    # The tolerance of the numerical response being hinted, if it is one
+    answer_tolerance = None
+
     def __init__(self, *args, **kwargs):
         super(CrowdsourceHinterModule, self).__init__(*args, **kwargs)
         # We need to know whether we are working with a FormulaResponse problem.
@@ -93,6 +150,8 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         if hasattr(responder, 'compare_answer') and hasattr(responder, 'validate_answer'):
             self.compare_answer = responder.compare_answer
             self.validate_answer = responder.validate_answer
+            if isinstance(responder, NumericalResponse):
+                self.answer_tolerance = responder.tolerance
         else:
             # This response type is not supported!
             log.exception('Response type not supported for hinting: ' + str(responder))
@@ -145,12 +204,30 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         """
         return str(answer.values()[0])
 
+    def get_answer_index(self):
+        """
+        Return the NumericalAnswerIndex of the answer keys of self.hints, or None
+        if the answers aren't numerical.
+        """
+        if self.answer_tolerance is None:
+            return None
+
+        key = (self.answer_tolerance, frozenset(self.hints))
+        index = _ANSWER_INDEXES.get(key)
+        if index is None:
+            if len(_ANSWER_INDEXES) >= ANSWER_INDEX_CACHE_SIZE:
+                _ANSWER_INDEXES.clear()
+            index = _ANSWER_INDEXES[key] = NumericalAnswerIndex(key[1], self.answer_tolerance)
+        return index
+
     def get_matching_answers(self, answer):
         """
         Look in self.hints, and find all answer keys that are "equal with tolerance"
         to the input answer.
         """
-        return [key for key in self.hints if self.compare_answer(key, answer)]
+        index = self.get_answer_index()
+        candidates = index.candidates(answer) if index is not None else self.hints
+        return [key for key in candidates if self.compare_answer(key, answer)]
 
     def handle_ajax(self, dispatch, data):
         """
@@ -205,15 +282,13 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
 
         # For all answers similar enough to our own, accumulate all hints together.
         # Also track the original answer of each hint.
+        all_hints = self.hints
         matching_answers = self.get_matching_answers(answer)
         matching_hints = {}
         for matching_answer in matching_answers:
-            temp_dict = copy.deepcopy(self.hints[matching_answer])
-            for key, value in temp_dict.items():
-                # Each value now has hint, votes, matching_answer.
-                temp_dict[key] = value + [matching_answer]
-            matching_hints.update(temp_dict)
-        # matching_hints now maps pk's to lists of [hint, votes, matching_answer]
+            for key, (hint, votes) in all_hints[matching_answer].iteritems():
+                matching_hints[key] = (hint, votes, matching_answer)
+        # matching_hints now maps pk's to (hint, votes, matching_answer)
 
         # Finally, randomly choose a subset of matching_hints to actually show.
         if not matching_hints:
@@ -231,13 +306,14 @@ class CrowdsourceHinterModule(CrowdsourceHinterFields, XModule):
         # The brackets surrounding the index are for backwards compatability purposes.
         # (It used to be that each answer was paired with multiple hints in a list.)
         self.previous_answers += [[best_hint_answer, [best_hint_index]]]
+        matching_hint_items = matching_hints.items()
         for _ in xrange(min(2, n_hints - 1)):
             # Keep making random hints until we hit a target, or run out.
             while True:
                 # random.choice randomly chooses an element from its input list.
                 # (We then unpack the item, in this case data for a hint.)
                 (hint_index, (rand_hint, _, hint_answer)) =\
-                    random.choice(matching_hints.items())
+                    random.choice(matching_hint_items)
                 if rand_hint not in hints:
                     break
             hints.append(rand_hint)
@@ -39,6 +39,33 @@ INVALID_HTML_CHARS = re.compile(r"[^\w-]", re.UNICODE)
 
 _LocationBase = namedtuple('LocationBase', 'tag org course category name revision')
 
+# Locations are built from the same url strings and tuples over and over, so the
+# validated Location for each is kept and shared (see Location.__new__), as are
+# their url() and html_id(). Each cache is emptied when it reaches this size.
+LOCATION_CACHE_SIZE = 100000
+_LOCATION_CACHE = {}
+_URL_CACHE = {}
+_HTML_ID_CACHE = {}
+
+
+def _cache_value(cache, key, value):
+    """
+    Store `value` under `key` in one of the location caches, emptying it first if it's full.
+    """
+    if len(cache) >= LOCATION_CACHE_SIZE:
+        cache.clear()
+    cache[key] = value
+    return value
+
+
+def clear_location_caches():
+    """
+    Empty the caches of Locations and of their urls and html ids.
+    """
+    _LOCATION_CACHE.clear()
+    _URL_CACHE.clear()
+    _HTML_ID_CACHE.clear()
+
 
 def _check_location_part(val, regexp):
     """
@@ -159,6 +186,9 @@ class Location(_LocationBase):
 
         Components may be set to None, which may be interpreted in some contexts
         to mean wildcard selection.
+
+        Locations created from strings and tuples are cached, so creating one from the
+        same value again returns the same object without parsing and validating it.
         """
         if (org is None and course is None and category is None and name is None and revision is None):
             location = loc_or_tag
@@ -168,6 +198,20 @@ class Location(_LocationBase):
         if location is None:
             return _LocationBase.__new__(_cls, *([None] * 6))
 
+        if isinstance(location, Location):
+            return location
+
+        cache_key = None
+        if _cls is Location and isinstance(location, (basestring, tuple)):
+            cache_key = location
+            try:
+                cached = _LOCATION_CACHE.get(cache_key)
+            except TypeError:
+                # a tuple with unhashable parts, which won't be a valid location
+                cache_key = cached = None
+            if cached is not None:
+                return cached
+
         def check_dict(dict_):
             # Order matters, so flatten out into a list
             keys = ['tag', 'org', 'course', 'category', 'name', 'revision']
@@ -181,16 +225,14 @@ class Location(_LocationBase):
             # names allow colons
             _check_location_part(list_[4], INVALID_CHARS_NAME)
 
-        if isinstance(location, Location):
-            return location
-        elif isinstance(location, basestring):
+        if isinstance(location, basestring):
             match = URL_RE.match(location)
             if match is None:
                 log.debug(u"location %r doesn't match URL", location)
                 raise InvalidLocationError(location)
             groups = match.groupdict()
             check_dict(groups)
-            return _LocationBase.__new__(_cls, **groups)
+            new_location = _LocationBase.__new__(_cls, **groups)
         elif isinstance(location, (list, tuple)):
             if len(location) not in (5, 6):
                 log.debug(u'location has wrong length')
@@ -202,7 +244,7 @@ class Location(_LocationBase):
                 args = tuple(location)
 
             check_list(args)
-            return _LocationBase.__new__(_cls, *args)
+            new_location = _LocationBase.__new__(_cls, *args)
         elif isinstance(location, dict):
             kwargs = dict(location)
             kwargs.setdefault('revision', None)
@@ -212,13 +254,20 @@ class Location(_LocationBase):
         else:
             raise InvalidLocationError(location)
 
+        if cache_key is not None:
+            _cache_value(_LOCATION_CACHE, cache_key, new_location)
+        return new_location
+
     def url(self):
         """
         Return a string containing the URL for this location
         """
-        url = u"{0.tag}://{0.org}/{0.course}/{0.category}/{0.name}".format(self)
-        if self.revision:
-            url += u"@{rev}".format(rev=self.revision)  # pylint: disable=E1101
+        url = _URL_CACHE.get(self)
+        if url is None:
+            url = u"{0.tag}://{0.org}/{0.course}/{0.category}/{0.name}".format(self)
+            if self.revision:
+                url += u"@{rev}".format(rev=self.revision)  # pylint: disable=E1101
+            _cache_value(_URL_CACHE, self, url)
         return url
 
     def html_id(self):
@@ -226,8 +275,11 @@ class Location(_LocationBase):
         Return a string with a version of the location that is safe for use in
         html id attributes
         """
-        id_string = u"-".join(v for v in self.list() if v is not None)
-        return Location.clean_for_html(id_string)
+        html_id = _HTML_ID_CACHE.get(self)
+        if html_id is None:
+            id_string = u"-".join(v for v in self.list() if v is not None)
+            html_id = _cache_value(_HTML_ID_CACHE, self, Location.clean_for_html(id_string))
+        return html_id
 
     def dict(self):
         """
@@ -8,11 +8,13 @@ from __future__ import absolute_import
 from importlib import import_module
 
 import re
+from uuid import uuid4
 
 from django.conf import settings
 from django.core.cache import get_cache, InvalidCacheBackendError
 from django.dispatch import Signal
 from xmodule.modulestore.loc_mapper_store import LocMapperStore
+from xmodule.modulestore.xml import XMLModuleStore
 from xmodule.util.django import get_current_request_hostname
 
 # We may not always have the request_cache module available
@@ -38,6 +40,50 @@ def load_function(path):
     return getattr(import_module(module_path), name)
 
 
+def _metadata_inheritance_cache():
+    """
+    Return the cache shared by LMS and Studio for derived course content data.
+    """
+    try:
+        return get_cache('mongo_metadata_inheritance')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def _course_content_version_key(course_id):
+    """
+    Key for the content version of `course_id`. Modulestore write signals only
+    carry org/course, so the run is dropped.
+    """
+    return u'course_content_version.{}'.format(u'/'.join(course_id.split('/')[:2]))
+
+
+def course_content_version(course_id):
+    """
+    Return an opaque token that changes whenever the content of `course_id` is
+    written through a modulestore. Values computed from course content (e.g.
+    cached grades) can include this token in their cache keys so that they are
+    dropped on course republish.
+    """
+    cache = _metadata_inheritance_cache()
+    key = _course_content_version_key(course_id)
+    version = cache.get(key)
+    if version is None:
+        # Never reuse a version, even if the old one was evicted
+        cache.add(key, uuid4().hex)
+        version = cache.get(key)
+    return version
+
+
+def bump_course_content_version(sender, course_id=None, **kwargs):  # pylint: disable=unused-argument
+    """
+    Receiver for `modulestore_update_signal` which changes the content version
+    of the course that was written to.
+    """
+    if course_id is not None:
+        _metadata_inheritance_cache().set(_course_content_version_key(course_id), uuid4().hex)
+
+
 def create_modulestore_instance(engine, doc_store_config, options):
     """
     This will return a new instance of a modulestore given an engine and options
@@ -51,20 +97,26 @@ def create_modulestore_instance(engine, doc_store_config, options):
         if key in _options and isinstance(_options[key], basestring):
             _options[key] = load_function(_options[key])
 
+    if issubclass(class_, XMLModuleStore):
+        _options.setdefault('load_processes', getattr(settings, 'XML_MODULESTORE_LOAD_PROCESSES', None))
+        _options.setdefault('snapshot_dir', getattr(settings, 'XML_MODULESTORE_SNAPSHOT_DIR', None))
+        if _options['snapshot_dir'] is not None:
+            _options.setdefault('snapshot_key', settings.SECRET_KEY)
+
     if HAS_REQUEST_CACHE:
         request_cache = RequestCache.get_request_cache()
     else:
         request_cache = None
 
-    try:
-        metadata_inheritance_cache = get_cache('mongo_metadata_inheritance')
-    except InvalidCacheBackendError:
-        metadata_inheritance_cache = get_cache('default')
+    metadata_inheritance_cache = _metadata_inheritance_cache()
+
+    modulestore_update_signal = Signal(providing_args=['modulestore', 'course_id', 'location'])
+    modulestore_update_signal.connect(bump_course_content_version)
 
     return class_(
         metadata_inheritance_cache_subsystem=metadata_inheritance_cache,
         request_cache=request_cache,
-        modulestore_update_signal=Signal(providing_args=['modulestore', 'course_id', 'location']),
+        modulestore_update_signal=modulestore_update_signal,
         xblock_mixins=getattr(settings, 'XBLOCK_MIXINS', ()),
         xblock_select=getattr(settings, 'XBLOCK_SELECT_FUNCTION', None),
         doc_store_config=doc_store_config,
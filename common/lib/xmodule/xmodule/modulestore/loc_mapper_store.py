@@ -2,6 +2,7 @@
 Method for converting among our differing Location/Locator whatever reprs
 '''
 from random import randint
+import collections
 import re
 import pymongo
 import bson.son
@@ -136,53 +137,8 @@ class LocMapperStore(object):
         if cached_value:
             return cached_value
 
-        maps = self.location_map.find(location_id)
-        maps = list(maps)
-        if len(maps) == 0:
-            if add_entry_if_missing:
-                # create a new map
-                course_location = location.replace(category='course', name=location_id['_id']['name'])
-                self.create_map_entry(course_location)
-                entry = self.location_map.find_one(location_id)
-            else:
-                raise ItemNotFoundError()
-        elif len(maps) == 1:
-            entry = maps[0]
-        else:
-            # find entry w/o name, if any; otherwise, pick arbitrary
-            entry = maps[0]
-            for item in maps:
-                if 'name' not in item['_id']:
-                    entry = item
-                    break
-
-        block_id = entry['block_map'].get(self.encode_key_for_mongo(location.name))
-        if block_id is None:
-            if add_entry_if_missing:
-                block_id = self._add_to_block_map(location, location_id, entry['block_map'])
-            else:
-                raise ItemNotFoundError(location)
-        elif isinstance(block_id, dict):
-            # jump_to_id uses a None category.
-            if location.category is None:
-                if len(block_id) == 1:
-                    # unique match (most common case)
-                    block_id = block_id.values()[0]
-                else:
-                    raise InvalidLocationError()
-            elif location.category in block_id:
-                block_id = block_id[location.category]
-            elif add_entry_if_missing:
-                block_id = self._add_to_block_map(location, location_id, entry['block_map'])
-            else:
-                raise ItemNotFoundError()
-        else:
-            raise InvalidLocationError()
-
-        published_usage = BlockUsageLocator(
-            package_id=entry['course_id'], branch=entry['prod_branch'], block_id=block_id)
-        draft_usage = BlockUsageLocator(
-            package_id=entry['course_id'], branch=entry['draft_branch'], block_id=block_id)
+        entry = self._find_map_entry(location_id, location, add_entry_if_missing)
+        published_usage, draft_usage = self._usages_in_map_entry(location, location_id, entry, add_entry_if_missing)
         if published:
             result = published_usage
         else:
@@ -191,6 +147,60 @@ class LocMapperStore(object):
         self._cache_location_map_entry(old_style_course_id, location, published_usage, draft_usage)
         return result
 
+    def translate_locations(self, old_style_course_id, locations, published=True, add_entry_if_missing=True):
+        """
+        Translate the given module locations to Locators as translate_location does, but with one
+        cache get_many and set_many for the lot and at most one read of the mapping table per course.
+
+        Returns the Locators in the order of the given locations.
+
+        :param old_style_course_id: the course_id used in old mongo not the new one (optional, will use
+        each location)
+        :param locations: a list of Locations pointing to modules
+        :param published: a boolean to indicate whether the caller wants the draft or published branch.
+        :param add_entry_if_missing: a boolean as to whether to raise ItemNotFoundError or to create an entry if
+        the course or a block is not found in the map.
+        """
+        # group the locations by the course mapping they're looked up in
+        courses = collections.OrderedDict()
+        course_location_id = None
+        if old_style_course_id:
+            course_location_id = self._interpret_location_course_id(old_style_course_id, None)
+        for location in locations:
+            location_id = course_location_id or self._interpret_location_course_id(None, location)
+            course_id = old_style_course_id or self._generate_location_course_id(location_id)
+            courses.setdefault(course_id, (location_id, []))[1].append(location)
+
+        cache_keys = [
+            (course_id, location, u'{}+{}'.format(course_id, location.url()))
+            for course_id, (_, course_locations) in courses.iteritems()
+            for location in course_locations
+        ]
+        usages = self.cache.get_many([cache_key for _, _, cache_key in cache_keys])
+
+        setmany = {}
+        for course_id, (location_id, course_locations) in courses.iteritems():
+            missing = [
+                location for location in course_locations
+                if not usages.get(u'{}+{}'.format(course_id, location.url()))
+            ]
+            if not missing:
+                continue
+            entry = self._find_map_entry(location_id, missing[0], add_entry_if_missing)
+            for location in missing:
+                published_usage, draft_usage = self._usages_in_map_entry(
+                    location, location_id, entry, add_entry_if_missing
+                )
+                usages[u'{}+{}'.format(course_id, location.url())] = (published_usage, draft_usage)
+                setmany.update(self._location_map_cache_entries(course_id, location, published_usage, draft_usage))
+        if setmany:
+            self.cache.set_many(setmany)
+
+        usages_by_location = {
+            location: usages[cache_key][0 if published else 1] for _, location, cache_key in cache_keys
+        }
+        return [usages_by_location[location] for location in locations]
+
     def translate_locator_to_location(self, locator, get_course=False):
         """
         Returns an old style Location for the given Locator if there's an appropriate entry in the
@@ -259,6 +269,59 @@ class LocMapperStore(object):
                 return result
         return None
 
+    def translate_locators_to_locations(self, locators):
+        """
+        Return the old style Locations for the given BlockUsageLocators as translate_locator_to_location
+        does, but with one cache get_many and set_many for the lot and at most one read of the mapping
+        table.
+
+        Returns the Locations in the order of the given locators, with None for any locator which
+        isn't mapped.
+
+        :param locators: a list of BlockUsageLocators
+        """
+        locations = self.cache.get_many([unicode(locator) for locator in locators])
+        missing = [locator for locator in locators if not locations.get(unicode(locator))]
+        if missing:
+            # This does not require that the courses exist in any modulestore
+            # only that they have mapping entries.
+            package_ids = list(set(locator.package_id for locator in missing))
+            maps = self.location_map.find({'course_id': {'$in': package_ids}})
+            # cache all entries and take, for each locator, the first candidate which maps its block_id
+            wanted = set((locator.package_id, locator.block_id) for locator in missing)
+            setmany = {}
+            found = {}
+            for candidate in maps:
+                old_course_id = self._generate_location_course_id(candidate['_id'])
+                candidate_found = {}
+                for old_name, cat_to_usage in candidate['block_map'].iteritems():
+                    for category, block_id in cat_to_usage.iteritems():
+                        location = Location(
+                            'i4x',
+                            candidate['_id']['org'],
+                            candidate['_id']['course'],
+                            category,
+                            self.decode_key_from_mongo(old_name),
+                            None)
+                        published_locator = BlockUsageLocator(
+                            candidate['course_id'], branch=candidate['prod_branch'], block_id=block_id
+                        )
+                        draft_locator = BlockUsageLocator(
+                            candidate['course_id'], branch=candidate['draft_branch'], block_id=block_id
+                        )
+                        setmany.update(self._location_map_cache_entries(
+                            old_course_id, location, published_locator, draft_locator
+                        ))
+                        if (candidate['course_id'], block_id) in wanted:
+                            candidate_found[(candidate['course_id'], block_id)] = location
+                for key, location in candidate_found.iteritems():
+                    found.setdefault(key, location)
+            if setmany:
+                self.cache.set_many(setmany)
+            for locator in missing:
+                locations[unicode(locator)] = found.get((locator.package_id, locator.block_id))
+        return [locations[unicode(locator)] for locator in locators]
+
     def translate_location_to_course_locator(self, old_style_course_id, location, published=True):
         """
         Used when you only need the CourseLocator and not a full BlockUsageLocator. Probably only
@@ -293,6 +356,66 @@ class LocMapperStore(object):
         else:
             return draft_course_locator
 
+    def _find_map_entry(self, location_id, location, add_entry_if_missing):
+        """
+        Read the mapping table entry for location_id, creating one for the course of location if there
+        isn't one and add_entry_if_missing.
+        """
+        maps = self.location_map.find(location_id)
+        maps = list(maps)
+        if len(maps) == 0:
+            if add_entry_if_missing:
+                # create a new map
+                course_location = location.replace(category='course', name=location_id['_id']['name'])
+                self.create_map_entry(course_location)
+                entry = self.location_map.find_one(location_id)
+            else:
+                raise ItemNotFoundError()
+        elif len(maps) == 1:
+            entry = maps[0]
+        else:
+            # find entry w/o name, if any; otherwise, pick arbitrary
+            entry = maps[0]
+            for item in maps:
+                if 'name' not in item['_id']:
+                    entry = item
+                    break
+        return entry
+
+    def _usages_in_map_entry(self, location, location_id, entry, add_entry_if_missing):
+        """
+        Return the published and draft BlockUsageLocators for location in the mapping table entry,
+        adding location to the entry's block_map if it's not there and add_entry_if_missing.
+        """
+        block_id = entry['block_map'].get(self.encode_key_for_mongo(location.name))
+        if block_id is None:
+            if add_entry_if_missing:
+                block_id = self._add_to_block_map(location, location_id, entry['block_map'])
+            else:
+                raise ItemNotFoundError(location)
+        elif isinstance(block_id, dict):
+            # jump_to_id uses a None category.
+            if location.category is None:
+                if len(block_id) == 1:
+                    # unique match (most common case)
+                    block_id = block_id.values()[0]
+                else:
+                    raise InvalidLocationError()
+            elif location.category in block_id:
+                block_id = block_id[location.category]
+            elif add_entry_if_missing:
+                block_id = self._add_to_block_map(location, location_id, entry['block_map'])
+            else:
+                raise ItemNotFoundError()
+        else:
+            raise InvalidLocationError()
+
+        published_usage = BlockUsageLocator(
+            package_id=entry['course_id'], branch=entry['prod_branch'], block_id=block_id)
+        draft_usage = BlockUsageLocator(
+            package_id=entry['course_id'], branch=entry['draft_branch'], block_id=block_id)
+        return published_usage, draft_usage
+
     def _add_to_block_map(self, location, location_id, block_map):
         '''add the given location to the block_map and persist it'''
         if self._block_id_is_guid(location.name):
@@ -445,6 +568,14 @@ class LocMapperStore(object):
         Also caches the inverse. If the location is category=='course', it caches it for
         the get_course query
         """
+        self.cache.set_many(
+            self._location_map_cache_entries(old_course_id, location, published_usage, draft_usage)
+        )
+
+    def _location_map_cache_entries(self, old_course_id, location, published_usage, draft_usage):
+        """
+        Return the cache entries mapping location to the draft and published Locators and back.
+        """
         setmany = {}
         if location.category == 'course':
             setmany[u'courseId+{}'.format(published_usage.package_id)] = location
@@ -452,4 +583,4 @@ class LocMapperStore(object):
         setmany[unicode(draft_usage)] = location
         setmany[u'{}+{}'.format(old_course_id, location.url())] = (published_usage, draft_usage)
         setmany[old_course_id] = (published_usage, draft_usage)
-        self.cache.set_many(setmany)
+        return setmany
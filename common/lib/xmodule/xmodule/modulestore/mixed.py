@@ -79,6 +79,39 @@ class MixedModuleStore(ModuleStoreWriteBase):
         locator = loc_mapper().translate_location(course_id, reference, reference.revision == 'draft', True)
         return unicode(locator) if stringify else locator
 
+    def _locators_to_locations(self, references):
+        """
+        Convert the referenced locators to locations in bulk, casting to and from strings as necessary
+        """
+        locators = [
+            BlockUsageLocator(url=reference) if isinstance(reference, basestring) else reference
+            for reference in references
+        ]
+        locations = loc_mapper().translate_locators_to_locations(locators)
+        return [
+            location.url() if isinstance(reference, basestring) else location
+            for reference, location in zip(references, locations)
+        ]
+
+    def _locations_to_locators(self, course_id, references):
+        """
+        Convert the referenced locations to locators in bulk, casting to and from strings as necessary
+        """
+        locations = [
+            Location(reference) if isinstance(reference, basestring) else reference
+            for reference in references
+        ]
+        # translate the draft and non-draft locations separately as _location_to_locator does
+        locators = {}
+        for published in (True, False):
+            batch = [location for location in locations if (location.revision == 'draft') == published]
+            if batch:
+                locators.update(zip(batch, loc_mapper().translate_locations(course_id, batch, published, True)))
+        return [
+            unicode(locators[location]) if isinstance(reference, basestring) else locators[location]
+            for reference, location in zip(references, locations)
+        ]
+
     def _incoming_reference_adaptor(self, store, course_id, reference):
         """
         Convert the reference to the type the persistence layer wants
@@ -99,28 +132,55 @@ class MixedModuleStore(ModuleStoreWriteBase):
             return self._location_to_locator(course_id, reference)
         return self._locator_to_location(reference)
 
+    def _incoming_references_adaptor(self, store, course_id, references):
+        """
+        Convert the list of references to the type the persistence layer wants, in bulk
+        """
+        if issubclass(store.reference_type, Location if self.use_locations else Locator):
+            return references
+        if store.reference_type == Location:
+            return self._locators_to_locations(references)
+        return self._locations_to_locators(course_id, references)
+
+    def _outgoing_references_adaptor(self, store, course_id, references):
+        """
+        Convert the list of references to the type the application wants, in bulk
+        """
+        if issubclass(store.reference_type, Location if self.use_locations else Locator):
+            return references
+        if store.reference_type == Location:
+            return self._locations_to_locators(course_id, references)
+        return self._locators_to_locations(references)
+
     def _xblock_adaptor_iterator(self, adaptor, string_converter, store, course_id, xblock):
         """
         Change all reference fields in this xblock to the type expected by the receiving layer
+
+        :param adaptor: a bulk adaptor which converts a list of references
         """
+        # gather the references of all the fields (e.g. children) so they're converted in one batch
+        reference_fields = []
+        references = []
         for field in xblock.fields.itervalues():
             if field.is_set_on(xblock):
                 if isinstance(field, Reference):
-                    field.write_to(
-                        xblock,
-                        adaptor(store, course_id, field.read_from(xblock))
-                    )
+                    reference_fields.append((field, None))
+                    references.append(field.read_from(xblock))
                 elif isinstance(field, ReferenceList):
-                    field.write_to(
-                        xblock,
-                        [
-                            adaptor(store, course_id, ref)
-                            for ref in field.read_from(xblock)
-                        ]
-                    )
+                    field_references = field.read_from(xblock)
+                    reference_fields.append((field, len(field_references)))
+                    references.extend(field_references)
                 elif isinstance(field, String):
                     # replace links within the string
                     string_converter(field, xblock)
+
+        if references:
+            converted = iter(adaptor(store, course_id, references))
+            for field, length in reference_fields:
+                if length is None:
+                    field.write_to(xblock, next(converted))
+                else:
+                    field.write_to(xblock, [next(converted) for _ in xrange(length)])
         return xblock
 
     def _incoming_xblock_adaptor(self, store, course_id, xblock):
@@ -131,7 +191,7 @@ class MixedModuleStore(ModuleStoreWriteBase):
             course_id, store.reference_type, xblock.location
         )
         return self._xblock_adaptor_iterator(
-            self._incoming_reference_adaptor, string_converter, store, course_id, xblock
+            self._incoming_references_adaptor, string_converter, store, course_id, xblock
         )
 
     def _outgoing_xblock_adaptor(self, store, course_id, xblock):
@@ -142,7 +202,7 @@ class MixedModuleStore(ModuleStoreWriteBase):
             course_id, xblock.location.__class__, xblock.location
         )
         return self._xblock_adaptor_iterator(
-            self._outgoing_reference_adaptor, string_converter, store, course_id, xblock
+            self._outgoing_references_adaptor, string_converter, store, course_id, xblock
         )
 
     CONVERT_RE = re.compile(r"/jump_to_id/({}+)".format(ALLOWED_ID_CHARS))
@@ -325,8 +385,7 @@ class MixedModuleStore(ModuleStoreWriteBase):
         store = self._get_modulestore_for_courseid(course_id)
         decoded_ref = self._incoming_reference_adaptor(store, course_id, location)
         parents = store.get_parent_locations(decoded_ref, course_id)
-        return [self._outgoing_reference_adaptor(store, course_id, reference)
-                for reference in parents]
+        return self._outgoing_references_adaptor(store, course_id, parents)
 
     def get_modulestore_type(self, course_id):
         """
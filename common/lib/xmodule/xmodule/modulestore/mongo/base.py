@@ -15,7 +15,7 @@ structure:
 import pymongo
 import sys
 import logging
-import copy
+import time
 
 from bson.son import SON
 from fs.osfs import OSFS
@@ -246,11 +246,28 @@ def location_to_query(location, wildcard=True):
     return query
 
 
+# Categories of the items which can have children, and so appear as containers
+# in the metadata inheritance tree.
+# note this is a bit ugly as when we add new categories of containers, we have to add it here
+INHERITANCE_CONTAINER_CATEGORIES = [
+    'course', 'chapter', 'sequential', 'vertical', 'videosequence',
+    'wrapper', 'problemset', 'conditional', 'randomize'
+]
+
+
 def metadata_cache_key(location):
     """Turn a `Location` into a useful cache key."""
     return u"{0.org}/{0.course}".format(location)
 
 
+def metadata_cache_version_key(key):
+    """
+    Return the cache key of the counter of writes to the inheritance tree
+    cached under `key`.
+    """
+    return u"{}.version".format(key)
+
+
 class MongoModuleStore(ModuleStoreWriteBase):
     """
     A Mongodb backed ModuleStore
@@ -320,23 +337,44 @@ class MongoModuleStore(ModuleStoreWriteBase):
         '''
 
         # get all collections in the course, this query should not return any leaf nodes
-        # note this is a bit ugly as when we add new categories of containers, we have to add it here
         query = {'_id.org': location.org,
                  '_id.course': location.course,
-                 '_id.category': {'$in': ['course', 'chapter', 'sequential', 'vertical', 'videosequence',
-                                          'wrapper', 'problemset', 'conditional', 'randomize']}
+                 '_id.category': {'$in': INHERITANCE_CONTAINER_CATEGORIES}
                  }
-        # we just want the Location, children, and inheritable metadata
-        record_filter = {'_id': 1, 'definition.children': 1}
 
-        # just get the inheritable metadata since that is all we need for the computation
-        # this minimizes both data pushed over the wire
+        # call out to the DB
+        resultset = self.collection.find(query, self._inheritance_record_filter())
+
+        results_by_url, root = self._collate_inheritance_results(resultset)
+
+        # now traverse the tree and compute down the inherited metadata
+        metadata_to_inherit = {}
+        if root is not None:
+            self._propagate_inherited_metadata(
+                results_by_url, root, results_by_url[root].get('metadata', {}), metadata_to_inherit
+            )
+
+        return metadata_to_inherit
+
+    @staticmethod
+    def _inheritance_record_filter():
+        """
+        Return the mongo field filter for the inheritance tree computation: the
+        Location, children, and inheritable metadata. This minimizes the data
+        pushed over the wire.
+        """
+        record_filter = {'_id': 1, 'definition.children': 1}
         for field_name in InheritanceMixin.fields:
             record_filter['metadata.{0}'.format(field_name)] = 1
+        return record_filter
 
-        # call out to the DB
-        resultset = self.collection.find(query, record_filter)
-
+    @staticmethod
+    def _collate_inheritance_results(resultset):
+        """
+        Index the container records in `resultset` by their non-draft location
+        url. Returns a tuple of that dict and the url of the course, if it was
+        among the results.
+        """
         results_by_url = {}
         root = None
 
@@ -356,62 +394,182 @@ class MongoModuleStore(ModuleStoreWriteBase):
             if location.category == 'course':
                 root = location.url()
 
-        # now traverse the tree and compute down the inherited metadata
-        metadata_to_inherit = {}
+        return results_by_url, root
 
-        def _compute_inherited_metadata(url):
-            """
-            Helper method for computing inherited metadata for a specific location url
-            """
-            my_metadata = results_by_url[url].get('metadata', {})
+    @staticmethod
+    def _layer_metadata(inherited_metadata, own_metadata):
+        """
+        Return the metadata that a container which explicitly sets
+        `own_metadata` passes on to its children, given that it inherits
+        `inherited_metadata`.
+
+        The returned dict may be `inherited_metadata` itself, so the dicts in an
+        inheritance tree are shared and must never be mutated.
+        """
+        if not own_metadata:
+            return inherited_metadata
+        metadata = dict(inherited_metadata)
+        metadata.update(own_metadata)
+        return metadata
 
-            # go through all the children and recurse, but only if we have
+    def _propagate_inherited_metadata(self, results_by_url, url, metadata, metadata_to_inherit):
+        """
+        Record in `metadata_to_inherit` the metadata inherited by every
+        descendant of the container at `url`, whose own effective metadata is
+        `metadata`. Descendant containers must be in `results_by_url`.
+        """
+        stack = [(url, metadata)]
+        while stack:
+            url, metadata = stack.pop()
+            # go through all the children, but only descend into the ones we have
             # in the result set. Remember results will not contain leaf nodes
             for child in results_by_url[url].get('definition', {}).get('children', []):
                 if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
-                    new_child_metadata.update(results_by_url[child].get('metadata', {}))
-                    results_by_url[child]['metadata'] = new_child_metadata
-                    metadata_to_inherit[child] = new_child_metadata
-                    _compute_inherited_metadata(child)
+                    child_metadata = self._layer_metadata(metadata, results_by_url[child].get('metadata', {}))
+                    metadata_to_inherit[child] = child_metadata
+                    stack.append((child, child_metadata))
                 else:
                     # this is likely a leaf node, so let's record what metadata we need to inherit
-                    metadata_to_inherit[child] = my_metadata
+                    metadata_to_inherit[child] = metadata
 
-        if root is not None:
-            _compute_inherited_metadata(root)
+    def _update_metadata_inheritance_tree(self, tree, location):
+        """
+        Update `tree`, the metadata inheritance tree of the course containing
+        `location`, in place to reflect a write to the item at `location`. Only
+        the subtree under `location` is re-read from the DB.
 
-        return metadata_to_inherit
+        Returns False if the write can't be applied incrementally (e.g. the item
+        is the course, or was deleted), in which case the whole tree has to be
+        recomputed.
+        """
+        location = Location(location).replace(revision=None)
+        if location.category not in INHERITANCE_CONTAINER_CATEGORIES:
+            # Leaf metadata isn't inherited by anything, and the leaf's own entry
+            # only changes when its parent's children or metadata do
+            return True
+        if location.category == 'course':
+            return False
 
-    def get_cached_metadata_inheritance_tree(self, location, force_refresh=False):
-        '''
-        TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
-        '''
-        key = metadata_cache_key(location)
-        tree = {}
+        record_filter = self._inheritance_record_filter()
+        course_query = {
+            '_id.org': location.org,
+            '_id.course': location.course,
+            '_id.category': {'$in': INHERITANCE_CONTAINER_CATEGORIES},
+        }
 
-        if not force_refresh:
-            # see if we are first in the request cache (if present)
-            if self.request_cache is not None and key in self.request_cache.data.get('metadata_inheritance', {}):
-                return self.request_cache.data['metadata_inheritance'][key]
+        # find what the item inherits from its parent
+        parent_query = dict(course_query)
+        parent_query['definition.children'] = location.url()
+        parent = self.collection.find_one(parent_query, record_filter)
+        if parent is None:
+            return False
+        parent_location = Location(parent['_id']).replace(revision=None)
+        if parent_location.category == 'course':
+            parent_metadata = parent.get('metadata', {})
+        else:
+            parent_metadata = tree.get(parent_location.url())
+            if parent_metadata is None:
+                return False
 
-            # then look in any caching subsystem (e.g. memcached)
-            if self.metadata_inheritance_cache_subsystem is not None:
-                tree = self.metadata_inheritance_cache_subsystem.get(key, {})
-            else:
-                logging.warning('Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is OK in localdev and testing environment. Not OK in production.')
+        # fetch the containers in the subtree a level at a time
+        results_by_url = {}
+        level = [location]
+        while level:
+            level_query = dict(course_query)
+            level_query['_id.name'] = {'$in': list(set(loc.name for loc in level))}
+            level_urls = set(loc.url() for loc in level)
+            level_results, _ = self._collate_inheritance_results(self.collection.find(level_query, record_filter))
+            level = []
+            for url, result in level_results.iteritems():
+                if url in level_urls and url not in results_by_url:
+                    results_by_url[url] = result
+                    level.extend(
+                        child for child in (
+                            Location(child_url) for child_url in result.get('definition', {}).get('children', [])
+                        )
+                        if child.category in INHERITANCE_CONTAINER_CATEGORIES
+                    )
+
+        if location.url() not in results_by_url:
+            return False
 
-        if not tree:
-            # if not in subsystem, or we are on force refresh, then we have to compute
-            tree = self.compute_metadata_inheritance_tree(location)
+        metadata = self._layer_metadata(parent_metadata, results_by_url[location.url()].get('metadata', {}))
+        tree[location.url()] = metadata
+        self._propagate_inherited_metadata(results_by_url, location.url(), metadata, tree)
+        return True
 
-            # now write out computed tree to caching subsystem (e.g. memcached), if available
-            if self.metadata_inheritance_cache_subsystem is not None:
-                self.metadata_inheritance_cache_subsystem.set(key, tree)
+    def _metadata_inheritance_tree_version(self, key, increment=False):
+        """
+        Return the number of writes to the inheritance tree cached under `key`
+        in the caching subsystem, first counting one more if `increment`.
+
+        The trees in the caching subsystem are stored with the count they were
+        computed at, and are only used while it's still current. Processes
+        updating the same tree at once can then never lose each other's
+        updates: a tree that misses an update is left behind by its count.
+
+        Returns None if the caching subsystem can't keep the count (e.g. it's
+        a dummy cache), in which case no tree is stored in it.
+        """
+        cache = self.metadata_inheritance_cache_subsystem
+        version_key = metadata_cache_version_key(key)
+        for _ in range(2):
+            # Start each counter somewhere new, so that a counter that was
+            # evicted can't come back to the count of a tree that was left behind
+            cache.add(version_key, int(time.time() * 1000))
+            if not increment:
+                return cache.get(version_key)
+            try:
+                return cache.incr(version_key)
+            except ValueError:
+                # evicted since it was added, so try once more
+                pass
+        return None
+
+    def _lookup_versioned_metadata_inheritance_tree(self, key):
+        """
+        Return the (version, tree) stored under `key` in the caching subsystem,
+        or (None, None) if there isn't one.
+        """
+        entry = self.metadata_inheritance_cache_subsystem.get(key)
+        if not isinstance(entry, tuple):
+            # missing, or stored before trees were versioned
+            return None, None
+        return entry
+
+    def _lookup_metadata_inheritance_tree(self, key):
+        """
+        Return the inheritance tree cached under `key` in the request cache or
+        the caching subsystem, or None if there isn't one (or the cached one is
+        out of date).
+        """
+        # see if we are first in the request cache (if present)
+        if self.request_cache is not None and key in self.request_cache.data.get('metadata_inheritance', {}):
+            return self.request_cache.data['metadata_inheritance'][key]
+
+        # then look in any caching subsystem (e.g. memcached)
+        if self.metadata_inheritance_cache_subsystem is not None:
+            version_key = metadata_cache_version_key(key)
+            cached = self.metadata_inheritance_cache_subsystem.get_many([key, version_key])
+            entry = cached.get(key)
+            if not isinstance(entry, tuple) or entry[0] != cached.get(version_key):
+                # missing, stored before trees were versioned, or out of date
+                return None
+            return entry[1] or None
+        else:
+            logging.warning('Running MongoModuleStore without a metadata_inheritance_cache_subsystem. This is OK in localdev and testing environment. Not OK in production.')
+        return None
+
+    def _store_metadata_inheritance_tree(self, key, tree, version=None):
+        """
+        Cache `tree` under `key` in the request cache and, if `version` is
+        given, in the caching subsystem, as computed at that version.
+        """
+        # now write out computed tree to caching subsystem (e.g. memcached), if available
+        if version is not None and self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set(key, (version, tree))
 
-        # now populate a request_cache, if available. NOTE, we are outside of the
-        # scope of the above if: statement so that after a memcache hit, it'll get
-        # put into the request_cache
+        # now populate a request_cache, if available.
         if self.request_cache is not None:
             # we can't assume the 'metadatat_inheritance' part of the request cache dict has been
             # defined
@@ -419,16 +577,63 @@ class MongoModuleStore(ModuleStoreWriteBase):
                 self.request_cache.data['metadata_inheritance'] = {}
             self.request_cache.data['metadata_inheritance'][key] = tree
 
+    def get_cached_metadata_inheritance_tree(self, location, force_refresh=False):
+        '''
+        TODO (cdodge) This method can be deleted when the 'split module store' work has been completed
+        '''
+        key = metadata_cache_key(location)
+        tree = None
+
+        if not force_refresh:
+            tree = self._lookup_metadata_inheritance_tree(key)
+
+        if tree is None:
+            # if not in subsystem, or we are on force refresh, then we have to compute
+            version = None
+            if self.metadata_inheritance_cache_subsystem is not None:
+                # read the version before the tree, so that a write made while
+                # computing it leaves it out of date
+                version = self._metadata_inheritance_tree_version(key)
+            tree = self.compute_metadata_inheritance_tree(location)
+            self._store_metadata_inheritance_tree(key, tree, version)
+        else:
+            # NOTE, after a memcache hit, the tree still gets put into the request_cache
+            self._store_metadata_inheritance_tree(key, tree)
+
         return tree
 
     def refresh_cached_metadata_inheritance_tree(self, location):
         """
         Refresh the cached metadata inheritance tree for the org/course combination
-        for location
+        for location. If the tree is cached, and no other process has updated it
+        since it was, only the part of it under location is recomputed.
         """
         pseudo_course_id = '/'.join([location.org, location.course])
-        if pseudo_course_id not in self.ignore_write_events_on_courses:
-            self.get_cached_metadata_inheritance_tree(location, force_refresh=True)
+        if pseudo_course_id in self.ignore_write_events_on_courses:
+            return
+        if Location(location).category not in INHERITANCE_CONTAINER_CATEGORIES:
+            # Leaf metadata isn't inherited by anything
+            return
+
+        key = metadata_cache_key(location)
+        if self.metadata_inheritance_cache_subsystem is None:
+            tree = self._lookup_metadata_inheritance_tree(key)
+            if tree is not None and self._update_metadata_inheritance_tree(tree, location):
+                self._store_metadata_inheritance_tree(key, tree)
+            else:
+                self.get_cached_metadata_inheritance_tree(location, force_refresh=True)
+            return
+
+        # Only the process that takes the tree from one version to the next
+        # may patch it; any other has to recompute it.
+        version = self._metadata_inheritance_tree_version(key, increment=True)
+        cached_version, tree = self._lookup_versioned_metadata_inheritance_tree(key)
+        if (
+            version is None or cached_version != version - 1 or
+            not self._update_metadata_inheritance_tree(tree, location)
+        ):
+            tree = self.compute_metadata_inheritance_tree(location)
+        self._store_metadata_inheritance_tree(key, tree, version)
 
     def _clean_item_data(self, item):
         """
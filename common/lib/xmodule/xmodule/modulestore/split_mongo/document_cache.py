@@ -0,0 +1,245 @@
+"""
+A process-wide cache of split modulestore documents (structures and
+definitions) keyed by their id.
+
+Split documents are versioned, so the document for a given id doesn't change
+once written. That lets the documents be shared by every thread and request of
+a process, instead of being fetched from Mongo again by each one.
+
+The exception is structures, which `continue_version` edits rewrite in place
+(see `MongoConnection.update_structure`). Caches of documents which may be
+rewritten record a version for each document in their backing cache, and only
+trust a copy of the document read at its current version.
+"""
+import collections
+import logging
+import threading
+from uuid import uuid4
+
+import bson
+
+# Default bounds, in bytes of BSON, on the documents kept per collection
+STRUCTURE_CACHE_BYTES = 64 * 1024 * 1024
+DEFINITION_CACHE_BYTES = 32 * 1024 * 1024
+# The largest document, in bytes of BSON, to put in the backing cache. Memcached
+# doesn't store items over 1MB (and doesn't say so), and the key and pickling
+# take a little of that.
+BACKING_CACHE_MAX_BYTES = 1000 * 1000
+
+log = logging.getLogger(__name__)
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def shared_document_cache(name, max_bytes, tz_aware=True, backing_cache=None, rewritable=False):
+    """
+    Return the process's DocumentCache for `name` with the other arguments, creating it if there
+    isn't one yet.
+    """
+    key = (name, max_bytes, tz_aware, backing_cache, rewritable)
+    with _CACHES_LOCK:
+        if key not in _CACHES:
+            _CACHES[key] = DocumentCache(name, max_bytes, tz_aware, backing_cache, rewritable)
+        return _CACHES[key]
+
+
+class DocumentCache(object):
+    """
+    A thread-safe LRU cache of Mongo documents keyed by `_id`, bounded by the
+    total size of the documents.
+
+    The documents are kept as BSON and every `get` decodes a new copy, as the
+    modulestore modifies the documents it fetches. If given a `backing_cache`
+    (e.g. a memcached django cache), documents that aren't in this process's
+    cache are looked for there before going to Mongo.
+
+    If `rewritable`, documents may be rewritten in place (see `rewrite`) by any
+    process. Each document then has a version in the backing cache, which is
+    checked on every `get` (costing a round trip to the backing cache). Without a backing cache, other processes' rewrites
+    can't be noticed, so a rewritable cache keeps nothing.
+
+    Values derived from a document (see `derived`) are kept with it in this
+    process, and dropped when it is replaced or evicted. They don't count
+    towards `max_bytes`.
+    """
+    def __init__(self, name, max_bytes, tz_aware=True, backing_cache=None, rewritable=False):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.tz_aware = tz_aware
+        self.backing_cache = backing_cache
+        self.rewritable = rewritable
+        # maps ids to (version, BSON) pairs
+        self._documents = collections.OrderedDict()
+        self._derived = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _backing_key(self, key):
+        """The key for the document with id `key` in the backing cache."""
+        return u'split_document.{}.{}'.format(self.name, key)
+
+    def _version_key(self, key):
+        """The key for the version of the document with id `key` in the backing cache."""
+        return u'split_document_version.{}.{}'.format(self.name, key)
+
+    def _decode(self, data):
+        """Decode a new copy of a document from its BSON."""
+        return bson.BSON(data).decode(tz_aware=self.tz_aware)
+
+    def version(self, key):
+        """
+        Return the current version of the document with id `key`, which is None unless the cache
+        is rewritable.
+
+        Get the version before reading the document from Mongo, and pass it to `set`, so that a
+        rewrite in between isn't missed.
+        """
+        if not self.rewritable or self.backing_cache is None:
+            return None
+        version = self.backing_cache.get(self._version_key(key))
+        if version is None:
+            # never rewritten, or the version was evicted: give it a new one, which makes any
+            # copies read at an older version stale
+            self.backing_cache.add(self._version_key(key), uuid4().hex)
+            version = self.backing_cache.get(self._version_key(key))
+        return version
+
+    def get(self, key):
+        """
+        Return a copy of the document with id `key`, or None if it isn't cached.
+        """
+        with self._lock:
+            entry = self._documents.pop(key, None)
+            if entry is not None:
+                # reinsert as the most recently used
+                self._documents[key] = entry
+
+        if self.rewritable and self.backing_cache is not None:
+            version = self.version(key)
+            if entry is not None and entry[0] != version:
+                self._discard(key)
+                entry = None
+        else:
+            version = None
+
+        if entry is None and self.backing_cache is not None:
+            entry = self.backing_cache.get(self._backing_key(key))
+            if entry is not None and entry[0] == version:
+                self._store(key, entry)
+            else:
+                entry = None
+
+        return self._decode(entry[1]) if entry is not None else None
+
+    def get_many(self, keys):
+        """
+        Return a dict mapping each of `keys` that is cached to a copy of its document.
+        """
+        documents = {}
+        for key in keys:
+            document = self.get(key)
+            if document is not None:
+                documents[key] = document
+        return documents
+
+    def derived(self, key, name, compute):
+        """
+        Return the value called `name` derived from the document with id `key`,
+        calling `compute()` to get it only if it hasn't been derived from the
+        cached version of the document yet.
+
+        The value is shared with every other caller, so it must not be modified.
+        """
+        with self._lock:
+            entry = self._documents.get(key)
+            derived = self._derived.get(key, {})
+            if entry is not None and name in derived:
+                return derived[name]
+
+        value = compute()
+        with self._lock:
+            # only keep it if the document wasn't replaced meanwhile
+            if entry is not None and self._documents.get(key) is entry:
+                self._derived.setdefault(key, {})[name] = value
+        return value
+
+    def set(self, document, version=None):
+        """
+        Cache `document`, replacing any cached document with the same id.
+
+        `version` is the document's `version` from before it was read, for a rewritable cache.
+        """
+        entry = (version, bson.BSON.encode(document))
+        self._store(document['_id'], entry)
+        if not (self.rewritable and version is None):
+            self._store_in_backing_cache(document['_id'], entry)
+
+    def rewrite(self, document):
+        """
+        Cache `document`, which has just been rewritten in place, as a new version of the document
+        with its id, making every process's copies of the previous version stale.
+        """
+        key = document['_id']
+        if self.backing_cache is None:
+            return
+        version = uuid4().hex
+        entry = (version, bson.BSON.encode(document))
+        self._store(key, entry)
+        # store the document before its version, so that whoever sees the version finds it
+        self._store_in_backing_cache(key, entry)
+        self.backing_cache.set(self._version_key(key), version)
+
+    def _store_in_backing_cache(self, key, entry):
+        """Put the (version, BSON) `entry` of a document in the backing cache, if it fits."""
+        if self.backing_cache is None:
+            return
+        if len(entry[1]) > BACKING_CACHE_MAX_BYTES:
+            log.warning(
+                u"Not putting %s %s in the backing cache: it is %d bytes, over the limit of %d",
+                self.name, key, len(entry[1]), BACKING_CACHE_MAX_BYTES
+            )
+            return
+        self.backing_cache.set(self._backing_key(key), entry)
+
+    def delete(self, key):
+        """
+        Drop the document with id `key` from the cache.
+        """
+        self._discard(key)
+        if self.backing_cache is not None:
+            self.backing_cache.delete(self._backing_key(key))
+
+    def clear(self):
+        """
+        Drop every document from this process's cache.
+        """
+        with self._lock:
+            self._documents.clear()
+            self._derived.clear()
+            self._bytes = 0
+
+    def _discard(self, key):
+        """Drop the document with id `key` from this process's cache."""
+        with self._lock:
+            entry = self._documents.pop(key, None)
+            self._derived.pop(key, None)
+            if entry is not None:
+                self._bytes -= len(entry[1])
+
+    def _store(self, key, entry):
+        """Add the (version, BSON) `entry` of a document, evicting the least recently used ones to make room."""
+        if len(entry[1]) > self.max_bytes or (self.rewritable and entry[0] is None):
+            # too big, or a rewritable document whose version can't be checked
+            return
+        with self._lock:
+            old_entry = self._documents.pop(key, None)
+            if old_entry is not None:
+                self._bytes -= len(old_entry[1])
+                self._derived.pop(key, None)
+            self._documents[key] = entry
+            self._bytes += len(entry[1])
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted = self._documents.popitem(last=False)
+                self._derived.pop(evicted_key, None)
+                self._bytes -= len(evicted[1])
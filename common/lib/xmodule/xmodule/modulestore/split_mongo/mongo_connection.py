@@ -3,15 +3,25 @@ Segregation of pymongo functions from the data modeling mechanisms for split mod
 """
 import pymongo
 
+from .document_cache import shared_document_cache, STRUCTURE_CACHE_BYTES, DEFINITION_CACHE_BYTES
+
+
 class MongoConnection(object):
     """
     Segregation of pymongo functions from the data modeling mechanisms for split modulestore.
     """
     def __init__(
-        self, db, collection, host, port=27017, tz_aware=True, user=None, password=None, **kwargs
+        self, db, collection, host, port=27017, tz_aware=True, user=None, password=None,
+        structure_cache_bytes=STRUCTURE_CACHE_BYTES, definition_cache_bytes=DEFINITION_CACHE_BYTES,
+        backing_cache=None, **kwargs
     ):
         """
         Create & open the connection, authenticate, and provide pointers to the collections
+
+        Structures and definitions are cached per process (see `document_cache`), up to
+        `structure_cache_bytes` and `definition_cache_bytes` of each, and in `backing_cache`
+        if given. As structures can be rewritten in place (see `update_structure`), they are
+        only cached if there is a `backing_cache` to keep track of their versions.
         """
         self.database = pymongo.database.Database(
             pymongo.MongoClient(
@@ -38,11 +48,25 @@ class MongoConnection(object):
         self.structures.write_concern = {'w': 1}
         self.definitions.write_concern = {'w': 1}
 
+        cache_name = u'{}.{}'.format(db, collection)
+        self.structure_cache = shared_document_cache(
+            cache_name + u'.structures', structure_cache_bytes, tz_aware, backing_cache, rewritable=True
+        )
+        self.definition_cache = shared_document_cache(
+            cache_name + u'.definitions', definition_cache_bytes, tz_aware, backing_cache
+        )
+
     def get_structure(self, key):
         """
         Get the structure from the persistence mechanism whose id is the given key
         """
-        return self.structures.find_one({'_id': key})
+        structure = self.structure_cache.get(key)
+        if structure is None:
+            version = self.structure_cache.version(key)
+            structure = self.structures.find_one({'_id': key})
+            if structure is not None:
+                self.structure_cache.set(structure, version)
+        return structure
 
     def find_matching_structures(self, query):
         """
@@ -56,12 +80,14 @@ class MongoConnection(object):
         Create the structure in the db
         """
         self.structures.insert(structure)
+        self.structure_cache.set(structure)
 
     def update_structure(self, structure):
         """
-        Update the db record for structure
+        Update the db record for structure, making the cached copies of it stale
         """
         self.structures.update({'_id': structure['_id']}, structure)
+        self.structure_cache.rewrite(structure)
 
     def get_course_index(self, key):
         """
@@ -98,7 +124,25 @@ class MongoConnection(object):
         """
         Get the definition from the persistence mechanism whose id is the given key
         """
-        return self.definitions.find_one({'_id': key})
+        definition = self.definition_cache.get(key)
+        if definition is None:
+            definition = self.definitions.find_one({'_id': key})
+            if definition is not None:
+                self.definition_cache.set(definition)
+        return definition
+
+    def get_definitions(self, keys):
+        """
+        Get the definitions whose ids are the given keys, as a dict mapping each found id to its
+        definition
+        """
+        definitions = self.definition_cache.get_many(keys)
+        missing = [key for key in keys if key not in definitions]
+        if missing:
+            for definition in self.definitions.find({'_id': {'$in': missing}}):
+                self.definition_cache.set(definition)
+                definitions[definition['_id']] = definition
+        return definitions
 
     def find_matching_definitions(self, query):
         """
@@ -112,5 +156,6 @@ class MongoConnection(object):
         Create the definition in the db
         """
         self.definitions.insert(definition)
+        self.definition_cache.set(definition)
 
 
@@ -74,6 +74,10 @@ from xblock.core import XBlock
 from xmodule.modulestore.loc_mapper_store import LocMapperStore
 
 log = logging.getLogger(__name__)
+
+# The number of course versions whose descriptor systems each thread keeps
+THREAD_SYSTEM_CACHE_SIZE = 10
+
 #==============================================================================
 # Documentation is at
 # https://edx-wiki.atlassian.net/wiki/display/ENG/Mongostore+Data+Structure
@@ -105,19 +109,28 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
                  default_class=None,
                  error_tracker=null_error_tracker,
                  loc_mapper=None,
+                 share_documents_in_cache=False,
                  **kwargs):
         """
         :param doc_store_config: must have a host, db, and collection entries. Other common entries: port, tz_aware.
+        :param share_documents_in_cache: whether to also keep structures and definitions in the
+        metadata_inheritance_cache_subsystem (e.g. memcached), sharing them between processes.
+        Structures are only cached at all if they are shared (see MongoConnection), at the cost
+        of a round trip to that cache to check the version of each structure fetched. Documents
+        too large for that cache are only cached in the process.
         """
 
         super(SplitMongoModuleStore, self).__init__(**kwargs)
         self.loc_mapper = loc_mapper
 
+        if share_documents_in_cache and self.metadata_inheritance_cache_subsystem is not None:
+            doc_store_config = dict(doc_store_config, backing_cache=self.metadata_inheritance_cache_subsystem)
         self.db_connection = MongoConnection(**doc_store_config)
         self.db = self.db_connection.database
 
-        # Code review question: How should I expire entries?
-        # _add_cache could use a lru mechanism to control the cache size?
+        # Each thread keeps the descriptor systems of its THREAD_SYSTEM_CACHE_SIZE most recently
+        # used course versions. The structures and definitions under them are shared by all
+        # threads (see MongoConnection).
         self.thread_cache = threading.local()
 
         if default_class is not None:
@@ -158,12 +171,9 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
                 block['definition'] = DefinitionLazyLoader(self, block['definition'])
         else:
             # Load all descendants by id
-            descendent_definitions = self.db_connection.find_matching_definitions({
-                '_id': {'$in': [block['definition']
-                                for block in new_module_data.itervalues()]}})
-            # turn into a map
-            definitions = {definition['_id']: definition
-                           for definition in descendent_definitions}
+            definitions = self.db_connection.get_definitions(
+                list(set(block['definition'] for block in new_module_data.itervalues()))
+            )
 
             for block in new_module_data.itervalues():
                 if block['definition'] in definitions:
@@ -196,15 +206,25 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
             self.cache_items(system, block_ids, depth, lazy)
         return [system.load_item(block_id, course_entry) for block_id in block_ids]
 
+    def _thread_course_cache(self):
+        """
+        Return this thread's LRU map of course version guids to descriptor systems
+        """
+        if not hasattr(self.thread_cache, 'course_cache'):
+            self.thread_cache.course_cache = collections.OrderedDict()
+        return self.thread_cache.course_cache
+
     def _get_cache(self, course_version_guid):
         """
         Find the descriptor cache for this course if it exists
         :param course_version_guid:
         """
-        if not hasattr(self.thread_cache, 'course_cache'):
-            self.thread_cache.course_cache = {}
-        system = self.thread_cache.course_cache
-        return system.get(course_version_guid)
+        course_cache = self._thread_course_cache()
+        system = course_cache.pop(course_version_guid, None)
+        if system is not None:
+            # reinsert as the most recently used
+            course_cache[course_version_guid] = system
+        return system
 
     def _add_cache(self, course_version_guid, system):
         """
@@ -212,20 +232,25 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
         :param course_version_guid:
         :param system:
         """
-        if not hasattr(self.thread_cache, 'course_cache'):
-            self.thread_cache.course_cache = {}
-        self.thread_cache.course_cache[course_version_guid] = system
+        course_cache = self._thread_course_cache()
+        course_cache.pop(course_version_guid, None)
+        course_cache[course_version_guid] = system
+        while len(course_cache) > THREAD_SYSTEM_CACHE_SIZE:
+            course_cache.popitem(last=False)
         return system
 
     def _clear_cache(self, course_version_guid=None):
         """
         Should only be used by testing or something which implements transactional boundary semantics.
-        :param course_version_guid: if provided, clear only this entry
+        :param course_version_guid: if provided, clear only this entry; otherwise, also clear
+        this process's structure and definition caches
         """
         if course_version_guid:
-            del self.thread_cache.course_cache[course_version_guid]
+            self._thread_course_cache().pop(course_version_guid, None)
         else:
-            self.thread_cache.course_cache = {}
+            self.thread_cache.course_cache = collections.OrderedDict()
+            self.db_connection.structure_cache.clear()
+            self.db_connection.definition_cache.clear()
 
     def _lookup_course(self, course_locator):
         '''
@@ -1290,38 +1315,59 @@ class SplitMongoModuleStore(ModuleStoreWriteBase):
         """
         return {}
 
-    def inherit_settings(self, block_map, block_json, inheriting_settings=None):
-        """
-        Updates block_json with any inheritable setting set by an ancestor and recurses to children.
+    def inherited_settings(self, structure):
         """
-        if block_json is None:
-            return
-
-        if inheriting_settings is None:
-            inheriting_settings = {}
+        Return a map from the (mongo encoded) id of each block under the root of `structure` to the
+        values its inheritable settings get from its ancestors.
 
-        # the currently passed down values take precedence over any previously cached ones
-        # NOTE: this should show the values which all fields would have if inherited: i.e.,
-        # not set to the locally defined value but to value set by nearest ancestor who sets it
-        # ALSO NOTE: no xblock should ever define a _inherited_settings field as it will collide w/ this logic.
-        block_json.setdefault('_inherited_settings', {}).update(inheriting_settings)
+        The map is computed once per structure version and kept with the cached structure, so
+        it's shared by every descriptor system of that version and must not be modified.
+        """
+        return self.db_connection.structure_cache.derived(
+            structure['_id'],
+            'inherited_settings',
+            lambda: self._compute_inherited_settings(structure)
+        )
 
-        # update the inheriting w/ what should pass to children
-        inheriting_settings = block_json['_inherited_settings'].copy()
-        block_fields = block_json['fields']
-        for field_name in inheritance.InheritanceMixin.fields:
-            if field_name in block_fields:
-                inheriting_settings[field_name] = block_fields[field_name]
+    @staticmethod
+    def _compute_inherited_settings(structure):
+        """
+        Walk the blocks of `structure` from its root, working out the inherited settings of each.
 
-        for child in block_fields.get('children', []):
-            try:
-                child = LocMapperStore.encode_key_for_mongo(child)
-                self.inherit_settings(block_map, block_map[child], inheriting_settings)
-            except KeyError:
+        NOTE: this gives the values which all fields would have if inherited: i.e., not the locally
+        defined value but the value set by the nearest ancestor who sets it. Blocks which don't set
+        any inheritable field pass their own settings dict on to their children rather than a copy.
+        """
+        block_map = structure.get('blocks', {})
+        root = structure.get('root')
+        if root is None:
+            return {}
+        inheritable_fields = inheritance.InheritanceMixin.fields.keys()
+
+        settings_map = {}
+        stack = [(LocMapperStore.encode_key_for_mongo(root), {})]
+        while stack:
+            block_key, inherited = stack.pop()
+            block_json = block_map.get(block_key)
+            if block_json is None:
                 # here's where we need logic for looking up in other structures when we allow cross pointers
                 # but it's also getting this during course creation if creating top down w/ children set or
                 # migration where the old mongo published had pointers to privates
-                pass
+                continue
+            settings_map[block_key] = inherited
+
+            # update the inheriting w/ what should pass to children
+            block_fields = block_json['fields']
+            local_settings = [field_name for field_name in inheritable_fields if field_name in block_fields]
+            if local_settings:
+                inherited = inherited.copy()
+                for field_name in local_settings:
+                    inherited[field_name] = block_fields[field_name]
+
+            # push in reverse so children are visited in order
+            for child in reversed(block_fields.get('children', [])):
+                stack.append((LocMapperStore.encode_key_for_mongo(child), inherited))
+        return settings_map
 
     def descendants(self, block_map, block_id, depth, descendent_map):
         """
@@ -1,7 +1,7 @@
 import ddt
 
 from unittest import TestCase
-from xmodule.modulestore import Location
+from xmodule.modulestore import Location, clear_location_caches
 from xmodule.modulestore.exceptions import InvalidLocationError
 
 # Pairs for testing the clean* functions.
@@ -191,3 +191,22 @@ class TestLocations(TestCase):
         loc = Location('t://o/c/c/n@r')
         with self.assertRaises(AttributeError):
             setattr(loc, attr, attr)
+
+    def test_cached(self):
+        url = 'i4x://org/course/problem/cached_problem'
+        loc = Location(url)
+        self.assertIs(Location(url), loc)
+        loc = Location('i4x', 'org', 'course', 'problem', 'cached_problem', 'draft')
+        self.assertIs(Location('i4x', 'org', 'course', 'problem', 'cached_problem', 'draft'), loc)
+        self.assertIs(loc.url(), loc.url())
+        self.assertEquals(loc.url(), 'i4x://org/course/problem/cached_problem@draft')
+        self.assertEquals(loc.html_id(), 'i4x-org-course-problem-cached_problem-draft')
+
+        # invalid locations are checked every time
+        for _ in range(2):
+            with self.assertRaises(InvalidLocationError):
+                Location('i4x://org/course/problem/cached problem')
+
+        clear_location_caches()
+        self.assertIsNot(Location(url), Location('i4x', 'org', 'course', 'problem', 'cached_problem', 'draft'))
+        self.assertEquals(Location(url).url(), url)
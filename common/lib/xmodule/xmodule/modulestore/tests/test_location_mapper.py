@@ -9,7 +9,7 @@ from xmodule.modulestore import Location
 from xmodule.modulestore.locator import BlockUsageLocator
 from xmodule.modulestore.exceptions import ItemNotFoundError, InvalidLocationError
 from xmodule.modulestore.loc_mapper_store import LocMapperStore
-from mock import Mock
+from mock import Mock, patch
 
 
 class TestLocationMapper(unittest.TestCase):
@@ -382,6 +382,59 @@ class TestLocationMapper(unittest.TestCase):
         with self.assertRaises(ItemNotFoundError):
             chapter_xlate = loc_mapper().translate_location(None, eponymous_block, add_entry_if_missing=False)
 
+    def test_translate_in_bulk(self):
+        """
+        Test translate_locations and translate_locators_to_locations
+        """
+        org = 'foo_org'
+        course = 'bar_course'
+        old_style_course_id = '{}/{}/{}'.format(org, course, 'baz_run')
+        new_style_package_id = '{}.geek_dept.{}.baz_run'.format(org, course)
+        loc_mapper().create_map_entry(
+            Location('i4x', org, course, 'course', 'baz_run'),
+            new_style_package_id,
+            block_map={
+                'abc123': {'problem': 'problem2', 'vertical': 'vertical2'},
+                'def456': {'problem': 'problem4'},
+            }
+        )
+        locations = [
+            Location('i4x', org, course, 'problem', 'abc123'),
+            Location('i4x', org, course, 'vertical', 'abc123'),
+            Location('i4x', org, course, 'problem', 'def456'),
+            Location('i4x', org, course, 'html', 'new_html'),
+        ]
+        with patch.object(loc_mapper(), 'location_map', Mock(wraps=loc_mapper().location_map)) as location_map:
+            locators = loc_mapper().translate_locations(old_style_course_id, locations, published=False)
+            self.assertEqual(location_map.find.call_count, 1)
+            self.assertEqual(
+                [locator.block_id for locator in locators],
+                ['problem2', 'vertical2', 'problem4', 'new_html']
+            )
+            self.assertEqual(set(locator.branch for locator in locators), set(['draft']))
+            # all cached now, and the same as translating one at a time
+            self.assertEqual(
+                loc_mapper().translate_locations(old_style_course_id, locations, published=False),
+                [loc_mapper().translate_location(old_style_course_id, location, False) for location in locations]
+            )
+            self.assertEqual(location_map.find.call_count, 1)
+
+            with self.assertRaises(ItemNotFoundError):
+                loc_mapper().translate_locations(
+                    old_style_course_id,
+                    [Location('i4x', org, course, 'html', 'missing_html')],
+                    add_entry_if_missing=False
+                )
+
+            loc_mapper().cache = TrivialCache()
+            location_map.reset_mock()
+            unmapped = BlockUsageLocator(package_id=new_style_package_id, block_id='missing', branch='published')
+            self.assertEqual(
+                loc_mapper().translate_locators_to_locations(locators + [unmapped]),
+                [location.replace(revision=None) for location in locations] + [None]
+            )
+            self.assertEqual(location_map.find.call_count, 1)
+
 
 #==================================
 # functions to mock existing services
@@ -411,6 +464,12 @@ class TrivialCache(object):
         """
         return self.cache.get(key, default)
 
+    def get_many(self, keys):
+        """
+        Mock the .get_many
+        """
+        return {key: self.cache[key] for key in keys if key in self.cache}
+
     def set_many(self, entries):
         """
         mock set_many
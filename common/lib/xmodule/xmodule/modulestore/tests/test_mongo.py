@@ -7,6 +7,7 @@ from itertools import ifilter
 import pymongo
 import logging
 from uuid import uuid4
+from mock import patch
 
 from xblock.fields import Scope
 from xblock.runtime import KeyValueStore
@@ -15,6 +16,7 @@ from xblock.exceptions import InvalidScopeError
 from xmodule.tests import DATA_DIR
 from xmodule.modulestore import Location, MONGO_MODULESTORE_TYPE
 from xmodule.modulestore.mongo import MongoModuleStore, MongoKeyValueStore
+from xmodule.modulestore.mongo.base import metadata_cache_key
 from xmodule.modulestore.draft import DraftModuleStore
 from xmodule.modulestore.xml_importer import import_from_xml, perform_xlint
 from xmodule.contentstore.mongo import MongoContentStore
@@ -35,6 +37,33 @@ DEFAULT_CLASS = 'xmodule.raw_module.RawDescriptor'
 RENDER_TEMPLATE = lambda t_n, d, ctx = None, nsp = 'main': ''
 
 
+class DictCache(object):
+    """
+    The parts of the Django cache API used by the metadata inheritance tree,
+    kept in a dict.
+    """
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def get_many(self, keys):
+        return dict((key, self.data[key]) for key in keys if key in self.data)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+    def add(self, key, value, timeout=None):
+        return self.data.setdefault(key, value) is value
+
+    def incr(self, key, delta=1):
+        if key not in self.data:
+            raise ValueError("Key '%s' not found" % key)
+        self.data[key] += delta
+        return self.data[key]
+
+
 class TestMongoModuleStore(object):
     '''Tests!'''
     @classmethod
@@ -218,6 +247,71 @@ class TestMongoModuleStore(object):
         assert_equals('Resources', get_tab_name(3))
         assert_equals('Discussion', get_tab_name(4))
 
+    def test_incremental_metadata_inheritance_tree(self):
+        """
+        Updating the inheritance tree under each chapter gives the same tree as
+        computing it for the whole course.
+        """
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        full_tree = self.store.compute_metadata_inheritance_tree(course_location)
+
+        tree = {url: {'stale': True} for url in full_tree}
+        chapters = self.store.get_items(Location('i4x', 'edX', 'toy', 'chapter', None))
+        assert len(chapters) > 0
+        for chapter in chapters:
+            assert self.store._update_metadata_inheritance_tree(tree, chapter.location)  # pylint: disable=protected-access
+        assert_equals(full_tree, tree)
+
+    def test_incremental_metadata_inheritance_tree_fallbacks(self):
+        """
+        Leaf writes don't change the inheritance tree, and course writes
+        require recomputing all of it.
+        """
+        # pylint: disable=protected-access
+        tree = {}
+        assert self.store._update_metadata_inheritance_tree(
+            tree, Location('i4x', 'edX', 'toy', 'html', 'toyhtml')
+        )
+        assert_equals(tree, {})
+        assert_false(self.store._update_metadata_inheritance_tree(
+            tree, Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        ))
+        assert_false(self.store._update_metadata_inheritance_tree(
+            tree, Location('i4x', 'edX', 'toy', 'chapter', 'no_such_chapter')
+        ))
+
+    def test_concurrent_metadata_inheritance_tree_updates(self):
+        """
+        A cached tree is only patched by the process that takes it from one
+        version to the next; if another process updated it in between, it's
+        recomputed.
+        """
+        # pylint: disable=protected-access
+        course_location = Location('i4x', 'edX', 'toy', 'course', '2012_Fall')
+        chapter = self.store.get_items(Location('i4x', 'edX', 'toy', 'chapter', None))[0]
+        key = metadata_cache_key(course_location)
+        cache = DictCache()
+        old_cache = self.store.metadata_inheritance_cache_subsystem
+        self.store.metadata_inheritance_cache_subsystem = cache
+        try:
+            full_tree = self.store.get_cached_metadata_inheritance_tree(course_location)
+            assert_equals(self.store._lookup_metadata_inheritance_tree(key), full_tree)
+
+            compute_tree = self.store.compute_metadata_inheritance_tree
+            with patch.object(self.store, 'compute_metadata_inheritance_tree', wraps=compute_tree) as compute:
+                self.store.refresh_cached_metadata_inheritance_tree(chapter.location)
+                assert_false(compute.called)
+                assert_equals(self.store._lookup_metadata_inheritance_tree(key), full_tree)
+
+                # another process has started updating the tree, and hasn't stored it yet
+                self.store._metadata_inheritance_tree_version(key, increment=True)
+                assert_equals(self.store._lookup_metadata_inheritance_tree(key), None)
+                self.store.refresh_cached_metadata_inheritance_tree(chapter.location)
+                assert_equals(compute.call_count, 1)
+                assert_equals(self.store._lookup_metadata_inheritance_tree(key), full_tree)
+        finally:
+            self.store.metadata_inheritance_cache_subsystem = old_cache
+
     def test_contentstore_attrs(self):
         """
         Test getting, setting, and defaulting the locked attr and arbitrary attrs.
@@ -0,0 +1,160 @@
+"""
+Tests of the process-wide cache of split modulestore documents
+"""
+import datetime
+from unittest import TestCase
+
+import bson
+from mock import patch
+from pytz import UTC
+
+from xmodule.modulestore.split_mongo.document_cache import DocumentCache, shared_document_cache
+
+
+class DictCache(object):
+    """
+    The get/add/set/delete subset of the django cache api, over a dict
+    """
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def add(self, key, value):
+        self.values.setdefault(key, value)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+class TestDocumentCache(TestCase):
+    """
+    Tests of :class:`.DocumentCache`
+    """
+    def document(self, _id, size=10):
+        return {'_id': _id, 'blocks': {'block': {'fields': {'data': 'x' * size}}}}
+
+    def test_get_returns_copies(self):
+        cache = DocumentCache('test', 1024)
+        cache.set(self.document('a'))
+        first = cache.get('a')
+        first['blocks']['block']['fields']['data'] = 'changed'
+        self.assertEqual(cache.get('a'), self.document('a'))
+
+    def test_datetimes_are_tz_aware(self):
+        cache = DocumentCache('test', 1024)
+        edited_on = datetime.datetime(2013, 10, 1, 12, 30, tzinfo=UTC)
+        cache.set({'_id': 'a', 'edited_on': edited_on})
+        self.assertEqual(cache.get('a')['edited_on'], edited_on)
+
+    def test_missing(self):
+        cache = DocumentCache('test', 1024)
+        self.assertIsNone(cache.get('a'))
+        cache.set(self.document('a'))
+        self.assertEqual(cache.get_many(['a', 'b']).keys(), ['a'])
+
+    def test_evicts_least_recently_used(self):
+        size = len(bson.BSON.encode(self.document('a')))
+        cache = DocumentCache('test', size * 2)
+        cache.set(self.document('a'))
+        cache.set(self.document('b'))
+        cache.get('a')
+        cache.set(self.document('c'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_too_large_document(self):
+        cache = DocumentCache('test', 100)
+        cache.set(self.document('a', size=200))
+        self.assertIsNone(cache.get('a'))
+
+    def test_too_large_for_backing_cache(self):
+        backing_cache = DictCache()
+        cache = DocumentCache('test', 1024, backing_cache=backing_cache)
+        with patch('xmodule.modulestore.split_mongo.document_cache.BACKING_CACHE_MAX_BYTES', 100):
+            cache.set(self.document('a', size=200))
+        self.assertEqual(backing_cache.values, {})
+        self.assertEqual(cache.get('a'), self.document('a', size=200))
+
+    def test_set_replaces(self):
+        cache = DocumentCache('test', 1024)
+        cache.set(self.document('a'))
+        cache.set(self.document('a', size=20))
+        self.assertEqual(cache.get('a'), self.document('a', size=20))
+
+    def test_backing_cache(self):
+        backing_cache = DictCache()
+        cache = DocumentCache('test', 1024, backing_cache=backing_cache)
+        cache.set(self.document('a'))
+
+        other_process_cache = DocumentCache('test', 1024, backing_cache=backing_cache)
+        self.assertEqual(other_process_cache.get('a'), self.document('a'))
+
+        cache.delete('a')
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+
+    def test_derived(self):
+        cache = DocumentCache('test', 1024)
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return len(computed)
+
+        # not cached, so not kept
+        self.assertEqual(cache.derived('a', 'count', compute), 1)
+        cache.set(self.document('a'))
+        self.assertEqual(cache.derived('a', 'count', compute), 2)
+        self.assertEqual(cache.derived('a', 'count', compute), 2)
+        # a new version of the document drops it
+        cache.set(self.document('a', size=20))
+        self.assertEqual(cache.derived('a', 'count', compute), 3)
+        cache.clear()
+        cache.set(self.document('a'))
+        self.assertEqual(cache.derived('a', 'count', compute), 4)
+
+    def test_rewritable_without_backing_cache(self):
+        cache = DocumentCache('test', 1024, rewritable=True)
+        cache.set(self.document('a'), cache.version('a'))
+        self.assertIsNone(cache.get('a'))
+
+    def test_rewrite(self):
+        backing_cache = DictCache()
+        cache = DocumentCache('test', 1024, backing_cache=backing_cache, rewritable=True)
+        other_process_cache = DocumentCache('test', 1024, backing_cache=backing_cache, rewritable=True)
+        cache.set(self.document('a'), cache.version('a'))
+        self.assertEqual(other_process_cache.get('a'), self.document('a'))
+
+        cache.rewrite(self.document('a', size=20))
+        self.assertEqual(cache.get('a'), self.document('a', size=20))
+        self.assertEqual(other_process_cache.get('a'), self.document('a', size=20))
+
+    def test_rewrite_while_reading(self):
+        backing_cache = DictCache()
+        cache = DocumentCache('test', 1024, backing_cache=backing_cache, rewritable=True)
+        other_process_cache = DocumentCache('test', 1024, backing_cache=backing_cache, rewritable=True)
+        # read from mongo before the other process rewrites it, but cached after
+        version = cache.version('a')
+        other_process_cache.rewrite(self.document('a', size=20))
+        cache.set(self.document('a'), version)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(other_process_cache.get('a'), self.document('a', size=20))
+
+    def test_version_evicted(self):
+        backing_cache = DictCache()
+        cache = DocumentCache('test', 1024, backing_cache=backing_cache, rewritable=True)
+        cache.set(self.document('a'), cache.version('a'))
+        backing_cache.values.clear()
+        self.assertIsNone(cache.get('a'))
+
+    def test_shared_document_cache(self):
+        cache = shared_document_cache('test', 1024)
+        self.assertIs(shared_document_cache('test', 1024), cache)
+        self.assertIsNot(shared_document_cache('test', 2048), cache)
+        self.assertIsNot(shared_document_cache('test', 1024, backing_cache=DictCache()), cache)
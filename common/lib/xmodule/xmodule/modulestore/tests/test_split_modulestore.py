@@ -15,6 +15,7 @@ from xmodule.modulestore.exceptions import InsufficientSpecificationError, ItemN
     DuplicateItemError
 from xmodule.modulestore.locator import CourseLocator, BlockUsageLocator, VersionTree, DefinitionLocator
 from xmodule.modulestore.inheritance import InheritanceMixin
+from xmodule.modulestore.split_mongo.split import SplitMongoModuleStore
 from xmodule.x_module import XModuleMixin
 from pytz import UTC
 from path import path
@@ -94,6 +95,8 @@ class SplitModuleTest(unittest.TestCase):
     def tearDownClass(cls):
         collection_prefix = SplitModuleTest.MODULESTORE['DOC_STORE_CONFIG']['collection'] + '.'
         if SplitModuleTest.modulestore:
+            # the structure and definition caches outlive the collections
+            modulestore()._clear_cache()
             for collection in ('active_versions', 'structures', 'definitions'):
                 modulestore().db.drop_collection(collection_prefix + collection)
             # drop the modulestore to force re init
@@ -1123,6 +1126,37 @@ class TestInheritance(SplitModuleTest):
         # overridden
         self.assertEqual(node.graceperiod, datetime.timedelta(hours=4))
 
+    def test_inherited_settings_map(self):
+        """
+        The inherited settings are computed once per structure version and shared by blocks
+        which don't set any inheritable field.
+        """
+        structure = {
+            '_id': 'inheritance_structure',
+            'root': 'course',
+            'blocks': {
+                'course': {'fields': {'graceperiod': '2 hours', 'children': ['chapter']}},
+                'chapter': {'fields': {'children': ['seq', 'missing']}},
+                'seq': {'fields': {'graceperiod': '4 hours', 'due': 'soon', 'children': ['problem']}},
+                'problem': {'fields': {}},
+                'orphan': {'fields': {}},
+            },
+        }
+        settings_map = SplitMongoModuleStore._compute_inherited_settings(structure)
+        self.assertEqual(settings_map['course'], {})
+        self.assertEqual(settings_map['chapter'], {'graceperiod': '2 hours'})
+        self.assertEqual(settings_map['seq'], {'graceperiod': '2 hours'})
+        self.assertIs(settings_map['seq'], settings_map['chapter'])
+        self.assertEqual(settings_map['problem'], {'graceperiod': '4 hours', 'due': 'soon'})
+        self.assertNotIn('orphan', settings_map)
+        self.assertNotIn('missing', settings_map)
+
+        modulestore().db_connection.insert_structure(structure)
+        self.assertIs(
+            modulestore().inherited_settings(structure),
+            modulestore().inherited_settings(modulestore().db_connection.get_structure(structure['_id']))
+        )
+
 
 class TestPublish(SplitModuleTest):
     """
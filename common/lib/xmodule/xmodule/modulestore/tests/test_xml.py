@@ -2,7 +2,10 @@
 Tests around our XML modulestore, including importing
 well-formed and not-well-formed XML.
 """
+import os
 import os.path
+import shutil
+import tempfile
 import unittest
 from glob import glob
 from mock import patch
@@ -16,6 +19,9 @@ from xmodule.modulestore import Location, XML_MODULESTORE_TYPE
 from .test_modulestore import check_path_to_location
 from xmodule.tests import DATA_DIR
 
+# The key that the tests' course snapshots are signed with
+SNAPSHOT_KEY = 'snapshot key'
+
 
 def glob_tildes_at_end(path):
     """
@@ -78,3 +84,91 @@ class TestXMLModuleStore(unittest.TestCase):
         about_module = course_module[about_location]
         self.assertIn("GREEN", about_module.data)
         self.assertNotIn("RED", about_module.data)
+
+    def test_snapshot(self):
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir)
+
+        loaded = XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY)
+        self.assertEqual(len(os.listdir(snapshot_dir)), 1)
+
+        # The course is loaded from the snapshot, without reading its XML
+        with patch.object(XMLModuleStore, 'load_course', side_effect=AssertionError):
+            restored = XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY)
+
+        self._assert_same_courses(loaded, restored)
+        check_path_to_location(restored)
+
+    def test_snapshot_of_changed_code(self):
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir)
+
+        XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY)
+        old_snapshots = os.listdir(snapshot_dir)
+
+        # Once the code changes, the course is snapshotted again, and the old
+        # snapshot is deleted
+        with patch('xmodule.modulestore.xml._code_fingerprint', return_value='changed'):
+            XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY)
+        new_snapshots = os.listdir(snapshot_dir)
+        self.assertEqual(len(new_snapshots), 1)
+        self.assertNotEqual(old_snapshots, new_snapshots)
+
+    def test_unloadable_snapshot(self):
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir)
+
+        loaded = XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY)
+        for filename in os.listdir(snapshot_dir):
+            with open(os.path.join(snapshot_dir, filename), 'wb') as snapshot_file:
+                snapshot_file.write('not a pickle')
+
+        # The course is loaded from its XML instead
+        restored = XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY)
+        self._assert_same_courses(loaded, restored)
+
+    def test_unsigned_snapshot(self):
+        snapshot_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_dir)
+
+        loaded = XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY)
+
+        # A snapshot signed with another key is never unpickled
+        XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key='other key')
+        with patch('xmodule.modulestore.xml.pickle.loads', side_effect=AssertionError):
+            restored = XMLModuleStore(
+                DATA_DIR, course_dirs=['toy'], snapshot_dir=snapshot_dir, snapshot_key=SNAPSHOT_KEY
+            )
+        self._assert_same_courses(loaded, restored)
+
+    def test_snapshot_needs_key(self):
+        with assert_raises(ValueError):
+            XMLModuleStore(DATA_DIR, course_dirs=['toy'], snapshot_dir=tempfile.gettempdir())
+
+    def test_parallel_loading(self):
+        serial = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'])
+        parent_loads = []
+        try_load_course = XMLModuleStore.try_load_course
+        parent_pid = os.getpid()
+
+        def record_load(store, course_dir):
+            """Note the courses loaded by this process rather than the pool."""
+            if os.getpid() == parent_pid:
+                parent_loads.append(course_dir)
+            return try_load_course(store, course_dir)
+
+        with patch.object(XMLModuleStore, 'try_load_course', autospec=True, side_effect=record_load):
+            parallel = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], load_processes=2)
+        self._assert_same_courses(serial, parallel)
+        # The courses loaded by the pool aren't loaded again
+        self.assertEqual(parent_loads, [])
+
+    def _assert_same_courses(self, expected, actual):
+        """Check that two XMLModuleStores have the same courses and blocks."""
+        self.assertEqual(sorted(expected.courses), sorted(actual.courses))
+        self.assertEqual(sorted(expected.modules), sorted(actual.modules))
+        for course_id, blocks in expected.modules.iteritems():
+            self.assertEqual(sorted(blocks), sorted(actual.modules[course_id]))
+            for location, block in blocks.iteritems():
+                self.assertEqual(block.display_name, actual.modules[course_id][location].display_name)
+                self.assertEqual(block.start, actual.modules[course_id][location].start)
@@ -1,12 +1,17 @@
+import cPickle as pickle
 import hashlib
+import hmac
 import itertools
 import json
 import logging
+import multiprocessing
 import os
 import re
 import sys
 import glob
+import tempfile
 
+import pkg_resources
 from collections import defaultdict
 from cStringIO import StringIO
 from fs.osfs import OSFS
@@ -14,6 +19,7 @@ from importlib import import_module
 from lxml import etree
 from path import path
 
+import xmodule
 from xmodule.error_module import ErrorDescriptor
 from xmodule.errortracker import make_error_tracker, exc_info_to_str
 from xmodule.course_module import CourseDescriptor
@@ -23,12 +29,12 @@ from xmodule.x_module import XMLParsingSystem, policy_key
 from xmodule.html_module import HtmlDescriptor
 from xblock.fields import ScopeIds
 from xblock.field_data import DictFieldData
-from xblock.runtime import DictKeyValueStore, IdReader, IdGenerator
+from xblock.runtime import DictKeyValueStore, IdReader, IdGenerator, KvsFieldData
 
 from . import ModuleStoreReadBase, Location, XML_MODULESTORE_TYPE
 
 from .exceptions import ItemNotFoundError
-from .inheritance import compute_inherited_metadata, inheriting_field_data
+from .inheritance import compute_inherited_metadata, inheriting_field_data, InheritanceKeyValueStore
 
 edx_xml_parser = etree.XMLParser(dtd_validation=False, load_dtd=False,
                                  remove_comments=True, remove_blank_text=True)
@@ -37,6 +43,21 @@ etree.set_default_parser(edx_xml_parser)
 
 log = logging.getLogger(__name__)
 
+# Bump this whenever a change to course loading would make existing course
+# snapshots wrong. Snapshots are also keyed by `_code_fingerprint()`, so
+# changes to the xmodule sources or to the installed XBlocks are caught
+# without it.
+SNAPSHOT_VERSION = 1
+
+# The entry point group that XBlock classes are installed under
+XBLOCK_ENTRY_POINT = 'xblock.v1'
+
+_CODE_FINGERPRINT = None
+
+# The store whose courses are being loaded by a pool of processes. The pool's
+# processes are forked from the loading process, so they get a copy of it.
+_LOADING_STORE = None
+
 
 # VS[compat]
 # TODO (cpennington): Remove this once all fall 2012 courses have been imported
@@ -344,11 +365,67 @@ class ParentTracker(object):
         return list(self._parents[child])
 
 
+def _code_fingerprint():
+    """
+    Return a hash of the code that the courses loaded from XML depend on: the
+    sources of the xmodule package, and the versions of the installed
+    distributions that provide XBlocks. It's computed once per process.
+    """
+    global _CODE_FINGERPRINT  # pylint: disable=global-statement
+    if _CODE_FINGERPRINT is None:
+        digest = hashlib.sha1()
+        xmodule_root = path(xmodule.__file__).dirname()
+        for dirpath, dirnames, filenames in os.walk(xmodule_root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if not filename.endswith('.py'):
+                    continue
+                filepath = os.path.join(dirpath, filename)
+                digest.update(repr(os.path.relpath(filepath, xmodule_root)))
+                with open(filepath, 'rb') as source_file:
+                    digest.update(source_file.read())
+
+        distributions = set(
+            (entry_point.dist.project_name, entry_point.dist.version)
+            for entry_point in pkg_resources.iter_entry_points(XBLOCK_ENTRY_POINT)
+            if entry_point.dist is not None
+        )
+        xblock_distribution = pkg_resources.get_distribution('XBlock')
+        distributions.add((xblock_distribution.project_name, xblock_distribution.version))
+        digest.update(repr(sorted(distributions)))
+        _CODE_FINGERPRINT = digest.hexdigest()
+    return _CODE_FINGERPRINT
+
+
+def _constant_time_equals(first, second):
+    """Compare two strings in a time that doesn't depend on where they differ."""
+    if len(first) != len(second):
+        return False
+    result = 0
+    for first_char, second_char in zip(first, second):
+        result |= ord(first_char) ^ ord(second_char)
+    return result == 0
+
+
+def _snapshot_course_in_process(course_dir):
+    """
+    Load `course_dir` into the store being loaded by this pool process,
+    returning the pickled snapshot of the course or None.
+    """
+    try:
+        _LOADING_STORE.try_load_course(course_dir)
+        return _LOADING_STORE._snapshot_course(course_dir)  # pylint: disable=protected-access
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Couldn't load course %s in a separate process", course_dir)
+        return None
+
+
 class XMLModuleStore(ModuleStoreReadBase):
     """
     An XML backed ModuleStore
     """
-    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True, **kwargs):
+    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True,
+                 load_processes=None, snapshot_dir=None, snapshot_key=None, **kwargs):
         """
         Initialize an XMLModuleStore from data_dir
 
@@ -359,6 +436,17 @@ class XMLModuleStore(ModuleStoreReadBase):
 
         course_dirs: If specified, the list of course_dirs to load. Otherwise,
             load all course dirs
+
+        load_processes: If more than 1, the number of processes to load
+            courses with in parallel
+
+        snapshot_dir: If specified, a directory to keep a snapshot of each
+            loaded course in. A course whose directory hasn't changed since its
+            snapshot was taken is loaded from the snapshot instead of its XML.
+
+        snapshot_key: The secret that snapshots are signed with, required with
+            snapshot_dir. Snapshots are pickles, so a snapshot whose signature
+            doesn't match is never unpickled.
         """
         super(XMLModuleStore, self).__init__(**kwargs)
 
@@ -368,7 +456,14 @@ class XMLModuleStore(ModuleStoreReadBase):
         self.errored_courses = {}  # course_dir -> errorlog, for dirs that failed to load
 
         self.load_error_modules = load_error_modules
-
+        self.snapshot_dir = path(snapshot_dir) if snapshot_dir is not None else None
+        if self.snapshot_dir is not None and not snapshot_key:
+            raise ValueError("snapshot_dir needs a snapshot_key to sign the snapshots with")
+        if isinstance(snapshot_key, unicode):
+            snapshot_key = snapshot_key.encode('utf-8')
+        self.snapshot_key = snapshot_key
+
+        self._default_class_name = default_class
         if default_class is None:
             self.default_class = None
         else:
@@ -390,8 +485,249 @@ class XMLModuleStore(ModuleStoreReadBase):
         if course_dirs is None:
             course_dirs = sorted([d for d in os.listdir(self.data_dir) if
                                   os.path.exists(self.data_dir / d / "course.xml")])
+        self.load_courses(course_dirs, load_processes)
+
+    def load_courses(self, course_dirs, processes=None):
+        """
+        Load the courses in `course_dirs`, from their snapshots where possible,
+        using `processes` processes to load the others.
+
+        The courses are added to the store in the order of `course_dirs`,
+        however they are loaded. The processes hand each course back as its
+        snapshot, so only a course that can't be snapshotted (see
+        `_snapshot_course`) is loaded again by this process.
+        """
+        snapshots = {}
+        snapshot_paths = {}
+        if self.snapshot_dir is not None:
+            for course_dir in course_dirs:
+                snapshot_paths[course_dir] = self._snapshot_path(course_dir)
+                snapshots[course_dir] = self._read_snapshot(snapshot_paths[course_dir])
+
+        to_load = [course_dir for course_dir in course_dirs if snapshots.get(course_dir) is None]
+        if processes is not None and processes > 1 and len(to_load) > 1:
+            for course_dir, snapshot in zip(to_load, self._snapshot_courses_in_processes(to_load, processes)):
+                snapshots[course_dir] = snapshot
+                if snapshot is not None and course_dir in snapshot_paths:
+                    self._write_snapshot(course_dir, snapshot_paths[course_dir], snapshot)
+
         for course_dir in course_dirs:
+            snapshot = snapshots.get(course_dir)
+            if snapshot is not None:
+                course_id = None
+                try:
+                    snapshot = pickle.loads(snapshot)
+                    course_id = snapshot.get('course_id')
+                    self._load_snapshot(course_dir, snapshot)
+                    continue
+                except Exception:  # pylint: disable=broad-except
+                    # e.g. the snapshot refers to classes that have changed
+                    log.warning("Couldn't load course snapshot of %s, loading its XML", course_dir, exc_info=True)
+                    self._forget_course(course_dir, course_id)
+
             self.try_load_course(course_dir)
+            if course_dir in snapshot_paths:
+                snapshot = self._snapshot_course(course_dir)
+                if snapshot is not None:
+                    self._write_snapshot(course_dir, snapshot_paths[course_dir], snapshot)
+
+    def _snapshot_courses_in_processes(self, course_dirs, processes):
+        """
+        Load `course_dirs` in a pool of `processes` processes, returning the
+        pickled snapshot of each course, or None for a course that couldn't
+        be snapshotted.
+        """
+        global _LOADING_STORE  # pylint: disable=global-statement
+        _LOADING_STORE = self
+        pool = multiprocessing.Pool(min(processes, len(course_dirs)))
+        try:
+            return pool.map(_snapshot_course_in_process, course_dirs, chunksize=1)
+        finally:
+            pool.terminate()
+            _LOADING_STORE = None
+
+    def _course_dir_hash(self, course_dir):
+        """
+        Return a hash of the contents of `course_dir`, and of the code and
+        options that the courses loaded from it depend on.
+        """
+        digest = hashlib.sha1()
+        digest.update(repr((
+            SNAPSHOT_VERSION, _code_fingerprint(), course_dir, self._default_class_name, self.load_error_modules
+        )))
+
+        root = self.data_dir / course_dir
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            relative_dir = os.path.relpath(dirpath, root)
+            for filename in sorted(filenames):
+                filepath = os.path.join(dirpath, filename)
+                digest.update(repr(os.path.join(relative_dir, filename)))
+                if relative_dir.split(os.sep)[0] == 'static':
+                    # Static files aren't read when loading a course, and can
+                    # be large, so only note their size and modification time
+                    stat = os.stat(filepath)
+                    digest.update(repr((stat.st_size, stat.st_mtime)))
+                else:
+                    with open(filepath, 'rb') as course_file:
+                        for block in iter(lambda: course_file.read(1 << 16), ''):
+                            digest.update(block)
+        return digest.hexdigest()
+
+    def _snapshot_path(self, course_dir):
+        """Return the path of the snapshot of the current contents of `course_dir`."""
+        return self.snapshot_dir / u'{}-{}.pickle'.format(course_dir, self._course_dir_hash(course_dir))
+
+    def _snapshot_signature(self, snapshot_path, snapshot):
+        """
+        Return the signature of the pickled `snapshot` stored at
+        `snapshot_path`. The file name is signed too, so that a snapshot can't
+        be passed off as the snapshot of other contents.
+        """
+        name = os.path.basename(snapshot_path)
+        if isinstance(name, unicode):
+            name = name.encode('utf-8')
+        return hmac.new(self.snapshot_key, name + '\0' + snapshot, hashlib.sha256).hexdigest()
+
+    def _read_snapshot(self, snapshot_path):
+        """
+        Return the pickled snapshot at `snapshot_path`, or None if there isn't
+        one, or if it isn't signed with this store's snapshot_key.
+        """
+        try:
+            with open(snapshot_path, 'rb') as snapshot_file:
+                signature, _, snapshot = snapshot_file.read().partition('\n')
+        except IOError:
+            return None
+
+        if not _constant_time_equals(signature, self._snapshot_signature(snapshot_path, snapshot)):
+            log.warning("Ignoring course snapshot %s, which isn't signed with the snapshot_key", snapshot_path)
+            return None
+        return snapshot
+
+    def _write_snapshot(self, course_dir, snapshot_path, snapshot):
+        """
+        Atomically write the pickled `snapshot` of `course_dir` to
+        `snapshot_path`, and delete the snapshots of its earlier contents.
+        """
+        try:
+            if not os.path.isdir(self.snapshot_dir):
+                os.makedirs(self.snapshot_dir, 0700)
+            handle, temp_path = tempfile.mkstemp(dir=self.snapshot_dir, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as snapshot_file:
+                snapshot_file.write(self._snapshot_signature(snapshot_path, snapshot))
+                snapshot_file.write('\n')
+                snapshot_file.write(snapshot)
+            os.rename(temp_path, snapshot_path)
+        except (IOError, OSError):
+            log.warning("Couldn't write course snapshot %s", snapshot_path, exc_info=True)
+            return
+
+        stale_name = re.compile(r'^{}-[0-9a-f]{{40}}\.pickle$'.format(re.escape(course_dir)))
+        for filename in os.listdir(self.snapshot_dir):
+            stale_path = self.snapshot_dir / filename
+            if stale_name.match(filename) and stale_path != snapshot_path:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    log.warning("Couldn't delete stale course snapshot %s", stale_path, exc_info=True)
+
+    def _snapshot_course(self, course_dir):
+        """
+        Return a pickled snapshot of the course loaded from `course_dir`, from
+        which `_load_snapshot` can add it to a store without reading its XML.
+
+        Returns None if the course has blocks from other course directories,
+        or whose state can't be snapshotted or pickled.
+        """
+        if course_dir in self.errored_courses:
+            snapshot = {'errors': self.errored_courses[course_dir].errors}
+            return pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL)
+
+        course_descriptor = self.courses[course_dir]
+        course_id = course_descriptor.id
+        blocks = []
+        for usage_id, block in self.modules[course_id].iteritems():
+            if getattr(block, 'data_dir', None) != course_dir:
+                return None
+
+            # pylint: disable=protected-access
+            field_data = block._field_data
+            if isinstance(field_data, KvsFieldData) and isinstance(field_data._kvs, InheritanceKeyValueStore):
+                data = ('kvs', field_data._kvs._fields, field_data._kvs.inherited_settings)
+            elif isinstance(field_data, DictFieldData):
+                data = ('dict', field_data._data)
+            else:
+                return None
+            block_class = getattr(type(block), 'unmixed_class', type(block))
+            blocks.append((usage_id, block_class, block.scope_ids, data))
+
+        snapshot = {
+            'course_id': course_id,
+            'course_location': course_descriptor.scope_ids.usage_id,
+            'errors': self._location_errors[course_descriptor.scope_ids.usage_id].errors,
+            'parents': self.parent_trackers[course_id]._parents,  # pylint: disable=protected-access
+            'blocks': blocks,
+        }
+        try:
+            return pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL)
+        except Exception:  # pylint: disable=broad-except
+            log.warning("Couldn't snapshot course %s", course_dir, exc_info=True)
+            return None
+
+    def _forget_course(self, course_dir, course_id):
+        """
+        Drop whatever a failed attempt to load `course_dir` (whose course has
+        the id `course_id`, if known) added to this store.
+        """
+        self.errored_courses.pop(course_dir, None)
+        course_descriptor = self.courses.pop(course_dir, None)
+        if course_descriptor is not None:
+            self._location_errors.pop(course_descriptor.location, None)
+        if course_id is not None:
+            self.modules.pop(course_id, None)
+            self.parent_trackers.pop(course_id, None)
+
+    def _load_snapshot(self, course_dir, snapshot):
+        """
+        Add the course in `snapshot`, as returned by `_snapshot_course`, to
+        this store.
+        """
+        errorlog = make_error_tracker()
+        errorlog.errors.extend(snapshot['errors'])
+        if 'course_id' not in snapshot:
+            self.errored_courses[course_dir] = errorlog
+            return
+
+        course_id = snapshot['course_id']
+        # pylint: disable=protected-access
+        self.parent_trackers[course_id]._parents.update(snapshot['parents'])
+        system = ImportSystem(
+            xmlstore=self,
+            course_id=course_id,
+            course_dir=course_dir,
+            error_tracker=errorlog.tracker,
+            parent_tracker=self.parent_trackers[course_id],
+            load_error_modules=self.load_error_modules,
+            # The policy has already been applied to the snapshotted blocks
+            get_policy=lambda usage_id: {},
+            mixins=self.xblock_mixins,
+            default_class=self.default_class,
+            select=self.xblock_select,
+            field_data=self.field_data,
+        )
+        for usage_id, block_class, scope_ids, data in snapshot['blocks']:
+            if data[0] == 'kvs':
+                field_data = KvsFieldData(InheritanceKeyValueStore(initial_values=data[1], inherited_settings=data[2]))
+            else:
+                field_data = DictFieldData(data[1])
+            block = system.construct_xblock_from_class(block_class, scope_ids, field_data)
+            block.data_dir = course_dir
+            self.modules[course_id][usage_id] = block
+
+        course_location = snapshot['course_location']
+        self.courses[course_dir] = self.modules[course_id][course_location]
+        self._location_errors[course_location] = errorlog
 
     def try_load_course(self, course_dir):
         '''
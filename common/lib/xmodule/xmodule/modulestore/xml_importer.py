@@ -1,13 +1,19 @@
+import hashlib
 import logging
 import os
 import mimetypes
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from path import path
 import json
 
 from .xml import XMLModuleStore, ImportSystem, ParentTracker
 from xmodule.modulestore import Location
 from xblock.fields import Scope, Reference, ReferenceList
-from xmodule.contentstore.content import StaticContent
+from xmodule.contentstore.content import StaticContent, STREAM_DATA_CHUNK_SIZE
 from .inheritance import own_metadata
 from xmodule.errortracker import make_error_tracker
 from .store_utilities import rewrite_nonportable_content_links
@@ -15,11 +21,23 @@ import xblock
 
 log = logging.getLogger(__name__)
 
+# Number of threads hashing, thumbnailing and saving the static files of a course
+STATIC_IMPORT_WORKERS = 4
+
 
 def import_static_content(
         modules, course_loc, course_data_path, static_content_store,
-        target_location_namespace, subpath='static', verbose=False):
+        target_location_namespace, subpath='static', verbose=False,
+        workers=STATIC_IMPORT_WORKERS):
+    """
+    Import the files in the `subpath` dir of `course_data_path` into
+    `static_content_store`, returning a dict mapping each file's path within
+    that dir to the name of its asset.
 
+    Files are hashed, thumbnailed and streamed into the store by a pool of
+    `workers` threads. Files whose content, name, type and lock are the same
+    as those of their stored asset are not saved again.
+    """
     remap_dict = {}
 
     # now import all static assets
@@ -34,74 +52,186 @@ def import_static_content(
 
     verbose = True
     mimetypes_list = mimetypes.types_map.values()
+    stats = StaticImportStats()
 
-    for dirname, _, filenames in os.walk(static_dir):
-        for filename in filenames:
+    with stats.timing('scan'):
+        assets = []
+        for dirname, _, filenames in os.walk(static_dir):
+            for filename in filenames:
 
-            content_path = os.path.join(dirname, filename)
+                content_path = os.path.join(dirname, filename)
 
-            if filename.endswith('~'):
-                if verbose:
-                    log.debug('skipping static content %s...', content_path)
-                continue
+                if filename.endswith('~'):
+                    if verbose:
+                        log.debug('skipping static content %s...', content_path)
+                    continue
 
-            if verbose:
-                log.debug('importing static content %s...', content_path)
+                # strip away leading path from the name
+                fullname_with_subpath = content_path.replace(static_dir, '')
+                if fullname_with_subpath.startswith('/'):
+                    fullname_with_subpath = fullname_with_subpath[1:]
+                content_loc = StaticContent.compute_location(
+                    target_location_namespace.org, target_location_namespace.course,
+                    fullname_with_subpath
+                )
+
+                policy_ele = policy.get(content_loc.name, {})
+                displayname = policy_ele.get('displayname', filename)
+                locked = policy_ele.get('locked', False)
+                mime_type = policy_ele.get('contentType')
+
+                # Check extracted contentType in list of all valid mimetypes
+                if not mime_type or mime_type not in mimetypes_list:
+                    mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
 
+                assets.append(StaticContent(
+                    content_loc, displayname, mime_type, None,
+                    import_path=fullname_with_subpath, locked=locked
+                ))
+                stats.count('scan', files=1)
+
+        stored_assets, __ = static_content_store.get_all_content_for_course(target_location_namespace)
+        stored_assets = dict((asset['_id']['name'], asset) for asset in stored_assets)
+
+    def import_asset(content):
+        """
+        Save `content`, and its thumbnail, unless it's already stored.
+        Returns False if the file couldn't be read.
+        """
+        content_path = static_dir / content.import_path
+        with stats.timing('hash'):
             try:
-                with open(content_path, 'rb') as f:
-                    data = f.read()
+                content.content_digest, content.length = _file_md5(content_path)
             except IOError:
-                if filename.startswith('._'):
+                if os.path.basename(content_path).startswith('._'):
                     # OS X "companion files". See
                     # http://www.diigo.com/annotated/0c936fda5da4aa1159c189cea227e174
-                    continue
+                    return False
                 # Not a 'hidden file', then re-raise exception
                 raise
+        stats.count('hash', files=1, size=content.length)
 
-            # strip away leading path from the name
-            fullname_with_subpath = content_path.replace(static_dir, '')
-            if fullname_with_subpath.startswith('/'):
-                fullname_with_subpath = fullname_with_subpath[1:]
-            content_loc = StaticContent.compute_location(
-                target_location_namespace.org, target_location_namespace.course,
-                fullname_with_subpath
-            )
+        if _is_stored(content, stored_assets.get(content.location.name)):
+            stats.count('unchanged', files=1, size=content.length)
+            return True
 
-            policy_ele = policy.get(content_loc.name, {})
-            displayname = policy_ele.get('displayname', filename)
-            locked = policy_ele.get('locked', False)
-            mime_type = policy_ele.get('contentType')
-
-            # Check extracted contentType in list of all valid mimetypes
-            if not mime_type or mime_type not in mimetypes_list:
-                mime_type = mimetypes.guess_type(filename)[0]   # Assign guessed mimetype
-            content = StaticContent(
-                content_loc, displayname, mime_type, data,
-                import_path=fullname_with_subpath, locked=locked
-            )
+        if verbose:
+            log.debug('importing static content %s...', content_path)
 
-            # first let's save a thumbnail so we can get back a thumbnail location
-            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(content)
+        # first let's save a thumbnail so we can get back a thumbnail location
+        with stats.timing('thumbnail'):
+            thumbnail_content, thumbnail_location = static_content_store.generate_thumbnail(
+                content, tempfile_path=content_path
+            )
 
-            if thumbnail_content is not None:
-                content.thumbnail_location = thumbnail_location
+        # then commit the content, streaming it from the file
+        content = StaticContent(
+            content.location, content.name, content.content_type, _read_chunks(content_path),
+            import_path=content.import_path, locked=content.locked, length=content.length
+        )
+        if thumbnail_content is not None:
+            content.thumbnail_location = thumbnail_location
+            stats.count('thumbnail', files=1)
 
-            # then commit the content
+        with stats.timing('save'):
             try:
                 static_content_store.save(content)
             except Exception as err:
                 log.exception('Error importing {0}, error={1}'.format(
-                    fullname_with_subpath, err
+                    content.import_path, err
                 ))
+            else:
+                stats.count('save', files=1, size=content.length)
+        return True
 
-            # store the remapping information which will be needed
-            # to subsitute in the module data
-            remap_dict[fullname_with_subpath] = content_loc.name
-
+    pool = ThreadPool(workers)
+    try:
+        for content, imported in zip(assets, pool.imap(import_asset, assets)):
+            if imported:
+                # store the remapping information which will be needed
+                # to subsitute in the module data
+                remap_dict[content.import_path] = content.location.name
+    finally:
+        pool.terminate()
+
+    stats.log(static_dir)
     return remap_dict
 
 
+def _file_md5(filepath):
+    """Return the md5 hex digest and the length of the file at `filepath`."""
+    digest = hashlib.md5()
+    length = 0
+    for chunk in _read_chunks(filepath):
+        digest.update(chunk)
+        length += len(chunk)
+    return digest.hexdigest(), length
+
+
+def _read_chunks(filepath):
+    """Yield the content of the file at `filepath`, STREAM_DATA_CHUNK_SIZE bytes at a time."""
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(STREAM_DATA_CHUNK_SIZE), ''):
+            yield chunk
+
+
+def _is_stored(content, stored_asset):
+    """
+    Return whether `stored_asset`, the contentstore's document for the asset
+    of `content` (or None), has the same content and attributes.
+    """
+    return stored_asset is not None and all((
+        stored_asset.get('md5') == content.content_digest,
+        stored_asset.get('displayname') == content.name,
+        stored_asset.get('contentType') == content.content_type,
+        stored_asset.get('import_path') == content.import_path,
+        stored_asset.get('locked', False) == content.locked,
+    ))
+
+
+class StaticImportStats(object):
+    """
+    Thread-safe counts of the files and bytes handled by each phase of a
+    static content import, and of the time spent in each phase.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = defaultdict(int)
+        self.size = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    @contextmanager
+    def timing(self, phase):
+        """Add the time spent in the with block to `phase`."""
+        start = time.time()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.seconds[phase] += time.time() - start
+
+    def count(self, phase, files=0, size=0):
+        """Count `files` files of `size` bytes in total for `phase`."""
+        with self._lock:
+            self.files[phase] += files
+            self.size[phase] += size or 0
+
+    def log(self, static_dir):
+        """Log the throughput of each phase."""
+        for phase in ('scan', 'hash', 'thumbnail', 'save'):
+            seconds = self.seconds[phase]
+            log.info(
+                'Static import of %s: %s %d files (%d bytes) in %.2fs of worker time, %.1f files/s, %.1f KB/s',
+                static_dir, phase, self.files[phase], self.size[phase], seconds,
+                self.files[phase] / seconds if seconds else 0.0,
+                self.size[phase] / 1024.0 / seconds if seconds else 0.0,
+            )
+        log.info(
+            'Static import of %s: skipped %d unchanged files (%d bytes)',
+            static_dir, self.files['unchanged'], self.size['unchanged']
+        )
+
+
 def import_from_xml(
         store, data_dir, course_dirs=None,
         default_class='xmodule.raw_module.RawDescriptor',
@@ -19,6 +19,7 @@ from xmodule.x_module import XModule
 from xmodule.stringify import stringify_children
 from xmodule.mako_module import MakoModuleDescriptor
 from xmodule.xml_module import XmlDescriptor
+from xblock.core import XBlock
 from xblock.fields import Scope, String, Dict, Boolean, List
 
 log = logging.getLogger(__name__)
@@ -38,8 +39,14 @@ class PollFields(object):
     question = String(help="Poll question", scope=Scope.content, default='')
 
 
+@XBlock.wants("summary_counters")
 class PollModule(PollFields, XModule):
-    """Poll Module"""
+    """Poll Module
+
+    If the runtime provides the `summary_counters` service, the votes for each
+    answer are counted by it, and `poll_answers` is only brought up to date
+    when the service's counts are folded into it.
+    """
     js = {
       'coffee': [resource_string(__name__, 'js/src/javascript_loader.coffee')],
       'js': [resource_string(__name__, 'js/src/poll/poll.js'),
@@ -48,6 +55,28 @@ class PollModule(PollFields, XModule):
     css = {'scss': [resource_string(__name__, 'css/poll/display.scss')]}
     js_module_name = "Poll"
 
+    def get_poll_answers(self):
+        """Return a dict mapping answer ids to their number of votes."""
+        counters = self.runtime.service(self, "summary_counters")
+        if counters is None:
+            return self.poll_answers
+
+        poll_answers = dict.fromkeys((answer['id'] for answer in self.answers), 0)
+        poll_answers.update(counters.counts(self, 'poll_answers'))
+        return poll_answers
+
+    def add_votes(self, answer, amount):
+        """Add `amount` to the number of votes for `answer`."""
+        counters = self.runtime.service(self, "summary_counters")
+        if counters is None:
+            # FIXME: fix this, when xblock will support mutable types.
+            # Now we use this hack.
+            temp_poll_answers = self.poll_answers
+            temp_poll_answers[answer] += amount
+            self.poll_answers = temp_poll_answers
+        else:
+            counters.add(self, 'poll_answers', {answer: amount})
+
     def handle_ajax(self, dispatch, data):
         """Ajax handler.
 
@@ -58,34 +87,26 @@ class PollModule(PollFields, XModule):
         Returns:
             json string
         """
-        if dispatch in self.poll_answers and not self.voted:
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[dispatch] += 1
-            self.poll_answers = temp_poll_answers
+        poll_answers = self.get_poll_answers()
+        if dispatch in poll_answers and not self.voted:
+            self.add_votes(dispatch, 1)
 
             self.voted = True
             self.poll_answer = dispatch
-            return json.dumps({'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values()),
+            poll_answers = self.get_poll_answers()
+            return json.dumps({'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values()),
                                'callback': {'objectName': 'Conditional'}
                                })
         elif dispatch == 'get_state':
             return json.dumps({'poll_answer': self.poll_answer,
-                               'poll_answers': self.poll_answers,
-                               'total': sum(self.poll_answers.values())
+                               'poll_answers': poll_answers,
+                               'total': sum(poll_answers.values())
                                })
         elif dispatch == 'reset_poll' and self.voted and \
                 self.descriptor.xml_attributes.get('reset', 'True').lower() != 'false':
             self.voted = False
-
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            temp_poll_answers = self.poll_answers
-            temp_poll_answers[self.poll_answer] -= 1
-            self.poll_answers = temp_poll_answers
-
+            self.add_votes(self.poll_answer, -1)
             self.poll_answer = ''
             return json.dumps({'status': 'success'})
         else:  # return error message
@@ -108,31 +129,35 @@ class PollModule(PollFields, XModule):
         Returns:
             string - Serialize json.
         """
-        # FIXME: hack for resolving caching `default={}` during definition
-        # poll_answers field
-        if self.poll_answers is None:
-            self.poll_answers = {}
-
         answers_to_json = OrderedDict()
-
-        # FIXME: fix this, when xblock support mutable types.
-        # Now we use this hack.
-        temp_poll_answers = self.poll_answers
-
-         # Fill self.poll_answers, prepare data for template context.
         for answer in self.answers:
-            # Set default count for answer = 0.
-            if answer['id'] not in temp_poll_answers:
-                temp_poll_answers[answer['id']] = 0
             answers_to_json[answer['id']] = cgi.escape(answer['text'])
-        self.poll_answers = temp_poll_answers
+
+        if self.runtime.service(self, "summary_counters") is None:
+            # FIXME: hack for resolving caching `default={}` during definition
+            # poll_answers field
+            if self.poll_answers is None:
+                self.poll_answers = {}
+
+            # FIXME: fix this, when xblock support mutable types.
+            # Now we use this hack.
+            temp_poll_answers = self.poll_answers
+
+            # Fill self.poll_answers.
+            for answer in self.answers:
+                # Set default count for answer = 0.
+                if answer['id'] not in temp_poll_answers:
+                    temp_poll_answers[answer['id']] = 0
+            self.poll_answers = temp_poll_answers
+
+        poll_answers = self.get_poll_answers() if self.voted else {}
 
         return json.dumps({'answers': answers_to_json,
             'question': cgi.escape(self.question),
             # to show answered poll after reload:
             'poll_answer': self.poll_answer,
-            'poll_answers': self.poll_answers if self.voted else {},
-            'total': sum(self.poll_answers.values()) if self.voted else 0,
+            'poll_answers': poll_answers,
+            'total': sum(poll_answers.values()),
             'reset': str(self.descriptor.xml_attributes.get('reset', 'true')).lower()})
 
 
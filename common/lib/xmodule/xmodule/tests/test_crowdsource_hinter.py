@@ -6,7 +6,9 @@ from mock import Mock, MagicMock
 import unittest
 import copy
 
-from xmodule.crowdsource_hinter import CrowdsourceHinterModule
+from capa.util import compare_with_tolerance
+from calc import evaluator
+from xmodule.crowdsource_hinter import CrowdsourceHinterModule, NumericalAnswerIndex
 from xmodule.vertical_module import VerticalModule, VerticalDescriptor
 from xblock.field_data import DictFieldData
 from xblock.fragment import Fragment
@@ -578,3 +580,46 @@ class CrowdsourceHinterTest(unittest.TestCase):
 
         """
         pass
+
+    def test_gethint_answer_index(self):
+        """
+        With a numerical response, only the answers near enough to the submitted
+        answer are compared to it.
+        """
+        mock_module = CHModuleFactory.create()
+        mock_module.answer_tolerance = '1%'
+        mock_module.compare_answer = Mock(return_value=True)
+        out = mock_module.get_hint({'problem_name': '25.1'})
+        mock_module.compare_answer.assert_called_once_with('25.0', '25.1')
+        self.assertEqual(out['hints'], ['Really popular hint'])
+
+
+class NumericalAnswerIndexTest(unittest.TestCase):
+    """
+    Tests of the sorted index of numerical hinter answers.
+    """
+    answers = ['-3', '0', '1e-7', '2.5', '2.6', '3', '10', '1000', '2*i', 'inf', 'oops']
+
+    def matching(self, answer, tolerance):
+        """Return the answers that are equal to `answer` with `tolerance`, by comparing every answer."""
+        matching = set()
+        for key in self.answers:
+            try:
+                if compare_with_tolerance(evaluator({}, {}, key), evaluator({}, {}, answer), tolerance):
+                    matching.add(key)
+            except Exception:  # pylint: disable=broad-except
+                pass
+        return matching
+
+    def test_candidates(self):
+        for tolerance in ['0.001%', '5%', '50%', '200%', '0.5', '1e-6']:
+            index = NumericalAnswerIndex(self.answers, tolerance)
+            for answer in ['2.55', '3.1', '-3', '0', '950', '2*i', '1/0.1']:
+                candidates = index.candidates(answer)
+                self.assertTrue(self.matching(answer, tolerance).issubset(candidates))
+                self.assertIn('2*i', candidates)
+                self.assertIn('oops', candidates)
+
+        index = NumericalAnswerIndex(self.answers, '5%')
+        self.assertEqual(set(index.candidates('2.55')), set(['2.5', '2.6', '2*i', 'inf', 'oops']))
+        self.assertEqual(set(index.candidates('2*i')), set(self.answers))
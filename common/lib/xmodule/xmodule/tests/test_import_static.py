@@ -1,6 +1,7 @@
 """
 Tests that check that we ignore the appropriate files when importing courses.
 """
+import hashlib
 import unittest
 from mock import Mock
 from xmodule.modulestore import Location
@@ -15,9 +16,46 @@ class IgnoredFilesTestCase(unittest.TestCase):
         loc = Location("edX", "tilde", "Fall_2012")
         content_store = Mock()
         content_store.generate_thumbnail.return_value = ("content", "location")
+        content_store.get_all_content_for_course.return_value = ([], 0)
+        content_store.save.side_effect = self._read_data
         import_static_content(Mock(), Mock(), course_dir, content_store, loc)
         saved_static_content = [call[0][0] for call in content_store.save.call_args_list]
-        name_val = {sc.name: sc.data for sc in saved_static_content}
+        name_val = {sc.name: sc.saved_data for sc in saved_static_content}
         self.assertIn("example.txt", name_val)
         self.assertNotIn("example.txt~", name_val)
         self.assertIn("GREEN", name_val["example.txt"])
+
+    def test_skip_unchanged_static_files(self):
+        course_dir = DATA_DIR / "tilde"
+        loc = Location("edX", "tilde", "Fall_2012")
+        content_store = Mock()
+        content_store.generate_thumbnail.return_value = (None, "location")
+        content_store.get_all_content_for_course.return_value = ([], 0)
+        content_store.save.side_effect = self._read_data
+        first_remap = import_static_content(Mock(), Mock(), course_dir, content_store, loc)
+
+        # Reimport with the store holding what was just saved
+        stored_assets = [
+            {
+                '_id': {'name': sc.location.name},
+                'md5': hashlib.md5(sc.saved_data).hexdigest(),
+                'displayname': sc.name,
+                'contentType': sc.content_type,
+                'import_path': sc.import_path,
+                'locked': sc.locked,
+            }
+            for sc in [call[0][0] for call in content_store.save.call_args_list]
+        ]
+        content_store.reset_mock()
+        content_store.get_all_content_for_course.return_value = (stored_assets, len(stored_assets))
+        second_remap = import_static_content(Mock(), Mock(), course_dir, content_store, loc)
+
+        self.assertFalse(content_store.save.called)
+        self.assertFalse(content_store.generate_thumbnail.called)
+        self.assertEqual(first_remap, second_remap)
+
+    @staticmethod
+    def _read_data(content):
+        """Read the streamed data of saved content, as the content store would."""
+        content.saved_data = ''.join(content.data)
+        return content
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 """Test for Word cloud Xmodule functional logic."""
 
+from mock import Mock, patch
 from webob.multidict import MultiDict
+from xblock.field_data import DictFieldData
 from xmodule.word_cloud_module import WordCloudDescriptor
 from . import LogicTest
 
@@ -47,3 +49,20 @@ class WordCloudModuleTest(LogicTest):
             100.0,
             sum(i['percent'] for i in response['top_words']))
 
+    def test_top_words_update(self):
+        "Make sure that only the top words and submitted words are ranked once there are enough top words"
+        self.xmodule = self.xmodule_class(self.descriptor, self.system, DictFieldData({
+            'all_words': {'cat': 10, 'dog': 5, 'mom': 1, 'dad': 2},
+            'top_words': {'cat': 10, 'dog': 5},
+            'num_top_words': 2,
+        }), Mock())
+        post_data = MultiDict(('student_words[]', word) for word in ['dad', 'dad', 'dad', 'dad'])
+        with patch.object(self.xmodule, 'top_dict', wraps=self.xmodule.top_dict) as top_dict:
+            response = self.ajax_request('submit', post_data)
+
+        top_dict.assert_called_once_with({'cat': 10, 'dog': 5, 'dad': 6}, 2)
+        self.assertEqual(self.xmodule.top_words, {'cat': 10, 'dad': 6})
+        self.assertEqual(
+            sorted((word['text'], word['size']) for word in response['top_words']),
+            [('cat', 10), ('dad', 6)]
+        )
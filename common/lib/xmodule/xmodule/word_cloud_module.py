@@ -6,14 +6,18 @@ If student does not yet answered - `num_inputs` numbers of text inputs.
 If student have answered - words he entered and cloud.
 """
 
+import heapq
 import json
 import logging
+from collections import Counter
+from operator import itemgetter
 
 from pkg_resources import resource_string
 from xmodule.raw_module import EmptyDataRawDescriptor
 from xmodule.editing_module import MetadataOnlyEditingDescriptor
 from xmodule.x_module import XModule
 
+from xblock.core import XBlock
 from xblock.fields import Scope, Dict, Boolean, List, Integer, String
 
 log = logging.getLogger(__name__)
@@ -79,8 +83,15 @@ class WordCloudFields(object):
     )
 
 
+@XBlock.wants("summary_counters")
 class WordCloudModule(WordCloudFields, XModule):
-    """WordCloud Xmodule"""
+    """WordCloud Xmodule
+
+    If the runtime provides the `summary_counters` service, the counts of
+    `all_words` are kept by it, and `all_words` is only brought up to date
+    when the service's counts are folded into it. `top_words` is then only
+    rewritten when the words in it change.
+    """
     js = {
         'coffee': [resource_string(__name__, 'js/src/javascript_loader.coffee')],
         'js': [resource_string(__name__, 'js/src/word_cloud/d3.min.js'),
@@ -94,7 +105,15 @@ class WordCloudModule(WordCloudFields, XModule):
     def get_state(self):
         """Return success json answer for client."""
         if self.submitted:
-            total_count = sum(self.all_words.itervalues())
+            counters = self.runtime.service(self, "summary_counters")
+            if counters is None:
+                all_words = self.all_words
+                total_count = sum(all_words.itervalues())
+                top_words = self.top_words
+            else:
+                all_words = counters.counts(self, 'all_words', set(self.student_words) | set(self.top_words))
+                total_count = counters.total(self, 'all_words')
+                top_words = {word: all_words.get(word, 0) for word in self.top_words}
             return json.dumps({
                 'status': 'success',
                 'submitted': True,
@@ -102,10 +121,10 @@ class WordCloudModule(WordCloudFields, XModule):
                     self.display_student_percents
                 ),
                 'student_words': {
-                    word: self.all_words[word] for word in self.student_words
+                    word: all_words.get(word, 0) for word in self.student_words
                 },
                 'total_count': total_count,
-                'top_words': self.prepare_words(self.top_words, total_count)
+                'top_words': self.prepare_words(top_words, total_count)
             })
         else:
             return json.dumps({
@@ -165,13 +184,28 @@ class WordCloudModule(WordCloudFields, XModule):
         :type amount: int
         :rtype: dict
         """
-        return dict(
-            sorted(
-                dict_obj.items(),
-                key=lambda x: x[1],
-                reverse=True
-            )[:amount]
-        )
+        return dict(heapq.nlargest(amount, dict_obj.iteritems(), key=itemgetter(1)))
+
+    def update_top_words(self, word_counts, count_all_words):
+        """Return the top words after a submission.
+
+        Counts only go up, so a word can only join the top words when it is
+        submitted, and the new top words are the top of the old ones and the
+        submitted words. That keeps the cost of a submission independent of the
+        number of different words submitted so far.
+
+        :param word_counts: current counts of the top words and submitted words
+        :type word_counts: dict
+        :param count_all_words: returns the counts of all words. Only called
+            when there are fewer top words than `num_top_words`, to pick up
+            words missed when `num_top_words` was lower.
+        :type count_all_words: callable
+        :rtype: dict
+        """
+        top_words = self.top_dict(word_counts, self.num_top_words)
+        if len(top_words) < self.num_top_words:
+            top_words = self.top_dict(count_all_words(), self.num_top_words)
+        return top_words
 
     def handle_ajax(self, dispatch, data):
         """Ajax handler.
@@ -197,25 +231,37 @@ class WordCloudModule(WordCloudFields, XModule):
 
             self.student_words = student_words
 
-            # FIXME: fix this, when xblock will support mutable types.
-            # Now we use this hack.
-            # speed issues
-            temp_all_words = self.all_words
-
             self.submitted = True
 
-            # Save in all_words.
-            for word in self.student_words:
-                temp_all_words[word] = temp_all_words.get(word, 0) + 1
+            counters = self.runtime.service(self, "summary_counters")
+            if counters is None:
+                # FIXME: fix this, when xblock will support mutable types.
+                # Now we use this hack.
+                # speed issues
+                temp_all_words = self.all_words
 
-            # Update top_words.
-            self.top_words = self.top_dict(
-                temp_all_words,
-                self.num_top_words
-            )
+                # Save in all_words.
+                for word in self.student_words:
+                    temp_all_words[word] = temp_all_words.get(word, 0) + 1
 
-            # Save all_words in database.
-            self.all_words = temp_all_words
+                word_counts = {
+                    word: temp_all_words[word]
+                    for word in set(self.student_words) | set(self.top_words) if word in temp_all_words
+                }
+                self.top_words = self.update_top_words(word_counts, lambda: temp_all_words)
+
+                # Save all_words in database.
+                self.all_words = temp_all_words
+            else:
+                counters.add(self, 'all_words', Counter(self.student_words))
+                word_counts = counters.counts(self, 'all_words', set(self.student_words) | set(self.top_words))
+                top_words = self.update_top_words(
+                    word_counts, lambda: counters.top(self, 'all_words', self.num_top_words)
+                )
+                # The counts are read from the counters, so only save the
+                # top words when they change
+                if set(top_words) != set(self.top_words):
+                    self.top_words = top_words
 
             return self.get_state()
         elif dispatch == 'get_state':
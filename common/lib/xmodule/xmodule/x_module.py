@@ -298,6 +298,15 @@ class XModuleMixin(XBlockMixin):
         """
         return None
 
+    def static_max_score(self):
+        """
+        The maximum score computable from the definition alone, without
+        creating the module for a student, or None if it can't be (or there is
+        no score). Graders use it to avoid building modules the student never
+        interacted with.
+        """
+        return None
+
     def get_progress(self):
         """ Return a progress.Progress object that represents how far the
         student has gone in this module.  Must be implemented to get correct
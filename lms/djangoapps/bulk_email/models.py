@@ -12,6 +12,8 @@ file and check it in at the same time as your model changes. To do that,
 
 """
 import logging
+import re
+import string
 from django.db import models, transaction
 from django.contrib.auth.models import User
 from html_to_text import html_to_text
@@ -136,6 +138,9 @@ class Optout(models.Model):
 # the location where the email message body is to be inserted.
 COURSE_EMAIL_MESSAGE_BODY_TAG = '{{message_body}}'
 
+# The template context values that differ between the recipients of an email.
+RECIPIENT_CONTEXT_KEYS = ('name', 'email')
+
 
 class CourseEmailTemplate(models.Model):
     """
@@ -213,6 +218,85 @@ class CourseEmailTemplate(models.Model):
         """
         return CourseEmailTemplate._render(self.html_template, htmltext, context)
 
+    def compile_plaintext(self, plaintext, context):
+        """
+        Return a CompiledCourseEmailTemplate rendering plain text messages with
+        body `plaintext` and the provided `context` dict, for each recipient.
+        """
+        return CompiledCourseEmailTemplate(self.plain_template, plaintext, context)
+
+    def compile_htmltext(self, htmltext, context):
+        """
+        Return a CompiledCourseEmailTemplate rendering HTML messages with body
+        `htmltext` and the provided `context` dict, for each recipient.
+        """
+        return CompiledCourseEmailTemplate(self.html_template, htmltext, context)
+
+
+class CompiledCourseEmailTemplate(object):
+    """
+    A course email template formatted once with the context shared by all the
+    recipients of an email, leaving only the recipient's values
+    (`RECIPIENT_CONTEXT_KEYS`) to fill in for each message.
+
+    `render` returns the same message as `CourseEmailTemplate._render` would
+    with the recipient's values in the context, without formatting the whole
+    template again.
+    """
+    def __init__(self, format_string, message_body, context):
+        self.format_string = format_string
+        self.message_body = message_body
+        self.context = context
+        self.pieces = self._compile(format_string, context)
+
+    @staticmethod
+    def _compile(format_string, context):
+        """
+        Format `format_string` with `context`, except for the recipient's
+        values. Returns a list alternating between formatted text and the
+        names of the recipient values which go between, or None if the template
+        uses a recipient value other than as a plain `{name}` field.
+
+        Raises the same errors that formatting the template would.
+        """
+        pieces = []
+        text = []
+        for literal, field_name, format_spec, conversion in string.Formatter().parse(format_string):
+            text.append(literal)
+            if field_name is None:
+                continue
+            if field_name in RECIPIENT_CONTEXT_KEYS and not format_spec and not conversion:
+                pieces.extend([u''.join(text), field_name])
+                text = []
+                continue
+            field_root = re.split(r'[.\[]', field_name)[0]
+            if field_root in RECIPIENT_CONTEXT_KEYS or any(u'{' + key in format_spec for key in RECIPIENT_CONTEXT_KEYS):
+                return None
+            field = u'{' + field_name
+            if conversion:
+                field += u'!' + conversion
+            if format_spec:
+                field += u':' + format_spec
+            text.append((field + u'}').format(**context))
+        pieces.append(u''.join(text))
+        return pieces
+
+    def render(self, recipient_context):
+        """
+        Return the message for the recipient whose values are in `recipient_context`.
+        """
+        if self.pieces is None:
+            context = dict(self.context)
+            context.update(recipient_context)
+            return CourseEmailTemplate._render(self.format_string, self.message_body, context)
+
+        result = [self.pieces[0]]
+        for index in xrange(1, len(self.pieces), 2):
+            result.append(format(recipient_context[self.pieces[index]], u''))
+            result.append(self.pieces[index + 1])
+        message_body_tag = COURSE_EMAIL_MESSAGE_BODY_TAG.format()
+        return u''.join(result).replace(message_body_tag, self.message_body, 1)
+
 
 class CourseAuthorization(models.Model):
     """
@@ -5,7 +5,8 @@ to a course.
 import re
 import random
 import json
-from time import sleep
+from multiprocessing.pool import ThreadPool
+from time import sleep, time
 
 from dogapi import dog_stats_api
 from smtplib import SMTPServerDisconnected, SMTPDataError, SMTPConnectError, SMTPException
@@ -431,83 +432,110 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
     subject = "[" + course_title + "] " + course_email.subject
     from_addr = _get_source_address(course_email.course_id, course_title)
 
+    # Throttle if we have gotten the rate limiter.  This is not very high-tech,
+    # but if a task has been retried for rate-limiting reasons, then we send
+    # over a single connection and sleep for a period of time between all emails
+    # within this task.  Choice of the value depends on the number of workers that
+    # might be sending email in parallel, and what the SES throttle rate is.
+    throttled = subtask_status.retried_nomax > 0
+    num_connections = 1 if throttled else max(1, settings.BULK_EMAIL_CONNECTIONS_PER_TASK)
+    connections = []
+    pool = None
+    start_time = time()
+    num_previously_processed = subtask_status.succeeded + subtask_status.failed
+
     course_email_template = CourseEmailTemplate.get_template()
     try:
-        connection = get_connection()
-        connection.open()
-
-        # Define context values to use in all course emails:
+        for _ in xrange(num_connections):
+            connection = get_connection()
+            connections.append(connection)
+            connection.open()
+        if num_connections > 1:
+            pool = ThreadPool(num_connections)
+
+        # Define context values to use in all course emails, and format the
+        # templates with them once, leaving only the recipient's values to fill in:
         email_context = {'name': '', 'email': ''}
         email_context.update(global_email_context)
+        plaintext_template = course_email_template.compile_plaintext(course_email.text_message, email_context)
+        html_template = course_email_template.compile_htmltext(course_email.html_message, email_context)
 
         while to_list:
-            # Update context with user-specific values from the user at the end of the list.
-            # At the end of processing this user, they will be popped off of the to_list.
+            # Send to the recipients at the end of the list, one per connection.
+            # Each is removed from the to_list only once they have been processed.
             # That way, the to_list will always contain the recipients remaining to be emailed.
             # This is convenient for retries, which will need to send to those who haven't
             # yet been emailed, but not send to those who have already been sent to.
-            current_recipient = to_list[-1]
-            email = current_recipient['email']
-            email_context['email'] = email
-            email_context['name'] = current_recipient['profile__name']
-
-            # Construct message content using templates and context:
-            plaintext_msg = course_email_template.render_plaintext(course_email.text_message, email_context)
-            html_msg = course_email_template.render_htmltext(course_email.html_message, email_context)
-
-            # Create email:
-            email_msg = EmailMultiAlternatives(
-                subject,
-                plaintext_msg,
-                from_addr,
-                [email],
-                connection=connection
-            )
-            email_msg.attach_alternative(html_msg, 'text/html')
-
-            # Throttle if we have gotten the rate limiter.  This is not very high-tech,
-            # but if a task has been retried for rate-limiting reasons, then we sleep
-            # for a period of time between all emails within this task.  Choice of
-            # the value depends on the number of workers that might be sending email in
-            # parallel, and what the SES throttle rate is.
-            if subtask_status.retried_nomax > 0:
+            recipients = list(reversed(to_list[-num_connections:]))
+            email_msgs = []
+            for current_recipient, connection in zip(recipients, connections):
+                recipient_context = {
+                    'email': current_recipient['email'],
+                    'name': current_recipient['profile__name'],
+                }
+
+                # Construct message content using templates and context:
+                plaintext_msg = plaintext_template.render(recipient_context)
+                html_msg = html_template.render(recipient_context)
+
+                # Create email:
+                email_msg = EmailMultiAlternatives(
+                    subject,
+                    plaintext_msg,
+                    from_addr,
+                    [current_recipient['email']],
+                    connection=connection
+                )
+                email_msg.attach_alternative(html_msg, 'text/html')
+                email_msgs.append(email_msg)
+
+            if throttled:
                 sleep(settings.BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS)
 
-            try:
-                log.debug('Email with id %s to be sent to %s', email_id, email)
-
-                with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
-                    connection.send_messages([email_msg])
-
-            except SMTPDataError as exc:
-                # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
-                if exc.smtp_code >= 400 and exc.smtp_code < 500:
-                    # This will cause the outer handler to catch the exception and retry the entire task.
-                    raise exc
-                else:
+            for email_msg in email_msgs:
+                log.debug('Email with id %s to be sent to %s', email_id, email_msg.to[0])
+            if pool is None:
+                send_errors = [_send_email_message(email_msg, course_title) for email_msg in email_msgs]
+            else:
+                send_errors = pool.map(lambda email_msg: _send_email_message(email_msg, course_title), email_msgs)
+
+            retry_exc = None
+            for current_recipient, exc in zip(recipients, send_errors):
+                email = current_recipient['email']
+                if exc is None:
+                    dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
+                    if settings.BULK_EMAIL_LOG_SENT_EMAILS:
+                        log.info('Email with id %s sent to %s', email_id, email)
+                    else:
+                        log.debug('Email with id %s sent to %s', email_id, email)
+                    subtask_status.increment(succeeded=1)
+
+                elif isinstance(exc, SMTPDataError) and not 400 <= exc.smtp_code < 500:
+                    # According to SMTP spec, we'll retry error codes in the 4xx range.  5xx range indicates hard failure.
                     # This will fall through and not retry the message.
                     log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc.smtp_error)
                     dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
                     subtask_status.increment(failed=1)
 
-            except SINGLE_EMAIL_FAILURE_ERRORS as exc:
-                # This will fall through and not retry the message.
-                log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
-                dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
-                subtask_status.increment(failed=1)
+                elif isinstance(exc, SINGLE_EMAIL_FAILURE_ERRORS):
+                    # This will fall through and not retry the message.
+                    log.warning('Task %s: email with id %s not delivered to %s due to error %s', task_id, email_id, email, exc)
+                    dog_stats_api.increment('course_email.error', tags=[_statsd_tag(course_title)])
+                    subtask_status.increment(failed=1)
 
-            else:
-                dog_stats_api.increment('course_email.sent', tags=[_statsd_tag(course_title)])
-                if settings.BULK_EMAIL_LOG_SENT_EMAILS:
-                    log.info('Email with id %s sent to %s', email_id, email)
                 else:
-                    log.debug('Email with id %s sent to %s', email_id, email)
-                subtask_status.increment(succeeded=1)
+                    # This will cause the outer handler to catch the exception and retry the entire task,
+                    # with the recipient still on the list.
+                    retry_exc = retry_exc or exc
+                    continue
 
-            # Pop the user that was emailed off the end of the list only once they have
-            # successfully been processed.  (That way, if there were a failure that
-            # needed to be retried, the user is still on the list.)
-            to_list.pop()
+                # Remove the user that was emailed from the list only once they have
+                # been processed.  (That way, if there were a failure that
+                # needed to be retried, the user is still on the list.)
+                to_list.remove(current_recipient)
+
+            if retry_exc is not None:
+                raise retry_exc
 
     except INFINITE_RETRY_ERRORS as exc:
         dog_stats_api.increment('course_email.infinite_retry', tags=[_statsd_tag(course_title)])
@@ -563,7 +591,41 @@ def _send_course_email(entry_id, email_id, to_list, global_email_context, subtas
         return subtask_status, None
     finally:
         # Clean up at the end.
-        connection.close()
+        if pool is not None:
+            pool.close()
+        for connection in connections:
+            connection.close()
+        _log_send_rate(task_id, course_title, subtask_status, num_previously_processed, start_time, num_connections)
+
+
+def _send_email_message(email_msg, course_title):
+    """
+    Send `email_msg` over its connection, returning the exception raised
+    if it couldn't be sent, or None.
+    """
+    try:
+        with dog_stats_api.timer('course_email.single_send.time.overall', tags=[_statsd_tag(course_title)]):
+            email_msg.connection.send_messages([email_msg])
+    except Exception as exc:  # pylint: disable=broad-except
+        return exc
+    return None
+
+
+def _log_send_rate(task_id, course_title, subtask_status, num_previously_processed, start_time, num_connections):
+    """
+    Log and report to datadog how many recipients per second this run of a
+    subtask processed.
+    """
+    num_processed = subtask_status.succeeded + subtask_status.failed - num_previously_processed
+    elapsed = time() - start_time
+    if num_processed <= 0 or elapsed <= 0:
+        return
+    recipients_per_second = num_processed / elapsed
+    dog_stats_api.histogram(
+        'course_email.recipients_per_second', recipients_per_second, tags=[_statsd_tag(course_title)]
+    )
+    log.info("Task %s: processed %d recipients in %.2f seconds (%.1f per second) over %d connections",
+             task_id, num_processed, elapsed, recipients_per_second, num_connections)
 
 
 def _get_current_task():
@@ -103,6 +103,29 @@ class CourseEmailTemplateTest(TestCase):
         context = self._get_sample_plain_context()
         template.render_plaintext("My new plain text.", context)
 
+    def test_compiled_templates(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        compiled_plain = template.compile_plaintext("My {name} plain text.", context)
+        compiled_html = template.compile_htmltext("My {name} html text.", context)
+        for name, email in [(u'Some User', u'some@example.com'), (u'{message_body}', u'other@example.com')]:
+            recipient_context = dict(context, name=name, email=email)
+            self.assertEqual(
+                compiled_plain.render({'name': name, 'email': email}),
+                template.render_plaintext("My {name} plain text.", recipient_context)
+            )
+            self.assertEqual(
+                compiled_html.render({'name': name, 'email': email}),
+                template.render_htmltext("My {name} html text.", recipient_context)
+            )
+
+    def test_compile_without_context(self):
+        template = CourseEmailTemplate.get_template()
+        context = self._get_sample_html_context()
+        del context['course_title']
+        with self.assertRaises(KeyError):
+            template.compile_htmltext("My new html text.", context)
+
 
 class CourseAuthorizationTest(TestCase):
     """Test the CourseAuthorization model."""
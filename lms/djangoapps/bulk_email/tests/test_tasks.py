@@ -27,11 +27,12 @@ from celery.states import SUCCESS, FAILURE
 
 from django.conf import settings
 from django.core.management import call_command
+from django.test.utils import override_settings
 
 from bulk_email.models import CourseEmail, Optout, SEND_TO_ALL
 
 from instructor_task.tasks import send_bulk_course_email
-from instructor_task.subtasks import update_subtask_status, SubtaskStatus
+from instructor_task.subtasks import update_subtask_status, get_subtask_statuses
 from instructor_task.models import InstructorTask
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase
 from instructor_task.tests.factories import InstructorTaskFactory
@@ -60,10 +61,7 @@ def my_update_subtask_status(entry_id, current_task_id, new_subtask_status):
     This should not be an issue in production, where status is updated before
     a task is retried, and is then updated afterwards if the retry fails.
     """
-    entry = InstructorTask.objects.get(pk=entry_id)
-    subtask_dict = json.loads(entry.subtasks)
-    subtask_status_info = subtask_dict['status']
-    current_subtask_status = SubtaskStatus.from_dict(subtask_status_info[current_task_id])
+    current_subtask_status = get_subtask_statuses(entry_id)[current_task_id]
     current_retry_count = current_subtask_status.get_retry_count()
     new_retry_count = new_subtask_status.get_retry_count()
     if current_retry_count <= new_retry_count:
@@ -144,14 +142,14 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
         subtask_info = json.loads(entry.subtasks)
         # verify subtask-level counts:
         self.assertEquals(subtask_info.get('total'), 1)
-        self.assertEquals(subtask_info.get('succeeded'), 1 if succeeded > 0 else 0)
-        self.assertEquals(subtask_info.get('failed'), 0 if succeeded > 0 else 1)
+        self.assertEquals(entry.num_subtasks_succeeded, 1 if succeeded > 0 else 0)
+        self.assertEquals(entry.num_subtasks_failed, 0 if succeeded > 0 else 1)
         # verify individual subtask status:
-        subtask_status_info = subtask_info.get('status')
+        subtask_status_info = get_subtask_statuses(entry.id)
         task_id_list = subtask_status_info.keys()
         self.assertEquals(len(task_id_list), 1)
         task_id = task_id_list[0]
-        subtask_status = subtask_status_info.get(task_id)
+        subtask_status = subtask_status_info.get(task_id).to_dict()
         print("Testing subtask status: {}".format(subtask_status))
         self.assertEquals(subtask_status.get('task_id'), task_id)
         self.assertEquals(subtask_status.get('attempted'), succeeded + failed)
@@ -252,6 +250,22 @@ class TestBulkEmailInstructorTask(InstructorTaskCourseTestCase):
             get_conn.return_value.send_messages.side_effect = cycle([exception, None, None, None])
             self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, expected_succeeds, failed=expected_fails)
 
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=3)
+    def test_successful_over_parallel_connections(self):
+        # Select number of emails to fit into a single subtask.
+        num_emails = settings.BULK_EMAIL_EMAILS_PER_TASK
+        # We also send email to the instructor:
+        self._create_students(num_emails - 1)
+        with patch('bulk_email.tasks.get_connection', autospec=True) as get_conn:
+            get_conn.return_value.send_messages.side_effect = cycle([None])
+            self._test_run_with_task(send_bulk_course_email, 'emailed', num_emails, num_emails)
+            self.assertEquals(get_conn.call_count, 3)
+            self.assertEquals(get_conn.return_value.send_messages.call_count, num_emails)
+
+    @override_settings(BULK_EMAIL_CONNECTIONS_PER_TASK=3)
+    def test_address_failures_over_parallel_connections(self):
+        self._test_email_address_failures(SMTPDataError(554, "Email address is blacklisted"))
+
     def test_smtp_blacklisted_user(self):
         # Test that celery handles permanent SMTPDataErrors by failing and not retrying.
         self._test_email_address_failures(SMTPDataError(554, "Email address is blacklisted"))
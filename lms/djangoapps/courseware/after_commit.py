@@ -0,0 +1,57 @@
+"""
+Queueing celery tasks once the request's transaction has committed.
+
+Tasks that read what a request writes mustn't be queued from inside the
+request's transaction (see TransactionMiddleware): a worker could run them
+before the commit, or after a rollback. `apply_async_after_commit` holds them
+until `AfterCommitMiddleware` sees the response, which is after
+TransactionMiddleware has committed, and drops them if the request raised.
+AfterCommitMiddleware must come before TransactionMiddleware in
+MIDDLEWARE_CLASSES.
+
+Outside of a request (e.g. in celery tasks and management commands), tasks
+are queued straight away.
+"""
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+_PENDING = threading.local()
+
+
+def apply_async_after_commit(task, **options):
+    """
+    Call `task.apply_async(**options)` once the current request's transaction
+    has committed, or now if there is no current request.
+    """
+    pending = getattr(_PENDING, 'tasks', None)
+    if pending is None:
+        task.apply_async(**options)
+    else:
+        pending.append((task, options))
+
+
+class AfterCommitMiddleware(object):
+    """
+    Queue the tasks held by `apply_async_after_commit` during a request once it
+    has been committed.
+    """
+    def process_request(self, request):  # pylint: disable=unused-argument
+        """Start holding tasks."""
+        _PENDING.tasks = []
+
+    def process_exception(self, request, exception):  # pylint: disable=unused-argument
+        """The transaction was rolled back, so drop the held tasks."""
+        _PENDING.tasks = None
+
+    def process_response(self, request, response):  # pylint: disable=unused-argument
+        """The transaction was committed, so queue the held tasks."""
+        pending = getattr(_PENDING, 'tasks', None)
+        _PENDING.tasks = None
+        for task, options in pending or []:
+            try:
+                task.apply_async(**options)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Could not queue task %s after commit", task.name)
+        return response
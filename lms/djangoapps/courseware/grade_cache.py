@@ -0,0 +1,103 @@
+"""
+Cache of computed course grades and progress summaries.
+
+Entries are keyed by (kind, role, course, user, course content version), so a
+course republish orphans every entry for that course, while writes to a
+student's scores invalidate just that student's entries via `invalidate`. The
+role keeps the grades of staff masquerading as students apart from their own,
+as they are graded on different content.
+
+Courses with content whose scores change outside of the LMS (see
+`always_recalculate_grades`) aren't cached at all, as nothing would
+invalidate their entries; `courseware.grades` checks this with
+`course_is_cacheable`.
+
+This module must not import `courseware.grades` or `courseware.module_render`,
+since both use it.
+"""
+from django.conf import settings
+from django.core.cache import get_cache, InvalidCacheBackendError
+
+from xmodule.modulestore.django import course_content_version
+
+GRADE = 'grade'
+PROGRESS_SUMMARY = 'progress_summary'
+KINDS = (GRADE, PROGRESS_SUMMARY)
+
+# The roles a user can be graded in
+AS_SELF = 'self'
+AS_STUDENT = 'as_student'
+ROLES = (AS_SELF, AS_STUDENT)
+
+# The kind of the per-course entry recording whether a course can be cached
+CACHEABLE = 'cacheable'
+
+
+def is_enabled():
+    """Return True if computed grades should be cached."""
+    return settings.FEATURES.get('ENABLE_GRADE_CACHE', False)
+
+
+def _cache():
+    """Return the cache backend used for grades."""
+    try:
+        return get_cache('grades')
+    except InvalidCacheBackendError:
+        return get_cache('default')
+
+
+def _key(kind, user_id, course_id, version, role=AS_SELF):
+    """Return the cache key for an entry."""
+    return u'grades.{}.{}.{}.{}.{}'.format(kind, role, course_id, user_id, version)
+
+
+def invalidate(user_id, course_id):
+    """
+    Drop every cached value for `user_id` in `course_id`. Call this whenever
+    one of the user's scores in the course changes.
+    """
+    if not is_enabled():
+        return
+    version = course_content_version(course_id)
+    _cache().delete_many([
+        _key(kind, user_id, course_id, version, role) for kind in KINDS for role in ROLES
+    ])
+
+
+def get_or_compute(kind, user_id, course_id, compute, role=AS_SELF):
+    """
+    Return the cached `kind` value for `user_id` in `course_id` when graded in
+    `role`, calling `compute()` and caching its result on a miss. Results of
+    None are not cached. If the cache is disabled, this just returns
+    `compute()`.
+    """
+    if not is_enabled():
+        return compute()
+
+    cache = _cache()
+    key = _key(kind, user_id, course_id, course_content_version(course_id), role)
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            cache.set(key, value, getattr(settings, 'GRADE_CACHE_TIMEOUT', None))
+    return value
+
+
+def course_is_cacheable(course_id, compute):
+    """
+    Return whether the grades of `course_id` may be cached, calling
+    `compute()` to find out (and remembering the answer for the course's
+    current content) if it isn't known yet. Returns False if the cache is
+    disabled.
+    """
+    if not is_enabled():
+        return False
+
+    cache = _cache()
+    key = _key(CACHEABLE, '', course_id, course_content_version(course_id))
+    cacheable = cache.get(key)
+    if cacheable is None:
+        cacheable = compute()
+        cache.set(key, cacheable, getattr(settings, 'GRADE_CACHE_TIMEOUT', None))
+    return cacheable
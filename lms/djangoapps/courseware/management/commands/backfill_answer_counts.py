@@ -0,0 +1,28 @@
+"""
+Rebuild the answer counts used for answer distribution reports from the
+StudentModules of one or more courses.
+"""
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand
+
+from courseware.models import StudentModule, StudentModuleAnswerCount
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the answer counts of the given courses, or of every course with
+    StudentModules if no course is given.
+
+    Answers submitted while a course is being recounted may be miscounted, so
+    run this again for courses that were busy.
+    """
+    args = '[<course_id> ...]'
+    help = dedent(__doc__).strip()
+
+    def handle(self, *args, **options):
+        course_ids = args or StudentModule.objects.values_list('course_id', flat=True).distinct()
+
+        for course_id in course_ids:
+            num_modules = StudentModuleAnswerCount.rebuild(course_id)
+            self.stdout.write(u"Counted the answers of {} submitted problems in {}\n".format(num_modules, course_id))
@@ -0,0 +1,40 @@
+"""
+Fold the sharded counts of user_state_summary fields into one row per count.
+"""
+from optparse import make_option
+from textwrap import dedent
+
+from django.core.management.base import BaseCommand
+
+from courseware.models import XModuleUserStateSummaryCounter
+
+
+class Command(BaseCommand):
+    """
+    Fold the shards of the summary counts of the given usage ids, or of every
+    usage id if none is given, so that reading the counts reads fewer rows.
+    The folded counts are added to the counted fields too.
+
+    Counts can still be added to while this runs, so it's safe to run
+    periodically (e.g. from cron).
+
+    With --stop, the counters are deleted once folded, so that the fields hold
+    all the counts again. Only use it once FEATURES['ENABLE_SUMMARY_COUNTERS']
+    is off.
+    """
+    args = '[<usage_id> ...]'
+    help = dedent(__doc__).strip()
+    option_list = BaseCommand.option_list + (
+        make_option('--stop',
+                    action='store_true',
+                    default=False,
+                    help='Delete the counters once folded into the fields'),
+    )
+
+    def handle(self, *args, **options):
+        fold = XModuleUserStateSummaryCounter.stop if options['stop'] else XModuleUserStateSummaryCounter.fold
+        if args:
+            num_folded = sum(fold(usage_id=usage_id) for usage_id in args)
+        else:
+            num_folded = fold()
+        self.stdout.write(u"Folded {} counter shards\n".format(num_folded))
@@ -3,16 +3,19 @@ Classes to provide the LMS runtime data storage to XBlocks
 """
 
 import json
+import random
 from collections import defaultdict
 from itertools import chain
 from .models import (
     StudentModule,
+    XModuleUserStateSummaryCounter,
     XModuleUserStateSummaryField,
     XModuleStudentPrefsField,
     XModuleStudentInfoField
 )
 import logging
 
+from django.conf import settings
 from django.db import DatabaseError
 from django.contrib.auth.models import User
 
@@ -207,6 +210,25 @@ class FieldDataCache(object):
         elif scope == Scope.user_info:
             return (scope, field_object.field_name)
 
+    def student_module_scores(self):
+        """
+        Return a dict mapping the module_state_key of each descriptor whose
+        StudentModule was loaded by this cache to the (grade, max_grade) of that
+        StudentModule, or to (None, None) if the user has none.
+
+        Descriptors whose StudentModules weren't loaded aren't in the dict.
+        """
+        scores = {}
+        if not self.user.is_authenticated() or Scope.user_state not in self._fields_to_cache():
+            return scores
+
+        for descriptor in self.descriptors:
+            scores[str(descriptor.scope_ids.usage_id)] = (None, None)
+        for cache_key, field_object in self.cache.iteritems():
+            if cache_key[0] == Scope.user_state:
+                scores[field_object.module_state_key] = (field_object.grade, field_object.max_grade)
+        return scores
+
     def find(self, key):
         '''
         Look for a model data object using an DjangoKeyValueStore.Key object
@@ -384,3 +406,62 @@ class DjangoKeyValueStore(KeyValueStore):
             return key.field_name in json.loads(field_object.state)
         else:
             return True
+
+
+class SummaryCounterService(object):
+    """
+    A runtime service for blocks to count things in Scope.user_state_summary
+    fields (e.g. votes or submitted words) in XModuleUserStateSummaryCounter
+    rows, spread over SUMMARY_COUNTER_SHARDS shards, rather than by rewriting
+    the whole field on every submission.
+
+    The first time a field is counted, the counts it holds are copied into the
+    counters. The field isn't written by the service after that, but the
+    `fold_summary_counters` command adds the counts to it (see
+    XModuleUserStateSummaryCounter for how to stop counting a field).
+
+    A service is made for each runtime, so it only remembers which fields it
+    has checked have started counting for as long as the runtime lives.
+    """
+    def __init__(self):
+        # The (usage_id, field_name)s known to have started counting
+        self._started = set()
+
+    def _usage_id(self, block, field_name):
+        """
+        Return the usage id that the counts of `field_name` of `block` are kept
+        under, starting to count the field if it hasn't been yet.
+        """
+        usage_id = str(block.scope_ids.usage_id)
+        if (usage_id, field_name) not in self._started:
+            XModuleUserStateSummaryCounter.start(usage_id, field_name, getattr(block, field_name) or {})
+            self._started.add((usage_id, field_name))
+        return usage_id
+
+    def add(self, block, field_name, differences):
+        """
+        Add the differences in `differences`, a dict mapping keys to the
+        amount to add to their counts, to the counts of `field_name` of `block`.
+        """
+        shard = random.randint(1, settings.SUMMARY_COUNTER_SHARDS)
+        XModuleUserStateSummaryCounter.add(self._usage_id(block, field_name), field_name, differences, shard)
+
+    def counts(self, block, field_name, keys=None):
+        """
+        Return a dict mapping the keys counted in `field_name` of `block`, or
+        just `keys` if given, to their counts.
+        """
+        return XModuleUserStateSummaryCounter.counts(self._usage_id(block, field_name), field_name, keys)
+
+    def total(self, block, field_name):
+        """Return the total of the counts of `field_name` of `block`."""
+        return XModuleUserStateSummaryCounter.total(self._usage_id(block, field_name), field_name)
+
+    def top(self, block, field_name, amount):
+        """
+        Return a dict mapping the `amount` keys with the highest counts in
+        `field_name` of `block` to their counts. This reads every count of the
+        field, so blocks should keep their own top counts up to date with
+        `counts` instead where they can.
+        """
+        return XModuleUserStateSummaryCounter.top(self._usage_id(block, field_name), field_name, amount)
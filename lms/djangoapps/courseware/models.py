@@ -12,12 +12,23 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import hashlib
+import json
+import logging
+import random
+from collections import Counter
+
 from django.contrib.auth.models import User
 from django.conf import settings
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Sum
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
+from courseware import grade_cache
+
+log = logging.getLogger(__name__)
+
 
 class StudentModule(models.Model):
     """
@@ -88,6 +99,316 @@ class StudentModule(models.Model):
         return unicode(repr(self))
 
 
+def _graded_values(instance):
+    """The values of a StudentModule that the student's grades depend on."""
+    return (instance.grade, instance.max_grade)
+
+
+@receiver(post_init, sender=StudentModule)
+def remember_graded_values(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Remember the score of a StudentModule when it was loaded, so that saving
+    it only invalidates cached grades if the score changed.
+    """
+    instance._graded_values = _graded_values(instance)  # pylint: disable=protected-access
+
+
+@receiver(post_save, sender=StudentModule)
+def invalidate_cached_grades(sender, instance, created, **kwargs):  # pylint: disable=unused-argument
+    """
+    Saving a StudentModule with a new score can change the student's grade, so
+    drop any grades cached for them in that course. This covers grade events
+    from module_render as well as rescoring, resets and management commands.
+    """
+    graded_values = _graded_values(instance)
+    if created or graded_values != instance._graded_values:  # pylint: disable=protected-access
+        grade_cache.invalidate(instance.student_id, instance.course_id)
+        instance._graded_values = graded_values  # pylint: disable=protected-access
+
+
+@receiver(post_delete, sender=StudentModule)
+def invalidate_cached_grades_on_delete(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Deleting a StudentModule (e.g. resetting a student's state) can change
+    their grade, so drop any grades cached for them in that course.
+    """
+    grade_cache.invalidate(instance.student_id, instance.course_id)
+
+
+class StudentModuleAnswerCount(models.Model):
+    """
+    The number of submitted problem StudentModules whose state holds a given
+    answer to a given problem part. This lets answer distributions be reported
+    without scanning StudentModule (see `courseware.grades.answer_distributions`).
+
+    The counts are updated as StudentModules are saved and deleted, which
+    misses bulk queryset updates and StudentModules saved before the counts
+    existed, so the counts of a course can be rebuilt with the
+    `backfill_answer_counts` management command.
+
+    Each save or delete of a problem StudentModule queues a
+    `courseware.tasks.count_answers` task once its transaction has committed,
+    which recounts the StudentModule from its committed state (see
+    `recount_student_module`), so rolled back and concurrent saves can't throw
+    the counts off. Each change is added to a random shard from 1 to
+    ANSWER_COUNT_SHARDS, so that students submitting the same answer don't
+    wait on one row. A count is the sum of its shards; `rebuild` writes its
+    counts to shard 0.
+    """
+    course_id = models.CharField(max_length=255, db_index=True)
+    module_state_key = models.CharField(max_length=255, db_column='module_id')
+    part_id = models.CharField(max_length=255)
+    # Answers can be any length, so they are unique by their hash
+    answer_hash = models.CharField(max_length=40)
+    answer = models.TextField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.IntegerField(default=0)
+
+    # How many rows `rebuild` inserts per query, kept small enough for
+    # SQLite's limit of 999 variables per query
+    CREATE_BATCH_SIZE = 100
+
+    class Meta:
+        unique_together = (('course_id', 'module_state_key', 'part_id', 'answer_hash', 'shard'),)
+
+    @classmethod
+    def all_counted_answers_read_only(cls, course_id):
+        """
+        Return the answer counts above zero for a given course, as dicts with
+        the 'module_state_key', 'part_id', 'answer' and 'total' of each answer.
+        Use a read replica if one exists for this environment.
+        """
+        queryset = cls.objects.filter(course_id=course_id)
+        if "read_replica" in settings.DATABASES:
+            queryset = queryset.using("read_replica")
+        return queryset.values(
+            'module_state_key', 'part_id', 'answer_hash', 'answer'
+        ).annotate(total=Sum('count')).filter(total__gt=0)
+
+    @staticmethod
+    def answers_in(course_id, module_type, module_state_key, grade, state):
+        """
+        Return a Counter of the (course_id, module_state_key, part_id, answer)
+        tuples that a StudentModule with these values counts towards. Only
+        problems that have been submitted (have a grade) count.
+        """
+        answers = Counter()
+        if module_type != 'problem' or grade is None or not state:
+            return answers
+
+        try:
+            raw_answers = json.loads(state).get("student_answers", {})
+        except (ValueError, AttributeError):
+            log.error(
+                "Answer Distribution: Could not parse module state for %s, course=%s", module_state_key, course_id
+            )
+            return answers
+
+        for part_id, raw_answer in raw_answers.iteritems():
+            # Count answers of all types (numbers, None, etc.) by their unicode values
+            answers[(course_id, module_state_key, part_id, unicode(raw_answer))] += 1
+        return answers
+
+    @staticmethod
+    def hash_answer(answer):
+        """Return the hash that identifies `answer`."""
+        return hashlib.sha1(answer.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _apply_changes(cls, changes):
+        """
+        Add the count differences in `changes`, a Counter of
+        (course_id, module_state_key, part_id, answer) tuples, each to a random
+        shard of its count. The rows are updated in a fixed order, so that two
+        recounts can't deadlock on them.
+        """
+        for (course_id, module_state_key, part_id, answer), difference in sorted(changes.iteritems()):
+            if not difference:
+                continue
+            _add_to_count(
+                cls,
+                difference,
+                {'answer': answer},
+                course_id=course_id,
+                module_state_key=module_state_key,
+                part_id=part_id,
+                answer_hash=cls.hash_answer(answer),
+                shard=random.randint(1, settings.ANSWER_COUNT_SHARDS),
+            )
+
+    @classmethod
+    @transaction.commit_on_success
+    def recount_student_module(cls, student_module_id):
+        """
+        Bring the counts up to date with the committed state of the StudentModule
+        `student_module_id` (which may have been deleted), by counting the
+        difference between its answers and the answers it was last counted
+        with (see `StudentModuleCountedAnswers`).
+
+        Recounts of a StudentModule are serialized by locking its
+        StudentModuleCountedAnswers row, and each starts from what the previous
+        one counted, so they can run in any order, and any number of times.
+        """
+        counted = StudentModuleCountedAnswers.lock(student_module_id)
+        # Read after taking the lock, so that this sees the latest committed state
+        modules = StudentModule.objects.filter(id=student_module_id).values_list(
+            'course_id', 'module_type', 'module_state_key', 'grade', 'state'
+        )
+        answers = Counter()
+        for values in modules:
+            answers = cls.answers_in(*values)
+            counted.course_id = values[0]
+
+        changes = Counter(answers)
+        changes.subtract(counted.answer_counter())
+        cls._apply_changes(changes)
+
+        if answers:
+            counted.set_answers(answers)
+            counted.save()
+        else:
+            counted.delete()
+
+    @classmethod
+    @transaction.commit_on_success
+    def rebuild(cls, course_id):
+        """
+        Recount the answers of `course_id` from its StudentModules, returning
+        the number of StudentModules read. Answers submitted while this runs
+        may be miscounted, so run it again if the course was busy.
+        """
+        cls.objects.filter(course_id=course_id).delete()
+        StudentModuleCountedAnswers.objects.filter(course_id=course_id).delete()
+
+        answers = Counter()
+        num_modules = 0
+        modules = StudentModule.objects.filter(
+            course_id=course_id, module_type='problem', grade__isnull=False
+        ).values_list('id', 'module_state_key', 'grade', 'state')
+
+        counted = []
+        for student_module_id, module_state_key, grade, state in modules.iterator():
+            num_modules += 1
+            module_answers = cls.answers_in(course_id, 'problem', module_state_key, grade, state)
+            if module_answers:
+                answers.update(module_answers)
+                counted.append(StudentModuleCountedAnswers(student_module_id=student_module_id, course_id=course_id))
+                counted[-1].set_answers(module_answers)
+            if len(counted) >= cls.CREATE_BATCH_SIZE:
+                StudentModuleCountedAnswers.objects.bulk_create(counted)
+                counted = []
+        StudentModuleCountedAnswers.objects.bulk_create(counted)
+
+        answer_counts = [
+            cls(
+                course_id=course_id,
+                module_state_key=module_state_key,
+                part_id=part_id,
+                answer_hash=cls.hash_answer(answer),
+                answer=answer,
+                count=count,
+            )
+            for (_, module_state_key, part_id, answer), count in answers.iteritems()
+        ]
+        for start in xrange(0, len(answer_counts), cls.CREATE_BATCH_SIZE):
+            cls.objects.bulk_create(answer_counts[start:start + cls.CREATE_BATCH_SIZE])
+        return num_modules
+
+
+def _add_to_count(model, difference, defaults, **lookup):
+    """
+    Add `difference` to the count of the `model` row matching `lookup`,
+    creating the row, with the extra `defaults`, if it doesn't exist yet.
+
+    The count is updated in the database, as other processes may be adding to
+    the same row. If another process creates the row first, this adds to the
+    row it created rather than failing: unlike `get_or_create`, which can't
+    see that row under MySQL's REPEATABLE READ isolation, an UPDATE always
+    sees the latest committed row.
+    """
+    rows = model.objects.filter(**lookup)
+    if rows.update(count=F('count') + difference):
+        return
+
+    fields = dict(lookup, count=difference, **defaults)
+    sid = transaction.savepoint()
+    try:
+        model.objects.create(**fields)
+        transaction.savepoint_commit(sid)
+    except IntegrityError:
+        transaction.savepoint_rollback(sid)
+        rows.update(count=F('count') + difference)
+
+
+class StudentModuleCountedAnswers(models.Model):
+    """
+    The answers that the answer counts include for one StudentModule, so that
+    a recount of the StudentModule (see
+    `StudentModuleAnswerCount.recount_student_module`) only counts the
+    difference. StudentModules which count no answers have no row.
+    """
+    # Not a foreign key, as the row has to outlive its StudentModule until
+    # the StudentModule's answers have been uncounted
+    student_module_id = models.IntegerField(unique=True)
+    course_id = models.CharField(max_length=255, db_index=True)
+    # A JSON list of the [course_id, module_state_key, part_id, answer] counted
+    answers = models.TextField(default='[]')
+
+    @classmethod
+    def lock(cls, student_module_id):
+        """
+        Return the row for `student_module_id`, creating it (with no answers)
+        if there is none, locked until the end of the current transaction.
+        """
+        try:
+            return cls.objects.select_for_update().get(student_module_id=student_module_id)
+        except cls.DoesNotExist:
+            pass
+
+        sid = transaction.savepoint()
+        try:
+            counted = cls.objects.create(student_module_id=student_module_id)
+            transaction.savepoint_commit(sid)
+            return counted
+        except IntegrityError:
+            # another recount created it first
+            transaction.savepoint_rollback(sid)
+            return cls.objects.select_for_update().get(student_module_id=student_module_id)
+
+    def answer_counter(self):
+        """Return the counted answers, as a Counter of tuples."""
+        return Counter(tuple(answer) for answer in json.loads(self.answers))
+
+    def set_answers(self, answers):
+        """Record the answers in the Counter `answers` as the ones counted."""
+        self.answers = json.dumps(sorted(answers))
+
+
+@receiver(post_save, sender=StudentModule)
+@receiver(post_delete, sender=StudentModule)
+def update_answer_counts(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """
+    Queue a recount of the answers of a saved or deleted problem StudentModule,
+    to run once the current transaction has committed.
+
+    A failure to queue is logged rather than raised, so that it never fails
+    the save of the StudentModule.
+    """
+    if not settings.FEATURES.get('ENABLE_ANSWER_DISTRIBUTION_COUNTS', False):
+        return
+    if instance.module_type != 'problem':
+        return
+
+    # Imported here, as these modules import these models
+    from courseware.after_commit import apply_async_after_commit
+    from courseware.tasks import count_answers
+
+    try:
+        apply_async_after_commit(count_answers, args=[instance.id], routing_key=settings.ANSWER_COUNT_ROUTING_KEY)
+    except Exception:  # pylint: disable=broad-except
+        log.exception("Answer Distribution: Could not queue the counting of the answers of %s", instance.id)
+
+
 class StudentModuleHistory(models.Model):
     """Keeps a complete history of state changes for a given XModule for a given
     Student. Right now, we restrict this to problems so that the table doesn't
@@ -149,6 +470,272 @@ class XModuleUserStateSummaryField(models.Model):
     def __unicode__(self):
         return unicode(repr(self))
 
+    @classmethod
+    def lock(cls, usage_id, field_name):
+        """
+        Return the row of `field_name` of `usage_id`, creating it (holding
+        null) if there is none, locked until the end of the current transaction.
+        """
+        try:
+            return cls.objects.select_for_update().get(usage_id=usage_id, field_name=field_name)
+        except cls.DoesNotExist:
+            pass
+
+        sid = transaction.savepoint()
+        try:
+            field = cls.objects.create(usage_id=usage_id, field_name=field_name)
+            transaction.savepoint_commit(sid)
+            return field
+        except IntegrityError:
+            # another process created it first
+            transaction.savepoint_rollback(sid)
+            return cls.objects.select_for_update().get(usage_id=usage_id, field_name=field_name)
+
+
+class XModuleUserStateSummaryCounter(models.Model):
+    """
+    One shard of a count kept for a Scope.user_state_summary field, for fields
+    that count things submitted by many students at once (e.g. the words of a
+    word cloud). Blocks add to the counts through the `summary_counters`
+    runtime service (see `courseware.model_data.SummaryCounterService`)
+    instead of rewriting the whole field, so that concurrent submissions
+    neither wait on one row nor overwrite each other's counts.
+
+    Each submission adds to a random shard from 1 to SUMMARY_COUNTER_SHARDS,
+    and a count is the sum of its shards. Shard 0 holds the counts copied from
+    the field when counting started and the shards folded into it by the
+    `fold_summary_counters` management command. The total of all the counts
+    of a field is kept under TOTAL_KEY_HASH.
+
+    Folding also adds the folded counts to the field itself, so the field is
+    as up to date as the last fold. To stop counting a field, turn the
+    counters off and then run `fold_summary_counters --stop`, which folds the
+    last shards into the field and deletes the counters. Turning the counters
+    back on without stopping them first is one-way: counting resumes from the
+    counters, without what was added to the field while they were off.
+
+    Every transaction that updates several counters updates them in order of
+    their key_hash (which sorts TOTAL_KEY_HASH last), so that transactions
+    adding to the same counters can't deadlock.
+    """
+    TOTAL_KEY_HASH = 'total'
+
+    # How many rows `start` inserts per query, kept small enough for SQLite's
+    # limit of 999 variables per query
+    CREATE_BATCH_SIZE = 100
+
+    # How many shards `fold` folds per transaction
+    FOLD_BATCH_SIZE = 100
+
+    # The name of the field
+    field_name = models.CharField(max_length=64)
+
+    # The definition id for the module
+    usage_id = models.CharField(max_length=255)
+
+    # Keys can be any length, so they are unique by their hash
+    key_hash = models.CharField(max_length=40)
+    key = models.TextField()
+
+    shard = models.PositiveSmallIntegerField(default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = (('usage_id', 'field_name', 'key_hash', 'shard'),)
+
+    @staticmethod
+    def hash_key(key):
+        """Return the hash that identifies `key`."""
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _add(cls, usage_id, field_name, key_hash, key, shard, difference):
+        """Add `difference` to one shard of a count, creating the shard if needed."""
+        _add_to_count(
+            cls,
+            difference,
+            {'key': key},
+            usage_id=usage_id,
+            field_name=field_name,
+            key_hash=key_hash,
+            shard=shard,
+        )
+
+    @classmethod
+    def add(cls, usage_id, field_name, differences, shard):
+        """
+        Add the differences in `differences`, a dict mapping keys to the
+        amount to add to their counts, to shard `shard` of the counts.
+        """
+        differences = dict((key, difference) for key, difference in differences.iteritems() if difference)
+        for key_hash, key in sorted((cls.hash_key(key), key) for key in differences):
+            cls._add(usage_id, field_name, key_hash, key, shard, differences[key])
+        if differences:
+            cls._add(usage_id, field_name, cls.TOTAL_KEY_HASH, u'', shard, sum(differences.itervalues()))
+
+    @classmethod
+    def counts(cls, usage_id, field_name, keys=None):
+        """
+        Return a dict mapping the keys of a field, or just `keys` if given, to
+        their counts. Keys that were never counted aren't in the dict.
+        """
+        counters = cls.objects.filter(usage_id=usage_id, field_name=field_name)
+        if keys is None:
+            counters = counters.exclude(key_hash=cls.TOTAL_KEY_HASH)
+        else:
+            counters = counters.filter(key_hash__in=[cls.hash_key(key) for key in keys])
+
+        counts = Counter()
+        for key, count in counters.values_list('key', 'count'):
+            counts[key] += count
+        return dict(counts)
+
+    @classmethod
+    def total(cls, usage_id, field_name):
+        """Return the total of all the counts of a field."""
+        return cls.objects.filter(
+            usage_id=usage_id, field_name=field_name, key_hash=cls.TOTAL_KEY_HASH
+        ).aggregate(total=Sum('count'))['total'] or 0
+
+    @classmethod
+    def top(cls, usage_id, field_name, amount):
+        """
+        Return a dict mapping the `amount` keys of a field with the highest
+        counts to their counts. This sums every count of the field, so it's
+        best kept for fields with few keys.
+        """
+        counters = cls.objects.filter(
+            usage_id=usage_id, field_name=field_name
+        ).exclude(
+            key_hash=cls.TOTAL_KEY_HASH
+        ).values('key_hash', 'key').annotate(total=Sum('count')).order_by('-total')[:amount]
+        return dict((counter['key'], counter['total']) for counter in counters)
+
+    @classmethod
+    def start(cls, usage_id, field_name, counts):
+        """
+        Start counting a field from `counts`, the values it held before, unless
+        counting it has already started. Returns whether it had.
+
+        Counting has started once the field's shard 0 TOTAL_KEY_HASH row
+        exists. Only the process that creates that row copies `counts`, so
+        processes starting at once don't count the field's values twice.
+        """
+        total_counter = cls.objects.filter(
+            usage_id=usage_id, field_name=field_name, key_hash=cls.TOTAL_KEY_HASH, shard=0
+        )
+        if total_counter.exists():
+            return True
+
+        sid = transaction.savepoint()
+        try:
+            cls.objects.create(
+                usage_id=usage_id,
+                field_name=field_name,
+                key_hash=cls.TOTAL_KEY_HASH,
+                key=u'',
+                shard=0,
+                count=sum(counts.itervalues()),
+            )
+            transaction.savepoint_commit(sid)
+        except IntegrityError:
+            # another process started counting the field first
+            transaction.savepoint_rollback(sid)
+            return True
+
+        counts = dict((key, count) for key, count in counts.iteritems() if count)
+        counters = [
+            cls(
+                usage_id=usage_id,
+                field_name=field_name,
+                key_hash=cls.hash_key(key),
+                key=key,
+                shard=0,
+                count=count,
+            )
+            for key, count in counts.iteritems()
+        ]
+        sid = transaction.savepoint()
+        try:
+            for offset in xrange(0, len(counters), cls.CREATE_BATCH_SIZE):
+                cls.objects.bulk_create(counters[offset:offset + cls.CREATE_BATCH_SIZE])
+            transaction.savepoint_commit(sid)
+        except IntegrityError:
+            # `fold` has created some of the rows already, so add to those
+            transaction.savepoint_rollback(sid)
+            for key, count in counts.iteritems():
+                cls._add(usage_id, field_name, cls.hash_key(key), key, 0, count)
+        return False
+
+    @classmethod
+    def fold(cls, **filters):
+        """
+        Fold the shards of the counts matching `filters` into shard 0, so that
+        reading them reads fewer rows, and add them to the counted fields.
+        Counts can be added to while this runs. Returns the number of shards
+        folded.
+        """
+        num_folded = 0
+        counters = cls.objects.filter(
+            shard__gt=0, **filters
+        ).exclude(
+            count=0
+        ).order_by('usage_id', 'field_name', 'key_hash', 'shard')
+
+        batch = []
+        for counter in counters.iterator():
+            if batch and (
+                len(batch) == cls.FOLD_BATCH_SIZE or
+                (counter.usage_id, counter.field_name) != (batch[0].usage_id, batch[0].field_name)
+            ):
+                cls._fold(batch)
+                num_folded += len(batch)
+                batch = []
+            batch.append(counter)
+        if batch:
+            cls._fold(batch)
+            num_folded += len(batch)
+
+        cls.objects.filter(shard__gt=0, count=0, **filters).delete()
+        return num_folded
+
+    @classmethod
+    @transaction.commit_on_success
+    def _fold(cls, counters):
+        """
+        Fold `counters`, shards of counts of one field in order of their
+        key_hash, into shard 0 and into the field.
+        """
+        differences = Counter()
+        for counter in counters:
+            # Move only what was read, as other processes may be adding to the shard
+            cls.objects.filter(pk=counter.pk).update(count=F('count') - counter.count)
+            cls._add(counter.usage_id, counter.field_name, counter.key_hash, counter.key, 0, counter.count)
+            if counter.key_hash != cls.TOTAL_KEY_HASH:
+                differences[counter.key] += counter.count
+
+        if differences:
+            field = XModuleUserStateSummaryField.lock(counters[0].usage_id, counters[0].field_name)
+            counts = json.loads(field.value) or {}
+            for key, difference in differences.iteritems():
+                counts[key] = counts.get(key, 0) + difference
+            field.value = json.dumps(counts)
+            field.save()
+
+    @classmethod
+    def stop(cls, **filters):
+        """
+        Stop counting the fields matching `filters`: fold their counts into the
+        fields and delete their counters, so that they start again from the
+        fields if they are counted again. Returns the number of shards folded.
+
+        Counts mustn't be added to while this runs, so only run it once the
+        counters have been turned off.
+        """
+        num_folded = cls.fold(**filters)
+        cls.objects.filter(**filters).delete()
+        return num_folded
+
 
 class XModuleStudentPrefsField(models.Model):
     """
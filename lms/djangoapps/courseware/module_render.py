@@ -19,7 +19,7 @@ from django.views.decorators.csrf import csrf_exempt
 from capa.xqueue_interface import XQueueInterface
 from courseware.access import has_access, get_user_role
 from courseware.masquerade import setup_masquerade
-from courseware.model_data import FieldDataCache, DjangoKeyValueStore
+from courseware.model_data import FieldDataCache, DjangoKeyValueStore, SummaryCounterService
 from lms.lib.xblock.field_data import LmsFieldData
 from lms.lib.xblock.runtime import LmsModuleSystem, unquote_slashes
 from edxmako.shortcuts import render_to_string
@@ -386,6 +386,15 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
     else:
         anonymous_student_id = anonymous_id_for_user(user, '')
 
+    services = {
+        # django.utils.translation implements the gettext.Translations
+        # interface (it has ugettext, ungettext, etc), so we can use it
+        # directly as the runtime i18n service.
+        'i18n': django.utils.translation,
+    }
+    if settings.FEATURES.get('ENABLE_SUMMARY_COUNTERS'):
+        services['summary_counters'] = SummaryCounterService()
+
     system = LmsModuleSystem(
         track_function=track_function,
         render_template=render_to_string,
@@ -427,12 +436,7 @@ def get_module_for_descriptor_internal(user, descriptor, field_data_cache, cours
         mixins=descriptor.runtime.mixologist._mixins,  # pylint: disable=protected-access
         wrappers=block_wrappers,
         get_real_user=user_by_anonymous_id,
-        services={
-            # django.utils.translation implements the gettext.Translations
-            # interface (it has ugettext, ungettext, etc), so we can use it
-            # directly as the runtime i18n service.
-            'i18n': django.utils.translation,
-        },
+        services=services,
         get_user_role=lambda: get_user_role(user, course_id),
     )
 
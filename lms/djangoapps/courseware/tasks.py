@@ -0,0 +1,19 @@
+"""
+Background tasks for courseware.
+"""
+from celery import task
+
+from courseware.models import StudentModuleAnswerCount
+
+
+@task()  # pylint: disable=E1102
+def count_answers(student_module_id):
+    """
+    Recount the answers of the StudentModule `student_module_id`, which has
+    been saved or deleted.
+
+    This runs outside of the request that saved the StudentModule, so that
+    the student's submission never waits on (or fails because of) the shared
+    count rows.
+    """
+    StudentModuleAnswerCount.recount_student_module(student_module_id)
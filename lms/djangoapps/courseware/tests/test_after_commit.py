@@ -0,0 +1,43 @@
+"""
+Tests of queueing tasks once the request's transaction has committed.
+"""
+from django.test import TestCase
+from mock import Mock
+
+from courseware.after_commit import AfterCommitMiddleware, apply_async_after_commit
+
+
+class AfterCommitTest(TestCase):
+    """
+    Test holding tasks until the request's response.
+    """
+    def setUp(self):
+        self.middleware = AfterCommitMiddleware()
+        self.task = Mock()
+
+    def test_outside_of_request(self):
+        apply_async_after_commit(self.task, args=[1])
+        self.task.apply_async.assert_called_once_with(args=[1])
+
+    def test_committed(self):
+        self.middleware.process_request(None)
+        apply_async_after_commit(self.task, args=[1])
+        self.assertFalse(self.task.apply_async.called)
+        self.middleware.process_response(None, None)
+        self.task.apply_async.assert_called_once_with(args=[1])
+
+    def test_rolled_back(self):
+        self.middleware.process_request(None)
+        apply_async_after_commit(self.task, args=[1])
+        self.middleware.process_exception(None, Exception())
+        self.middleware.process_response(None, None)
+        self.assertFalse(self.task.apply_async.called)
+
+    def test_queueing_error(self):
+        self.task.apply_async.side_effect = Exception("Broker down")
+        other_task = Mock()
+        self.middleware.process_request(None)
+        apply_async_after_commit(self.task, args=[1])
+        apply_async_after_commit(other_task, args=[2])
+        self.middleware.process_response(None, None)
+        other_task.apply_async.assert_called_once_with(args=[2])
@@ -0,0 +1,140 @@
+"""
+Tests for the per-student grade cache.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase
+from mock import MagicMock, patch
+
+from courseware import grade_cache, grades
+from courseware.tests.factories import StudentModuleFactory
+
+
+@patch.dict(settings.FEATURES, {'ENABLE_GRADE_CACHE': True})
+@patch('courseware.grade_cache.course_content_version', MagicMock(return_value='v1'))
+class GradeCacheTest(TestCase):
+    """
+    Test caching and invalidation of computed grades.
+    """
+    COURSE_ID = 'edX/grades/2014'
+
+    def setUp(self):
+        cache.clear()
+        self.compute = MagicMock(return_value={'percent': 0.5})
+
+    def _get(self, user_id=1):
+        """Look up the grade for `user_id` through the cache."""
+        return grade_cache.get_or_compute(grade_cache.GRADE, user_id, self.COURSE_ID, self.compute)
+
+    def test_repeat_lookups_are_cached(self):
+        self.assertEqual(self._get(), {'percent': 0.5})
+        self.assertEqual(self._get(), {'percent': 0.5})
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_users_are_cached_separately(self):
+        self._get(user_id=1)
+        self._get(user_id=2)
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_roles_are_cached_separately(self):
+        self._get()
+        grade_cache.get_or_compute(
+            grade_cache.GRADE, 1, self.COURSE_ID, self.compute, role=grade_cache.AS_STUDENT
+        )
+        self.assertEqual(self.compute.call_count, 2)
+        grade_cache.invalidate(1, self.COURSE_ID)
+        self._get()
+        grade_cache.get_or_compute(
+            grade_cache.GRADE, 1, self.COURSE_ID, self.compute, role=grade_cache.AS_STUDENT
+        )
+        self.assertEqual(self.compute.call_count, 4)
+
+    def test_none_is_not_cached(self):
+        self.compute.return_value = None
+        self._get()
+        self._get()
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_invalidate(self):
+        self._get(user_id=1)
+        self._get(user_id=2)
+        grade_cache.invalidate(1, self.COURSE_ID)
+        self._get(user_id=1)
+        self._get(user_id=2)
+        self.assertEqual(self.compute.call_count, 3)
+
+    def test_course_content_version_change(self):
+        self._get()
+        with patch('courseware.grade_cache.course_content_version', MagicMock(return_value='v2')):
+            self._get()
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_student_module_delete_invalidates(self):
+        student_module = StudentModuleFactory.create(course_id=self.COURSE_ID)
+        grade_cache.get_or_compute(grade_cache.GRADE, student_module.student_id, self.COURSE_ID, self.compute)
+        student_module.delete()
+        grade_cache.get_or_compute(grade_cache.GRADE, student_module.student_id, self.COURSE_ID, self.compute)
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_student_module_save_invalidates(self):
+        student_module = StudentModuleFactory.create(course_id=self.COURSE_ID)
+        grade_cache.get_or_compute(grade_cache.GRADE, student_module.student_id, self.COURSE_ID, self.compute)
+        student_module.grade = 1
+        student_module.save()
+        grade_cache.get_or_compute(grade_cache.GRADE, student_module.student_id, self.COURSE_ID, self.compute)
+        self.assertEqual(self.compute.call_count, 2)
+
+    def test_student_module_save_without_new_score(self):
+        student_module = StudentModuleFactory.create(course_id=self.COURSE_ID, grade=1)
+        grade_cache.get_or_compute(grade_cache.GRADE, student_module.student_id, self.COURSE_ID, self.compute)
+        student_module.state = '{"position": 2}'
+        student_module.save()
+        grade_cache.get_or_compute(grade_cache.GRADE, student_module.student_id, self.COURSE_ID, self.compute)
+        self.assertEqual(self.compute.call_count, 1)
+
+    def test_course_is_cacheable_is_remembered(self):
+        compute = MagicMock(return_value=False)
+        self.assertFalse(grade_cache.course_is_cacheable(self.COURSE_ID, compute))
+        self.assertFalse(grade_cache.course_is_cacheable(self.COURSE_ID, compute))
+        self.assertEqual(compute.call_count, 1)
+
+    def _course(self, always_recalculate_grades):
+        """Return a mock course with one problem below it."""
+        problem = MagicMock(always_recalculate_grades=always_recalculate_grades)
+        problem.get_children.return_value = []
+        course = MagicMock(id=self.COURSE_ID, always_recalculate_grades=False)
+        course.get_children.return_value = [problem]
+        return course
+
+    @patch('courseware.grades.grade')
+    def test_cached_grade(self, mock_grade):
+        mock_grade.return_value = {'percent': 0.5}
+        course = self._course(always_recalculate_grades=False)
+        grades.cached_grade(MagicMock(id=1), None, course)
+        grades.cached_grade(MagicMock(id=1), None, course)
+        self.assertEqual(mock_grade.call_count, 1)
+
+    @patch('courseware.grades.grade')
+    def test_masquerading_staff_are_cached_apart(self, mock_grade):
+        mock_grade.return_value = {'percent': 0.5}
+        course = self._course(always_recalculate_grades=False)
+        staff = MagicMock(id=1, masquerade_as_student=False)
+        grades.cached_grade(staff, None, course)
+        staff.masquerade_as_student = True
+        grades.cached_grade(staff, None, course)
+        grades.cached_grade(staff, None, course)
+        self.assertEqual(mock_grade.call_count, 2)
+
+    @patch('courseware.grades.grade')
+    def test_always_recalculated_course_is_not_cached(self, mock_grade):
+        mock_grade.return_value = {'percent': 0.5}
+        course = self._course(always_recalculate_grades=True)
+        grades.cached_grade(MagicMock(id=1), None, course)
+        grades.cached_grade(MagicMock(id=1), None, course)
+        self.assertEqual(mock_grade.call_count, 2)
+
+    @patch.dict(settings.FEATURES, {'ENABLE_GRADE_CACHE': False})
+    def test_disabled(self):
+        self._get()
+        self._get()
+        self.assertEqual(self.compute.call_count, 2)
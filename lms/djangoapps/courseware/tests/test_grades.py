@@ -3,17 +3,21 @@ Test grade calculation.
 """
 from django.http import Http404
 from django.test.utils import override_settings
-from mock import patch
+from mock import Mock, patch
 
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 from student.tests.factories import UserFactory
+from xmodule.modulestore import Location
 from xmodule.modulestore.tests.factories import CourseFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 
-from courseware.grades import grade, iterate_grades_for
+from courseware.grades import (
+    grade, iterate_grades_for, iterate_bulk_grades_for, student_scores_for, section_scores_for, get_score
+)
+from courseware.tests.factories import StudentModuleFactory
 
 
-def _grade_with_errors(student, request, course, keep_raw_scores=False):
+def _grade_with_errors(student, request, course, keep_raw_scores=False, student_scores=None):
     """This fake grade method will throw exceptions for student3 and
     student4, but allow any other students to go through normal grading.
 
@@ -24,7 +28,7 @@ def _grade_with_errors(student, request, course, keep_raw_scores=False):
     if student.username in ['student3', 'student4']:
         raise Exception("I don't like {}".format(student.username))
 
-    return grade(student, request, course, keep_raw_scores=keep_raw_scores)
+    return grade(student, request, course, keep_raw_scores=keep_raw_scores, student_scores=student_scores)
 
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
@@ -105,6 +109,122 @@ class TestGradeIteration(ModuleStoreTestCase):
         self.assertTrue(all_gradesets[student2])
         self.assertTrue(all_gradesets[student5])
 
+    def test_bulk_empty_student_list(self):
+        """Bulk grading an empty list of students yields nothing."""
+        self.assertEqual(list(iterate_bulk_grades_for(self.course.id, [])), [])
+
+    def test_bulk_matches_single_grading(self):
+        """Bulk grading gives the same gradesets as grading one at a time,
+        regardless of how students are chunked."""
+        gradesets, _ = self._gradesets_and_errors_for(self.course.id, self.students)
+        for chunk_size in (1, 2, 10):
+            bulk_gradesets = {
+                student: gradeset
+                for student, gradeset, _ in iterate_bulk_grades_for(self.course.id, self.students, chunk_size)
+            }
+            self.assertEqual(bulk_gradesets, gradesets)
+
+    @patch('courseware.grades.grade', _grade_with_errors)
+    def test_bulk_grading_exception(self):
+        """Errors grading one student don't stop bulk grading of the others."""
+        errors = {
+            student: err_msg
+            for student, _, err_msg in iterate_bulk_grades_for(self.course.id, self.students, 2)
+            if err_msg
+        }
+        self.assertItemsEqual(errors.keys(), self.students[2:4])
+
+    def test_student_scores_for(self):
+        """Scores are loaded only for the requested students."""
+        student1, student2, student3 = self.students[:3]
+        StudentModuleFactory.create(
+            student=student1, course_id=self.course.id, module_state_key='i4x://a/b/problem/one',
+            grade=1, max_grade=2,
+        )
+        StudentModuleFactory.create(
+            student=student2, course_id=self.course.id, module_state_key='i4x://a/b/problem/one',
+            grade=2, max_grade=2,
+        )
+        scores = student_scores_for(self.course.id, [student1.id, student3.id])
+        self.assertEqual(scores, {
+            student1.id: {'i4x://a/b/problem/one': (1, 2)},
+            student3.id: {},
+        })
+
+    def test_section_scores_for(self):
+        """Section scores cover every descriptor, with or without a StudentModule."""
+        student = self.students[0]
+        StudentModuleFactory.create(
+            student=student, course_id=self.course.id, module_state_key='i4x://a/b/problem/one',
+            grade=1, max_grade=2,
+        )
+        StudentModuleFactory.create(
+            student=student, course_id='other/course/id', module_state_key='i4x://a/b/problem/two',
+            grade=2, max_grade=2,
+        )
+        descriptors = [
+            Mock(location=Location('i4x://a/b/problem/{}'.format(name))) for name in ('one', 'two', 'three')
+        ]
+        with self.assertNumQueries(1):
+            seen, scores = section_scores_for(self.course.id, student, descriptors)
+        self.assertTrue(seen)
+        self.assertEqual(scores, {
+            'i4x://a/b/problem/one': (1, 2),
+            'i4x://a/b/problem/two': (None, None),
+            'i4x://a/b/problem/three': (None, None),
+        })
+
+    def test_section_scores_for_unseen(self):
+        """A section without any StudentModules hasn't been seen."""
+        descriptors = [Mock(location=Location('i4x://a/b/problem/one'))]
+        seen, _ = section_scores_for(self.course.id, self.students[0], descriptors)
+        self.assertFalse(seen)
+
+    def test_get_score_from_student_scores(self):
+        """Prefetched scores are used without querying, and others are looked up."""
+        student = self.students[0]
+        StudentModuleFactory.create(
+            student=student, course_id=self.course.id, module_state_key='i4x://a/b/problem/two',
+            grade=2, max_grade=4,
+        )
+        student_scores = {'i4x://a/b/problem/one': (1, 2)}
+
+        def problem(name):
+            """A fake problem descriptor."""
+            return Mock(
+                location=Location('i4x://a/b/problem/{}'.format(name)),
+                always_recalculate_grades=False, has_score=True, weight=None,
+            )
+
+        with self.assertNumQueries(0):
+            score = get_score(self.course.id, student, problem('one'), None, student_scores=student_scores)
+        self.assertEqual(score, (1, 2))
+        with self.assertNumQueries(1):
+            score = get_score(self.course.id, student, problem('two'), None, student_scores=student_scores)
+        self.assertEqual(score, (2, 4))
+
+    def test_get_score_from_static_max_score(self):
+        """Unseen problems are scored from their definition without being created."""
+        student = self.students[0]
+        descriptor = Mock(
+            location=Location('i4x://a/b/problem/unseen'),
+            always_recalculate_grades=False, has_score=True, weight=None,
+        )
+        descriptor.static_max_score.return_value = 3
+        module_creator = Mock()
+
+        with patch('courseware.grades.has_access', return_value=True):
+            score = get_score(self.course.id, student, descriptor, module_creator, student_scores={})
+        self.assertEqual(score, (0, 3))
+        self.assertFalse(module_creator.called)
+
+        # without a static max score, the problem is created
+        descriptor.static_max_score.return_value = None
+        module_creator.return_value.max_score.return_value = 5
+        score = get_score(self.course.id, student, descriptor, module_creator, student_scores={})
+        self.assertEqual(score, (0, 5))
+        module_creator.assert_called_once_with(descriptor)
+
     ################################# Helpers #################################
     def _gradesets_and_errors_for(self, course_id, students):
         """Simple helper method to iterate through student grades and give us
@@ -5,9 +5,9 @@ import json
 from mock import Mock, patch
 from functools import partial
 
-from courseware.model_data import DjangoKeyValueStore
+from courseware.model_data import DjangoKeyValueStore, SummaryCounterService
 from courseware.model_data import InvalidScopeError, FieldDataCache
-from courseware.models import StudentModule, XModuleUserStateSummaryField
+from courseware.models import StudentModule, XModuleUserStateSummaryField, XModuleUserStateSummaryCounter
 from courseware.models import XModuleStudentInfoField, XModuleStudentPrefsField
 
 from student.tests.factories import UserFactory
@@ -18,6 +18,7 @@ from courseware.tests.factories import StudentPrefsFactory, StudentInfoFactory
 from xblock.fields import Scope, BlockScope, ScopeIds
 from xmodule.modulestore import Location
 from django.test import TestCase
+from django.test.utils import override_settings
 from django.db import DatabaseError
 from xblock.core import KeyValueMultiSaveError
 
@@ -152,6 +153,14 @@ class TestStudentModuleStorage(TestCase):
                 self.kvs.set_many(kv_dict)
         self.assertEquals(len(exception_context.exception.saved_field_names), 0)
 
+    def test_student_module_scores(self):
+        "Test that the scores of loaded StudentModules are returned"
+        StudentModule.objects.all().update(grade=1, max_grade=2)
+        field_data_cache = FieldDataCache(
+            [mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user
+        )
+        self.assertEquals({location('usage_id').url(): (1, 2)}, field_data_cache.student_module_scores())
+
 
 class TestMissingStudentModule(TestCase):
     def setUp(self):
@@ -188,6 +197,17 @@ class TestMissingStudentModule(TestCase):
         "Test that `has` returns False for missing StudentModules"
         self.assertFalse(self.kvs.has(user_state_key('a_field')))
 
+    def test_student_module_scores_not_loaded(self):
+        "Test that no scores are returned when StudentModules weren't loaded"
+        self.assertEquals({}, self.field_data_cache.student_module_scores())
+
+    def test_student_module_scores_for_missing_student_module(self):
+        "Test that descriptors without a StudentModule have no stored score"
+        field_data_cache = FieldDataCache(
+            [mock_descriptor([mock_field(Scope.user_state, 'a_field')])], course_id, self.user
+        )
+        self.assertEquals({location('usage_id').url(): (None, None)}, field_data_cache.student_module_scores())
+
 
 class StorageTestBase(object):
     """
@@ -309,3 +329,100 @@ class TestStudentInfoStorage(StorageTestBase, TestCase):
     scope = Scope.user_info
     key_factory = user_info_key
     storage_class = XModuleStudentInfoField
+
+
+@override_settings(SUMMARY_COUNTER_SHARDS=4)
+class TestSummaryCounterService(TestCase):
+    def setUp(self):
+        self.block = Mock(
+            scope_ids=ScopeIds(None, 'word_cloud', location('def_id'), location('usage_id')),
+            all_words={'cat': 3, 'dog': 1},
+        )
+        self.counters = SummaryCounterService()
+
+    def add_words(self, times):
+        for _ in range(times):
+            self.counters.add(self.block, 'all_words', {'cat': 1, 'mouse': 2})
+
+    def test_starts_from_field(self):
+        self.assertEquals({'cat': 3, 'dog': 1}, self.counters.counts(self.block, 'all_words'))
+        self.assertEquals(4, self.counters.total(self.block, 'all_words'))
+
+        # the field isn't copied again
+        self.block.all_words = {'cat': 10}
+        self.assertEquals({'cat': 3, 'dog': 1}, SummaryCounterService().counts(self.block, 'all_words'))
+
+    def test_add(self):
+        self.add_words(20)
+        self.assertEquals(
+            {'cat': 23, 'mouse': 40},
+            self.counters.counts(self.block, 'all_words', ['cat', 'mouse', 'horse'])
+        )
+        self.assertEquals(64, self.counters.total(self.block, 'all_words'))
+        self.assertEquals({'cat': 23, 'mouse': 40}, self.counters.top(self.block, 'all_words', 2))
+
+        # one row for the copied count and at most one for each shard
+        self.assertLessEqual(XModuleUserStateSummaryCounter.objects.filter(key='cat').count(), 5)
+
+    def test_start_with_shard_0_rows(self):
+        # fold may have created shard 0 rows of keys that were counted
+        # before counting the field started
+        XModuleUserStateSummaryCounter.objects.create(
+            usage_id=location('usage_id').url(), field_name='all_words',
+            key_hash=XModuleUserStateSummaryCounter.hash_key(u'cat'), key=u'cat', shard=0, count=2,
+        )
+        self.assertEquals({'cat': 5, 'dog': 1}, self.counters.counts(self.block, 'all_words'))
+
+    def test_fold(self):
+        self.add_words(20)
+        # each add goes to one shard of the cat, mouse and total counts
+        num_shards = XModuleUserStateSummaryCounter.objects.filter(key='mouse').count()
+        self.assertEquals(3 * num_shards, XModuleUserStateSummaryCounter.fold(usage_id=location('usage_id').url()))
+
+        self.assertEquals({'cat': 23, 'dog': 1, 'mouse': 40}, self.counters.counts(self.block, 'all_words'))
+        self.assertEquals(64, self.counters.total(self.block, 'all_words'))
+        self.assertEquals(1, XModuleUserStateSummaryCounter.objects.filter(key='mouse').count())
+
+        self.add_words(1)
+        self.assertEquals({'cat': 24, 'mouse': 42}, self.counters.counts(self.block, 'all_words', ['cat', 'mouse']))
+
+    def field_value(self):
+        return json.loads(XModuleUserStateSummaryField.objects.get(
+            usage_id=location('usage_id').url(), field_name='all_words'
+        ).value)
+
+    def test_fold_adds_to_field(self):
+        XModuleUserStateSummaryField.objects.create(
+            usage_id=location('usage_id').url(), field_name='all_words', value=json.dumps(self.block.all_words)
+        )
+        self.add_words(20)
+        XModuleUserStateSummaryCounter.fold()
+        self.assertEquals({'cat': 23, 'dog': 1, 'mouse': 40}, self.field_value())
+
+        # only what was folded since is added again
+        self.add_words(1)
+        XModuleUserStateSummaryCounter.fold()
+        self.assertEquals({'cat': 24, 'dog': 1, 'mouse': 42}, self.field_value())
+
+    @patch.object(XModuleUserStateSummaryCounter, 'FOLD_BATCH_SIZE', 2)
+    def test_fold_in_batches(self):
+        self.add_words(20)
+        XModuleUserStateSummaryCounter.fold()
+        self.assertEquals({'cat': 20, 'mouse': 40}, self.field_value())
+        self.assertEquals({'cat': 23, 'dog': 1, 'mouse': 40}, self.counters.counts(self.block, 'all_words'))
+
+    def test_stop(self):
+        self.add_words(20)
+        XModuleUserStateSummaryCounter.stop(usage_id=location('usage_id').url())
+        self.assertFalse(XModuleUserStateSummaryCounter.objects.exists())
+
+        # counting starts again from the field
+        self.block.all_words = self.field_value()
+        self.assertEquals({'cat': 20, 'mouse': 40}, SummaryCounterService().counts(self.block, 'all_words'))
+
+    def test_add_in_key_hash_order(self):
+        with patch.object(XModuleUserStateSummaryCounter, '_add') as mock_add:
+            self.counters.add(self.block, 'all_words', {word: 1 for word in ['cat', 'dog', 'mouse', 'horse']})
+        key_hashes = [call[0][2] for call in mock_add.call_args_list]
+        self.assertEquals(sorted(key_hashes), key_hashes)
+        self.assertEquals(XModuleUserStateSummaryCounter.TOTAL_KEY_HASH, key_hashes[-1])
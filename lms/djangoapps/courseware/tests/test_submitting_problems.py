@@ -17,7 +17,7 @@ from django.test.utils import override_settings
 
 # Need access to internal func to put users in the right group
 from courseware import grades
-from courseware.models import StudentModule
+from courseware.models import StudentModule, StudentModuleAnswerCount
 
 from xmodule.modulestore.django import modulestore, editable_modulestore
 
@@ -1008,3 +1008,81 @@ class TestAnswerDistributions(TestSubmittingProblems):
                     },
                 }
             )
+
+
+@patch.dict(settings.FEATURES, {'ENABLE_ANSWER_DISTRIBUTION_COUNTS': True})
+class TestAnswerDistributionCounts(TestAnswerDistributions):
+    """Check that answer distributions from the answer counts match the StudentModules."""
+
+    def test_rebuild(self):
+        # Answers the counts missed (e.g. from before they existed) are
+        # counted once they're rebuilt
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        StudentModuleAnswerCount.objects.all().delete()
+        self.assertFalse(grades.answer_distributions(self.course.id))
+
+        self.assertEqual(StudentModuleAnswerCount.rebuild(self.course.id), 2)
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {
+                ('p1', 'p1', 'i4x-MITx-100-problem-p1_2_1'): {
+                    'Correct': 1
+                },
+                ('p2', 'p2', 'i4x-MITx-100-problem-p2_2_1'): {
+                    'Incorrect': 1
+                },
+            }
+        )
+
+    def test_delete_student_module(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        StudentModule.objects.filter(course_id=self.course.id).delete()
+        self.assertFalse(grades.answer_distributions(self.course.id))
+
+    @patch.object(StudentModuleAnswerCount, 'CREATE_BATCH_SIZE', 1)
+    def test_rebuild_in_batches(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.submit_question_answer('p2', {'2_1': u'Incorrect'})
+        StudentModuleAnswerCount.objects.all().delete()
+
+        self.assertEqual(StudentModuleAnswerCount.rebuild(self.course.id), 2)
+        self.assertEqual(StudentModuleAnswerCount.objects.filter(course_id=self.course.id).count(), 2)
+
+    def test_recount_is_repeatable(self):
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        student_module = StudentModule.objects.get(course_id=self.course.id, module_type='problem')
+        StudentModuleAnswerCount.recount_student_module(student_module.id)
+        StudentModuleAnswerCount.recount_student_module(student_module.id)
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {('p1', 'p1', 'i4x-MITx-100-problem-p1_2_1'): {'Correct': 1}}
+        )
+
+    def test_concurrently_loaded_student_modules(self):
+        # Saves of two copies of a StudentModule, loaded before either was
+        # saved, leave the counts matching whichever was saved last
+        self.submit_question_answer('p1', {'2_1': u'Correct'})
+        first = StudentModule.objects.get(course_id=self.course.id, module_type='problem')
+        second = StudentModule.objects.get(id=first.id)
+        first.state = json.dumps({'student_answers': {'i4x-MITx-100-problem-p1_2_1': 'Incorrect'}})
+        first.save()
+        second.save()
+        self.assertEqual(
+            grades.answer_distributions(self.course.id),
+            {('p1', 'p1', 'i4x-MITx-100-problem-p1_2_1'): {'Correct': 1}}
+        )
+
+    @patch.dict(settings.FEATURES, {'ENABLE_ANSWER_DISTRIBUTION_COUNTS': False})
+    def test_disabled(self):
+        with patch('courseware.tasks.count_answers.apply_async') as mock_apply_async:
+            self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.assertFalse(mock_apply_async.called)
+
+    def test_counting_error_does_not_fail_submission(self):
+        with patch('courseware.tasks.count_answers.apply_async', side_effect=Exception("Broker down")):
+            resp = self.submit_question_answer('p1', {'2_1': u'Correct'})
+        self.assertEqual(resp.status_code, 200)
+        # The answer was saved, just not counted
+        self.assertEqual(StudentModule.objects.filter(course_id=self.course.id, module_type='problem').count(), 1)
+        self.assertFalse(grades.answer_distributions(self.course.id))
@@ -655,9 +655,9 @@ def _progress(request, course_id, student_id):
     # additional DB lookup (this kills the Progress page in particular).
     student = User.objects.prefetch_related("groups").get(id=student.id)
 
-    courseware_summary = grades.progress_summary(student, request, course)
+    courseware_summary = grades.cached_progress_summary(student, request, course)
 
-    grade_summary = grades.grade(student, request, course)
+    grade_summary = grades.cached_grade(student, request, course)
 
     if courseware_summary is None:
         #This means the student didn't have access to the course (which the instructor requested)
@@ -1,17 +1,24 @@
 import json
+import sys
+import traceback
 from django.test.utils import override_settings
 from django.test.client import Client, RequestFactory
 from xmodule.modulestore.tests.factories import CourseFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
 from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.utils import translation
+from django.utils.translation import get_language
 from util.testing import UrlResetMixin
 from django_comment_client.tests.unicode import UnicodeTestMixin
 from django_comment_client.forum import views
+import lms.lib.comment_client as cc
 
 from courseware.tests.modulestore_config import TEST_DATA_MIXED_MODULESTORE
 from nose.tools import assert_true  # pylint: disable=E0611
 from mock import patch, Mock, ANY, call
+from requests.cookies import RequestsCookieJar
 
 import logging
 
@@ -152,7 +159,7 @@ class PartialDictMatcher(object):
 
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
-@patch('requests.request')
+@patch('requests.Session.request')
 class SingleThreadTestCase(ModuleStoreTestCase):
     def setUp(self):
         self.course = CourseFactory.create()
@@ -182,7 +189,8 @@ class SingleThreadTestCase(ModuleStoreTestCase):
             response_data["content"],
             make_mock_thread_data(text, thread_id, True)
         )
-        mock_request.assert_called_with(
+        # the user is retrieved concurrently, so the thread may not be the last call
+        mock_request.assert_any_call(
             "get",
             StringEndsWithMatcher(thread_id), # url
             data=None,
@@ -216,7 +224,8 @@ class SingleThreadTestCase(ModuleStoreTestCase):
             response_data["content"],
             make_mock_thread_data(text, thread_id, True)
         )
-        mock_request.assert_called_with(
+        # the user is retrieved concurrently, so the thread may not be the last call
+        mock_request.assert_any_call(
             "get",
             StringEndsWithMatcher(thread_id), # url
             data=None,
@@ -243,7 +252,7 @@ class SingleThreadTestCase(ModuleStoreTestCase):
 
 
 @override_settings(MODULESTORE=TEST_DATA_MIXED_MODULESTORE)
-@patch('requests.request')
+@patch('requests.Session.request')
 class CommentsServiceRequestHeadersTestCase(UrlResetMixin, ModuleStoreTestCase):
     @patch.dict("django.conf.settings.FEATURES", {"ENABLE_DISCUSSION_SERVICE": True})
     def setUp(self):
@@ -310,7 +319,7 @@ class InlineDiscussionUnicodeTestCase(ModuleStoreTestCase, UnicodeTestMixin):
         self.student = UserFactory.create()
         CourseEnrollmentFactory(user=self.student, course_id=self.course.id)
 
-    @patch('lms.lib.comment_client.utils.requests.request')
+    @patch('lms.lib.comment_client.utils.requests.Session.request')
     def _test_unicode_data(self, text, mock_request):
         mock_request.side_effect = make_mock_request_impl(text)
         request = RequestFactory().get("dummy_url")
@@ -330,7 +339,7 @@ class ForumFormDiscussionUnicodeTestCase(ModuleStoreTestCase, UnicodeTestMixin):
         self.student = UserFactory.create()
         CourseEnrollmentFactory(user=self.student, course_id=self.course.id)
 
-    @patch('lms.lib.comment_client.utils.requests.request')
+    @patch('lms.lib.comment_client.utils.requests.Session.request')
     def _test_unicode_data(self, text, mock_request):
         mock_request.side_effect = make_mock_request_impl(text)
         request = RequestFactory().get("dummy_url")
@@ -351,7 +360,7 @@ class SingleThreadUnicodeTestCase(ModuleStoreTestCase, UnicodeTestMixin):
         self.student = UserFactory.create()
         CourseEnrollmentFactory(user=self.student, course_id=self.course.id)
 
-    @patch('lms.lib.comment_client.utils.requests.request')
+    @patch('lms.lib.comment_client.utils.requests.Session.request')
     def _test_unicode_data(self, text, mock_request):
         thread_id = "test_thread_id"
         mock_request.side_effect = make_mock_request_impl(text, thread_id)
@@ -373,7 +382,7 @@ class UserProfileUnicodeTestCase(ModuleStoreTestCase, UnicodeTestMixin):
         self.student = UserFactory.create()
         CourseEnrollmentFactory(user=self.student, course_id=self.course.id)
 
-    @patch('lms.lib.comment_client.utils.requests.request')
+    @patch('lms.lib.comment_client.utils.requests.Session.request')
     def _test_unicode_data(self, text, mock_request):
         mock_request.side_effect = make_mock_request_impl(text)
         request = RequestFactory().get("dummy_url")
@@ -394,7 +403,7 @@ class FollowedThreadsUnicodeTestCase(ModuleStoreTestCase, UnicodeTestMixin):
         self.student = UserFactory.create()
         CourseEnrollmentFactory(user=self.student, course_id=self.course.id)
 
-    @patch('lms.lib.comment_client.utils.requests.request')
+    @patch('lms.lib.comment_client.utils.requests.Session.request')
     def _test_unicode_data(self, text, mock_request):
         mock_request.side_effect = make_mock_request_impl(text)
         request = RequestFactory().get("dummy_url")
@@ -406,3 +415,61 @@ class FollowedThreadsUnicodeTestCase(ModuleStoreTestCase, UnicodeTestMixin):
         response_data = json.loads(response.content)
         self.assertEqual(response_data["discussion_data"][0]["title"], text)
         self.assertEqual(response_data["discussion_data"][0]["body"], text)
+
+
+class PerformConcurrentlyTestCase(TestCase):
+    """
+    Tests of making comments service calls concurrently
+    """
+    def test_results_in_order(self):
+        self.assertEqual(
+            cc.perform_concurrently(lambda: 1, lambda: 2, lambda: 3),
+            [1, 2, 3]
+        )
+
+    def test_language(self):
+        translation.activate('eo')
+        try:
+            self.assertEqual(cc.perform_concurrently(get_language, get_language), ['eo', 'eo'])
+        finally:
+            translation.deactivate()
+
+    def test_exception(self):
+        def fail():
+            raise cc.CommentClientRequestError("failed")
+
+        calls = []
+        with self.assertRaises(cc.CommentClientRequestError):
+            cc.perform_concurrently(fail, lambda: calls.append(1))
+        # the other calls are still made
+        self.assertEqual(calls, [1])
+
+    def test_exception_traceback(self):
+        def fail():
+            raise cc.CommentClientRequestError("failed")
+
+        try:
+            cc.perform_concurrently(fail, lambda: 1)
+        except cc.CommentClientRequestError:
+            # the traceback reaches into the failed call
+            frames = traceback.extract_tb(sys.exc_info()[2])
+            self.assertEqual(frames[-1][2], 'fail')
+        else:
+            self.fail("perform_concurrently didn't raise")
+
+    @override_settings(COMMENTS_SERVICE_CONCURRENT_REQUESTS=1)
+    def test_not_concurrent(self):
+        self.assertEqual(cc.perform_concurrently(lambda: 1, lambda: 2), [1, 2])
+
+
+class CommentsServiceSessionTestCase(TestCase):
+    """
+    Tests of the session shared by the requests to the comments service
+    """
+    def test_no_cookies(self):
+        session = cc.utils.get_session()
+        session.cookies.set('sessionid', 'one_users_session')
+        response_cookies = RequestsCookieJar()
+        response_cookies.set('other', 'value')
+        session.cookies.update(response_cookies)
+        self.assertEqual(len(session.cookies), 0)
@@ -2,9 +2,14 @@
 Module for checking permissions with the comment_client backend
 """
 
+import itertools
 import logging
 from django.core import cache
 
+from django_comment_common.models import FORUM_ROLE_STUDENT
+from xmodule.course_module import CourseDescriptor
+from xmodule.modulestore.django import modulestore
+
 
 CACHE = cache.get_cache('default')
 CACHE_LIFESPAN = 60
@@ -12,16 +17,11 @@ CACHE_LIFESPAN = 60
 
 def cached_has_permission(user, permission, course_id=None):
     """
-    Call has_permission if it's not cached. A change in a user's role or
-    a role's permissions will only become effective after CACHE_LIFESPAN seconds.
+    Check the permission against the user's cached permissions for the course
+    (see get_forum_permissions). A change in a user's role or a role's
+    permissions will only become effective after CACHE_LIFESPAN seconds.
     """
-    key = u"permission_{user_id:d}_{course_id}_{permission}".format(
-        user_id=user.id, course_id=course_id, permission=permission)
-    val = CACHE.get(key, None)
-    if val not in [True, False]:
-        val = has_permission(user, permission, course_id=course_id)
-        CACHE.set(key, val, CACHE_LIFESPAN)
-    return val
+    return get_forum_permissions(user, course_id).has_permission(permission)
 
 
 def has_permission(user, permission, course_id=None):
@@ -31,6 +31,97 @@ def has_permission(user, permission, course_id=None):
     return False
 
 
+def get_forum_permissions(user, course_id=None):
+    """
+    Return the ForumPermissions of the user in the course. They're loaded once
+    per user object (typically once per request), and cached for
+    CACHE_LIFESPAN seconds.
+    """
+    # pylint: disable=protected-access
+    if not hasattr(user, '_forum_permissions'):
+        user._forum_permissions = {}
+    if course_id not in user._forum_permissions:
+        key = u"forum_permissions_{user_id:d}_{course_id}".format(user_id=user.id, course_id=course_id)
+        names = CACHE.get(key, None)
+        if names is None:
+            names = load_permission_names(user, course_id)
+            CACHE.set(key, names, CACHE_LIFESPAN)
+        user._forum_permissions[course_id] = ForumPermissions(user, names)
+    return user._forum_permissions[course_id]
+
+
+def load_permission_names(user, course_id=None):
+    """
+    Return the names of all the permissions the user has in the course, as
+    has_permission would grant them.
+    """
+    names = set()
+    posts_allowed = None
+    for role in user.roles.filter(course_id=course_id).prefetch_related('permissions'):
+        role_names = [permission.name for permission in role.permissions.all()]
+        if role.name == FORUM_ROLE_STUDENT:
+            if posts_allowed is None:
+                course = modulestore().get_instance(course_id, CourseDescriptor.id_to_location(course_id))
+                posts_allowed = course.forum_posts_allowed
+            if not posts_allowed:
+                role_names = [
+                    name for name in role_names
+                    if not (name.startswith('edit') or name.startswith('update') or name.startswith('create'))
+                ]
+        names.update(role_names)
+    return frozenset(names)
+
+
+class ForumPermissions(object):
+    """
+    The forum permissions of a user in a course.
+
+    Each view's entry in VIEW_PERMISSIONS is compiled against the permissions
+    into the alternative sets of conditions which grant it, so checking a view
+    for many pieces of content only checks their conditions.
+    """
+    def __init__(self, user, names):
+        self.user = user
+        self.names = names
+        self._compiled = {}
+
+    def has_permission(self, permission):
+        """
+        Return whether the user has the named permission.
+        """
+        return permission in self.names
+
+    def _compile(self, per, operator="or"):
+        """
+        Return the alternative tuples of conditions under which `per` (as
+        accepted by check_conditions_permissions) holds.
+        """
+        if isinstance(per, basestring):
+            if per in CONDITIONS:
+                return [(per,)]
+            return [()] if self.has_permission(per) else []
+        elif isinstance(per, list) and operator == "or":
+            return [alternative for x in per for alternative in self._compile(x, operator="and")]
+        elif isinstance(per, list) and operator == "and":
+            return [
+                sum(alternatives, ())
+                for alternatives in itertools.product(*[self._compile(x, operator="and") for x in per])
+            ]
+        return []
+
+    def check_view(self, name, content):
+        """
+        Return whether the user may use the named view (see VIEW_PERMISSIONS) on content.
+        """
+        if name not in self._compiled:
+            self._compiled[name] = self._compile(VIEW_PERMISSIONS[name])
+        data = {'content': content}
+        return any(
+            all(check_condition(self.user, condition, None, data) for condition in alternative)
+            for alternative in self._compiled[name]
+        )
+
+
 CONDITIONS = ['is_open', 'is_author']
 
 
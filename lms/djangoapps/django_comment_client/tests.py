@@ -5,7 +5,7 @@ from django.contrib.auth.models import User
 from django.test import TestCase
 
 from student.models import CourseEnrollment
-from django_comment_client.permissions import has_permission
+from django_comment_client.permissions import has_permission, get_forum_permissions, load_permission_names
 from django_comment_common.models import Role
 
 
@@ -48,3 +48,34 @@ class PermissionsTestCase(TestCase):
 
         self.student_role.add_permission(name)
         self.assertTrue(has_permission(self.student, name, self.course_id))
+
+    def testForumPermissions(self):
+        self.moderator_role.add_permission('openclose_thread')
+        self.moderator_role.add_permission('vote')
+        self.student_role.add_permission('vote')
+        self.assertEqual(
+            load_permission_names(self.moderator, self.course_id),
+            frozenset(['openclose_thread', 'vote'])
+        )
+
+        permissions = get_forum_permissions(self.moderator, self.course_id)
+        self.assertIs(get_forum_permissions(self.moderator, self.course_id), permissions)
+        self.assertTrue(permissions.has_permission('vote'))
+        self.assertFalse(permissions.has_permission('delete_thread'))
+
+        open_content = {'closed': False, 'user_id': str(self.student.id)}
+        closed_content = {'closed': True, 'user_id': str(self.student.id)}
+        self.assertTrue(permissions.check_view('openclose_thread', closed_content))
+        self.assertTrue(permissions.check_view('vote_for_thread', open_content))
+        self.assertFalse(permissions.check_view('vote_for_thread', closed_content))
+        self.assertFalse(permissions.check_view('update_thread', open_content))
+
+        student_permissions = get_forum_permissions(self.student, self.course_id)
+        self.assertFalse(student_permissions.check_view('openclose_thread', open_content))
+        self.student_role.add_permission('update_thread')
+        # the permissions are loaded once per user object
+        self.assertFalse(get_forum_permissions(self.student, self.course_id).has_permission('update_thread'))
+        self.assertEqual(
+            'update_thread' in load_permission_names(self.student, self.course_id),
+            has_permission(self.student, 'update_thread', self.course_id)
+        )
@@ -9,7 +9,7 @@ from django.db import connection
 from django.http import HttpResponse
 from django.utils import simplejson
 from django_comment_common.models import Role, FORUM_ROLE_STUDENT
-from django_comment_client.permissions import check_permissions_by_view
+from django_comment_client.permissions import get_forum_permissions
 
 from edxmako import lookup_template
 import pystache_custom as pystache
@@ -250,20 +250,28 @@ class QueryCountDebugMiddleware(object):
         return response
 
 
-def get_ability(course_id, content, user):
+def get_ability(course_id, content, user, permissions=None):
+    """
+    Get what the user may do with the content (thread or comment). Pass the
+    user's ForumPermissions for the course as `permissions` when checking
+    many contents.
+    """
+    if permissions is None:
+        permissions = get_forum_permissions(user, course_id)
+    is_thread = content['type'] == 'thread'
     return {
-        'editable': check_permissions_by_view(user, course_id, content, "update_thread" if content['type'] == 'thread' else "update_comment"),
-        'can_reply': check_permissions_by_view(user, course_id, content, "create_comment" if content['type'] == 'thread' else "create_sub_comment"),
-        'can_endorse': check_permissions_by_view(user, course_id, content, "endorse_comment") if content['type'] == 'comment' else False,
-        'can_delete': check_permissions_by_view(user, course_id, content, "delete_thread" if content['type'] == 'thread' else "delete_comment"),
-        'can_openclose': check_permissions_by_view(user, course_id, content, "openclose_thread") if content['type'] == 'thread' else False,
-        'can_vote': check_permissions_by_view(user, course_id, content, "vote_for_thread" if content['type'] == 'thread' else "vote_for_comment"),
+        'editable': permissions.check_view("update_thread" if is_thread else "update_comment", content),
+        'can_reply': permissions.check_view("create_comment" if is_thread else "create_sub_comment", content),
+        'can_endorse': permissions.check_view("endorse_comment", content) if content['type'] == 'comment' else False,
+        'can_delete': permissions.check_view("delete_thread" if is_thread else "delete_comment", content),
+        'can_openclose': permissions.check_view("openclose_thread", content) if is_thread else False,
+        'can_vote': permissions.check_view("vote_for_thread" if is_thread else "vote_for_comment", content),
     }
 
 # TODO: RENAME
 
 
-def get_annotated_content_info(course_id, content, user, user_info):
+def get_annotated_content_info(course_id, content, user, user_info, permissions=None):
     """
     Get metadata for an individual content (thread or comment)
     """
@@ -275,20 +283,22 @@ def get_annotated_content_info(course_id, content, user, user_info):
     return {
         'voted': voted,
         'subscribed': content['id'] in user_info['subscribed_thread_ids'],
-        'ability': get_ability(course_id, content, user),
+        'ability': get_ability(course_id, content, user, permissions),
     }
 
 # TODO: RENAME
 
 
-def get_annotated_content_infos(course_id, thread, user, user_info):
+def get_annotated_content_infos(course_id, thread, user, user_info, permissions=None):
     """
     Get metadata for a thread and its children
     """
     infos = {}
+    if permissions is None:
+        permissions = get_forum_permissions(user, course_id)
 
     def annotate(content):
-        infos[str(content['id'])] = get_annotated_content_info(course_id, content, user, user_info)
+        infos[str(content['id'])] = get_annotated_content_info(course_id, content, user, user_info, permissions)
         for child in content.get('children', []):
             annotate(child)
     annotate(thread)
@@ -296,8 +306,10 @@ def get_annotated_content_infos(course_id, thread, user, user_info):
 
 
 def get_metadata_for_threads(course_id, threads, user, user_info):
+    permissions = get_forum_permissions(user, course_id)
+
     def infogetter(thread):
-        return get_annotated_content_infos(course_id, thread, user, user_info)
+        return get_annotated_content_infos(course_id, thread, user, user_info, permissions)
 
     metadata = reduce(merge_dict, map(infogetter, threads), {})
     return metadata
@@ -56,6 +56,12 @@ class InstructorTask(models.Model):
     `requester` stores id of user who submitted the task
     `created` stores date that entry was first created
     `updated` stores date that entry was last modified
+    `subtasks` stores the number of subtasks as a JSON-serialized dict, if the task has subtasks.
+        The status of each is an InstructorSubtask.
+    `num_subtasks_succeeded` and `num_subtasks_failed` count the subtasks that have completed,
+        and `num_attempted`, `num_succeeded`, `num_failed` and `num_skipped` accumulate their
+        counts.  They are only updated atomically, so that completing subtasks don't need to
+        lock and rewrite the task's other fields.
     """
     task_type = models.CharField(max_length=50, db_index=True)
     course_id = models.CharField(max_length=255, db_index=True)
@@ -68,6 +74,12 @@ class InstructorTask(models.Model):
     created = models.DateTimeField(auto_now_add=True, null=True)
     updated = models.DateTimeField(auto_now=True)
     subtasks = models.TextField(blank=True)  # JSON dictionary
+    num_subtasks_succeeded = models.IntegerField(default=0)
+    num_subtasks_failed = models.IntegerField(default=0)
+    num_attempted = models.IntegerField(default=0)
+    num_succeeded = models.IntegerField(default=0)
+    num_failed = models.IntegerField(default=0)
+    num_skipped = models.IntegerField(default=0)
 
     def __repr__(self):
         return 'InstructorTask<%r>' % ({
@@ -189,6 +201,59 @@ class InstructorTask(models.Model):
         return json.dumps({'message': 'Task revoked before running'})
 
 
+class InstructorSubtask(models.Model):
+    """
+    Stores the status of one subtask of an InstructorTask.
+
+    `instructor_task` is the InstructorTask the subtask is part of.
+    `task_id` stores the id used by celery for the subtask.
+    `task_state` stores the last known state of the subtask.
+    `status` stores the subtask's status as a JSON-serialized dict, as returned by
+        `instructor_task.subtasks.SubtaskStatus.to_dict()`.
+    `updated` stores date that entry was last modified
+    """
+    instructor_task = models.ForeignKey(InstructorTask, db_index=True)
+    task_id = models.CharField(max_length=255, unique=True)
+    task_state = models.CharField(max_length=50, null=True, db_index=True)
+    status = models.TextField()
+    updated = models.DateTimeField(auto_now=True)
+
+    # How many rows to insert per query when creating the subtasks of a task.
+    # SQLite allows at most 999 variables (and 500 compound selects) per
+    # query, and each row takes one variable per column.
+    CREATE_BATCH_SIZE = 100
+
+    def __repr__(self):
+        return 'InstructorSubtask<%r>' % ({
+            'instructor_task_id': self.instructor_task_id,
+            'task_id': self.task_id,
+            'task_state': self.task_state,
+            'status': self.status,
+        },)
+
+    def __unicode__(self):
+        return unicode(repr(self))
+
+    @classmethod
+    @transaction.autocommit
+    def create_for_task(cls, instructor_task, statuses):
+        """
+        Create and commit the InstructorSubtasks of `instructor_task`, from a list
+        of their initial statuses (as dicts with at least 'task_id' and 'state').
+        """
+        subtasks = [
+            cls(
+                instructor_task=instructor_task,
+                task_id=status['task_id'],
+                task_state=status['state'],
+                status=json.dumps(status),
+            )
+            for status in statuses
+        ]
+        for start in xrange(0, len(subtasks), cls.CREATE_BATCH_SIZE):
+            cls.objects.bulk_create(subtasks[start:start + cls.CREATE_BATCH_SIZE])
+
+
 class GradesStore(object):
     """
     Simple abstraction layer that can fetch and store CSV files for grades
@@ -310,6 +375,20 @@ class S3GradesStore(GradesStore):
 
         self.store(course_id, filename, output_buffer)
 
+    def rows_for(self, course_id, filename):
+        """
+        Yield the rows of a csv file that was stored with `store_rows()`, as
+        lists of strings.
+        """
+        data = self.key_for(course_id, filename).get_contents_as_string()
+        gzip_file = GzipFile(fileobj=StringIO(data), mode="rb")
+        for row in csv.reader(gzip_file):
+            yield row
+
+    def delete(self, course_id, filename):
+        """Delete the file `filename` stored for `course_id`."""
+        self.key_for(course_id, filename).delete()
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -386,6 +465,19 @@ class LocalFSGradesStore(GradesStore):
         csv.writer(output_buffer).writerows(rows)
         self.store(course_id, filename, output_buffer)
 
+    def rows_for(self, course_id, filename):
+        """
+        Yield the rows of a csv file that was stored with `store_rows()`, as
+        lists of strings.
+        """
+        with open(self.path_to(course_id, filename), "rb") as f:
+            for row in csv.reader(f):
+                yield row
+
+    def delete(self, course_id, filename):
+        """Delete the file `filename` stored for `course_id`."""
+        os.remove(self.path_to(course_id, filename))
+
     def links_for(self, course_id):
         """
         For a given `course_id`, return a list of `(filename, url)` tuples. `url`
@@ -11,9 +11,11 @@ from celery.states import SUCCESS, READY_STATES, RETRY
 from dogapi import dog_stats_api
 
 from django.db import transaction, DatabaseError
+from django.db.models import F
 from django.core.cache import cache
+from django.utils import timezone
 
-from instructor_task.models import InstructorTask, PROGRESS, QUEUING
+from instructor_task.models import InstructorTask, InstructorSubtask, PROGRESS, QUEUING
 
 TASK_LOG = get_task_logger(__name__)
 
@@ -206,15 +208,13 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
     done overall.  The `action_name` is also stored, to help with constructing more readable
     task_progress messages.
 
-    The InstructorTask's "subtasks" field is also initialized.  This is also a JSON-serialized dict.
-    Keys include 'total', 'succeeded', 'retried', 'failed', which are counters for the number of
-    subtasks.  'Total' is set here to the total number, while the other three are initialized to zero.
-    Once the counters for 'succeeded' and 'failed' match the 'total', the subtasks are done and
-    the InstructorTask's "status" will be changed to SUCCESS.
+    The InstructorTask's "subtasks" field is also initialized.  This is also a JSON-serialized dict,
+    whose 'total' key is the number of subtasks.  The InstructorTask's counters of subtasks that
+    have succeeded and failed start at zero.  Once they add up to the 'total', the subtasks are
+    done and the InstructorTask's "status" will be changed to SUCCESS.
 
-    The "subtasks" field also contains a 'status' key, that contains a dict that stores status
-    information for each subtask.  The value for each subtask (keyed by its task_id)
-    is its subtask status, as defined by SubtaskStatus.to_dict().
+    An InstructorSubtask is created for each subtask, to store its status, as defined by
+    SubtaskStatus.to_dict().
 
     This information needs to be set up in the InstructorTask before any of the subtasks start
     running.  If not, there is a chance that the subtasks could complete before the parent task
@@ -240,22 +240,27 @@ def initialize_subtask_info(entry, action_name, total_num, subtask_id_list):
 
     # Write out the subtasks information.
     num_subtasks = len(subtask_id_list)
-    # Note that may not be necessary to store initial value with all those zeroes!
-    # Write out as a dict, so it will go more smoothly into json.
-    subtask_status = {subtask_id: (SubtaskStatus.create(subtask_id)).to_dict() for subtask_id in subtask_id_list}
-    subtask_dict = {
-        'total': num_subtasks,
-        'succeeded': 0,
-        'failed': 0,
-        'status': subtask_status
-    }
-    entry.subtasks = json.dumps(subtask_dict)
+    entry.subtasks = json.dumps({'total': num_subtasks})
 
-    # and save the entry immediately, before any subtasks actually start work:
+    # and save the entry and its subtasks immediately, before any subtasks actually start work:
     entry.save_now()
+    InstructorSubtask.create_for_task(
+        entry, [SubtaskStatus.create(subtask_id).to_dict() for subtask_id in subtask_id_list]
+    )
     return task_progress
 
 
+def get_subtask_statuses(entry_id):
+    """
+    Return a dict mapping the task_id of each subtask of the InstructorTask
+    `entry_id` to its SubtaskStatus.
+    """
+    return {
+        subtask.task_id: SubtaskStatus.from_dict(json.loads(subtask.status))
+        for subtask in InstructorSubtask.objects.filter(instructor_task=entry_id)
+    }
+
+
 def queue_subtasks_for_query(entry, action_name, create_subtask_fcn, item_queryset, item_fields, items_per_query, items_per_task):
     """
     Generates and queues subtasks to each execute a chunk of "items" generated by a queryset.
@@ -379,9 +384,9 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
         raise DuplicateTaskException(msg)
 
     # Confirm that the InstructorTask knows about this particular subtask.
-    subtask_dict = json.loads(entry.subtasks)
-    subtask_status_info = subtask_dict['status']
-    if current_task_id not in subtask_status_info:
+    try:
+        subtask = InstructorSubtask.objects.get(instructor_task=entry, task_id=current_task_id)
+    except InstructorSubtask.DoesNotExist:
         format_str = "Unexpected task_id '{}': unable to find status for subtask of instructor task '{}': rejecting task {}"
         msg = format_str.format(current_task_id, entry, new_subtask_status)
         TASK_LOG.warning(msg)
@@ -390,7 +395,7 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
 
     # Confirm that the InstructorTask doesn't think that this subtask has already been
     # performed successfully.
-    subtask_status = SubtaskStatus.from_dict(subtask_status_info[current_task_id])
+    subtask_status = SubtaskStatus.from_dict(json.loads(subtask.status))
     subtask_state = subtask_status.state
     if subtask_state in READY_STATES:
         format_str = "Unexpected task_id '{}': already completed - status {} for subtask of instructor task '{}': rejecting task {}"
@@ -426,10 +431,10 @@ def check_subtask_is_valid(entry_id, current_task_id, new_subtask_status):
 
 def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_count=0):
     """
-    Update the status of the subtask in the parent InstructorTask object tracking its progress.
+    Update the status of the subtask, and of the parent InstructorTask object tracking its progress.
 
-    Because select_for_update is used to lock the InstructorTask object while it is being updated,
-    multiple subtasks updating at the same time may time out while waiting for the lock.
+    Because the InstructorTask object is locked while a completed subtask updates it,
+    multiple subtasks completing at the same time may time out while waiting for the lock.
     The actual update operation is surrounded by a try/except/else that permits the update to be
     retried if the transaction times out.
 
@@ -461,89 +466,51 @@ def update_subtask_status(entry_id, current_task_id, new_subtask_status, retry_c
 @transaction.commit_manually
 def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     """
-    Update the status of the subtask in the parent InstructorTask object tracking its progress.
+    Update the status of the subtask, and of the parent InstructorTask object tracking its progress.
 
-    Uses select_for_update to lock the InstructorTask object while it is being updated.
     The operation is surrounded by a try/except/else that permit the manual transaction to be
     committed on completion, or rolled back on error.
 
-    The InstructorTask's "task_output" field is updated.  This is a JSON-serialized dict.
-    Accumulates values for 'attempted', 'succeeded', 'failed', 'skipped' from `new_subtask_status`
-    into the corresponding values in the InstructorTask's task_output.  Also updates the 'duration_ms'
-    value with the current interval since the original InstructorTask started.  Note that this
-    value is only approximate, since the subtask may be running on a different server than the
-    original task, so is subject to clock skew.
-
-    The InstructorTask's "subtasks" field is also updated.  This is also a JSON-serialized dict.
-    Keys include 'total', 'succeeded', 'retried', 'failed', which are counters for the number of
-    subtasks.  'Total' is expected to have been set at the time the subtasks were created.
-    The other three counters are incremented depending on the value of `status`.  Once the counters
-    for 'succeeded' and 'failed' match the 'total', the subtasks are done and the InstructorTask's
-    "status" is changed to SUCCESS.
-
-    The "subtasks" field also contains a 'status' key, that contains a dict that stores status
-    information for each subtask.  At the moment, the value for each subtask (keyed by its task_id)
-    is the value of the SubtaskStatus.to_dict(), but could be expanded in future to store information
-    about failure messages, progress made, etc.
+    The subtask's InstructorSubtask is updated with the value of `new_subtask_status.to_dict()`.
+    Once a subtask is done, its status isn't changed again, so that its counts are only
+    added to the parent's once.
+
+    When the subtask is done, the parent InstructorTask's counters are incremented atomically:
+    its counts of 'attempted', 'succeeded', 'failed', 'skipped' accumulate the values from
+    `new_subtask_status`, and its count of subtasks that succeeded or failed goes up by one.
+    Once those counts add up to the number of subtasks, the subtasks are done and the
+    InstructorTask's "status" is changed to SUCCESS.
+
+    The InstructorTask's "task_output" field is then rewritten from the counters.  This is a
+    JSON-serialized dict.  Also updates the 'duration_ms' value with the current interval since
+    the original InstructorTask started.  Note that this value is only approximate, since the
+    subtask may be running on a different server than the original task, so is subject to clock skew.
+
+    Updates to subtasks that aren't done don't touch the InstructorTask.
     """
     TASK_LOG.info("Preparing to update status for subtask %s for instructor task %d with status %s",
                   current_task_id, entry_id, new_subtask_status)
 
     try:
-        entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
-        subtask_dict = json.loads(entry.subtasks)
-        subtask_status_info = subtask_dict['status']
-        if current_task_id not in subtask_status_info:
-            # unexpected error -- raise an exception
-            format_str = "Unexpected task_id '{}': unable to update status for subtask of instructor task '{}'"
-            msg = format_str.format(current_task_id, entry_id)
-            TASK_LOG.warning(msg)
-            raise ValueError(msg)
-
-        # Update status:
-        subtask_status_info[current_task_id] = new_subtask_status.to_dict()
-
-        # Update the parent task progress.
-        # Set the estimate of duration, but only if it
-        # increases.  Clock skew between time() returned by different machines
-        # may result in non-monotonic values for duration.
-        task_progress = json.loads(entry.task_output)
-        start_time = task_progress['start_time']
-        prev_duration = task_progress['duration_ms']
-        new_duration = int((time() - start_time) * 1000)
-        task_progress['duration_ms'] = max(prev_duration, new_duration)
-
-        # Update counts only when subtask is done.
-        # In future, we can make this more responsive by updating status
-        # between retries, by comparing counts that change from previous
-        # retry.
         new_state = new_subtask_status.state
-        if new_subtask_status is not None and new_state in READY_STATES:
-            for statname in ['attempted', 'succeeded', 'failed', 'skipped']:
-                task_progress[statname] += getattr(new_subtask_status, statname)
-
-        # Figure out if we're actually done (i.e. this is the last task to complete).
-        # This is easier if we just maintain a counter, rather than scanning the
-        # entire new_subtask_status dict.
-        if new_state == SUCCESS:
-            subtask_dict['succeeded'] += 1
+        num_updated = InstructorSubtask.objects.filter(
+            instructor_task=entry_id, task_id=current_task_id
+        ).exclude(
+            task_state__in=READY_STATES
+        ).update(
+            task_state=new_state, status=json.dumps(new_subtask_status.to_dict()), updated=timezone.now()
+        )
+        if num_updated == 0:
+            if not InstructorSubtask.objects.filter(instructor_task=entry_id, task_id=current_task_id).exists():
+                # unexpected error -- raise an exception
+                format_str = "Unexpected task_id '{}': unable to update status for subtask of instructor task '{}'"
+                msg = format_str.format(current_task_id, entry_id)
+                TASK_LOG.warning(msg)
+                raise ValueError(msg)
+            TASK_LOG.warning("Not updating status for subtask %s of instructor task %d with status %s: it is already done",
+                             current_task_id, entry_id, new_subtask_status)
         elif new_state in READY_STATES:
-            subtask_dict['failed'] += 1
-        num_remaining = subtask_dict['total'] - subtask_dict['succeeded'] - subtask_dict['failed']
-
-        # If we're done with the last task, update the parent status to indicate that.
-        # At present, we mark the task as having succeeded.  In future, we should see
-        # if there was a catastrophic failure that occurred, and figure out how to
-        # report that here.
-        if num_remaining <= 0:
-            entry.task_state = SUCCESS
-        entry.subtasks = json.dumps(subtask_dict)
-        entry.task_output = InstructorTask.create_output_for_success(task_progress)
-
-        TASK_LOG.debug("about to save....")
-        entry.save()
-        TASK_LOG.info("Task output updated to %s for subtask %s of instructor task %d",
-                      entry.task_output, current_task_id, entry_id)
+            _update_parent_progress(entry_id, new_subtask_status)
     except Exception:
         TASK_LOG.exception("Unexpected error while updating InstructorTask.")
         transaction.rollback()
@@ -552,3 +519,57 @@ def _update_subtask_status(entry_id, current_task_id, new_subtask_status):
     else:
         TASK_LOG.debug("about to commit....")
         transaction.commit()
+
+
+def _update_parent_progress(entry_id, new_subtask_status):
+    """
+    Add the counts of the completed `new_subtask_status` to the InstructorTask `entry_id`,
+    and rewrite its task_output (and if it's done, task_state) from its counters.
+
+    Must be called within a transaction.
+    """
+    # Update counts only when subtask is done.
+    # In future, we can make this more responsive by updating status
+    # between retries, by comparing counts that change from previous
+    # retry.
+    increments = {
+        'num_' + statname: F('num_' + statname) + getattr(new_subtask_status, statname)
+        for statname in ['attempted', 'succeeded', 'failed', 'skipped']
+    }
+    # Figure out if we're actually done (i.e. this is the last task to complete)
+    # by maintaining counters, rather than scanning every subtask's status.
+    if new_subtask_status.state == SUCCESS:
+        increments['num_subtasks_succeeded'] = F('num_subtasks_succeeded') + 1
+    else:
+        increments['num_subtasks_failed'] = F('num_subtasks_failed') + 1
+    InstructorTask.objects.filter(pk=entry_id).update(**increments)
+
+    # The update holds the row's lock until the transaction ends, so reading
+    # it for update doesn't wait on other subtasks, and sees their latest counts.
+    entry = InstructorTask.objects.select_for_update().get(pk=entry_id)
+
+    # Set the estimate of duration, but only if it
+    # increases.  Clock skew between time() returned by different machines
+    # may result in non-monotonic values for duration.
+    task_progress = json.loads(entry.task_output)
+    start_time = task_progress['start_time']
+    prev_duration = task_progress['duration_ms']
+    new_duration = int((time() - start_time) * 1000)
+    task_progress['duration_ms'] = max(prev_duration, new_duration)
+    for statname in ['attempted', 'succeeded', 'failed', 'skipped']:
+        task_progress[statname] = getattr(entry, 'num_' + statname)
+
+    # If we're done with the last task, update the parent status to indicate that.
+    # At present, we mark the task as having succeeded.  In future, we should see
+    # if there was a catastrophic failure that occurred, and figure out how to
+    # report that here.
+    num_subtasks = json.loads(entry.subtasks)['total']
+    num_remaining = num_subtasks - entry.num_subtasks_succeeded - entry.num_subtasks_failed
+    if num_remaining <= 0:
+        entry.task_state = SUCCESS
+    entry.task_output = InstructorTask.create_output_for_success(task_progress)
+
+    TASK_LOG.debug("about to save....")
+    entry.save()
+    TASK_LOG.info("Task output updated to %s for subtask %s of instructor task %d",
+                  entry.task_output, new_subtask_status.task_id, entry_id)
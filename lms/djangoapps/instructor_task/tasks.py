@@ -31,6 +31,7 @@ from instructor_task.tasks_helper import (
     reset_attempts_module_state,
     delete_problem_module_state,
     push_grades_to_s3,
+    grade_students_for_report,
 )
 from bulk_email.tasks import perform_delegate_email_batches
 
@@ -135,7 +136,28 @@ def send_bulk_course_email(entry_id, _xmodule_instance_args):
 def calculate_grades_csv(entry_id, xmodule_instance_args):
     """
     Grade a course and push the results to an S3 bucket for download.
+
+    The grading itself is done by `calculate_grades_csv_chunk` subtasks.
     """
     action_name = ugettext_noop('graded')
-    task_fn = partial(push_grades_to_s3, xmodule_instance_args)
+    task_fn = partial(push_grades_to_s3, calculate_grades_csv_chunk, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
+
+
+@task(  # pylint: disable=E1102
+    default_retry_delay=settings.GRADES_DOWNLOAD_DEFAULT_RETRY_DELAY,
+    max_retries=settings.GRADES_DOWNLOAD_MAX_RETRIES,
+    routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+)
+def calculate_grades_csv_chunk(entry_id, course_id, report_name, student_ids, subtask_status_dict):
+    """
+    Grade a chunk of the students in a course for the grade report being
+    generated by a `calculate_grades_csv` task.
+
+    `entry_id` is the id value of the InstructorTask entry of the
+    `calculate_grades_csv` task, `report_name` is the name of the report
+    files, `student_ids` are the ids of the students to grade, and
+    `subtask_status_dict` is the subtask's status, as in
+    `instructor_task.subtasks.SubtaskStatus.to_dict()`.
+    """
+    return grade_students_for_report(entry_id, course_id, report_name, student_ids, subtask_status_dict)
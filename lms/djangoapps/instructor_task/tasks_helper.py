@@ -3,15 +3,19 @@ This file contains tasks that are designed to perform background operations on t
 running state of a course.
 
 """
+import heapq
 import json
+import traceback
 import urllib
 from datetime import datetime
 from time import time
 
 from celery import Task, current_task
 from celery.utils.log import get_task_logger
-from celery.states import SUCCESS, FAILURE
+from celery.states import SUCCESS, FAILURE, RETRY
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import transaction, reset_queries
 from dogapi import dog_stats_api
 from pytz import UTC
@@ -19,11 +23,18 @@ from pytz import UTC
 from xmodule.modulestore.django import modulestore
 from track.views import task_track
 
-from courseware.grades import iterate_grades_for
+from courseware.grades import iterate_bulk_grades_for
 from courseware.models import StudentModule
 from courseware.model_data import FieldDataCache
 from courseware.module_render import get_module_for_descriptor_internal
-from instructor_task.models import GradesStore, InstructorTask, PROGRESS
+from instructor_task.models import GradesStore, InstructorSubtask, InstructorTask, PROGRESS
+from instructor_task.subtasks import (
+    SUBTASK_LOCK_EXPIRE,
+    SubtaskStatus,
+    queue_subtasks_for_query,
+    check_subtask_is_valid,
+    update_subtask_status,
+)
 from student.models import CourseEnrollment
 
 # define different loggers for use within tasks and on client side
@@ -470,7 +481,7 @@ def delete_problem_module_state(xmodule_instance_args, _module_descriptor, stude
     return UPDATE_STATUS_SUCCEEDED
 
 
-def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input, action_name):
+def push_grades_to_s3(grading_subtask, _xmodule_instance_args, entry_id, course_id, _task_input, action_name):
     """
     For a given `course_id`, generate a grades CSV file for all students that
     are enrolled, and store using a `GradesStore`. Once created, the files can
@@ -479,53 +490,168 @@ def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input,
     buffered, so we'll never write part of a CSV file to S3 -- i.e. any files
     that are visible in GradesStore will be complete ones.
 
+    The students are split into chunks, each graded by a `grading_subtask`
+    (which should call `grade_students_for_report()`) that stores its rows as
+    a part of the report. The last subtask to finish merges the parts into the
+    final files. Progress is tracked per subtask in the InstructorTask, as for
+    bulk email, and a subtask that fails is retried on its own.
+
     As we start to add more CSV downloads, it will probably be worthwhile to
     make a more general CSVDoc class instead of building out the rows like we
     do here.
     """
+    entry = InstructorTask.objects.get(pk=entry_id)
+
+    # If this task is being run again after its subtasks were queued (e.g.
+    # because celery lost its connection to the broker), don't queue them again.
+    if len(entry.subtasks) > 0 and entry.task_output:
+        TASK_LOG.warning("Task %s has already queued subtasks for the grade report: %s", entry.task_id, entry)
+        return json.loads(entry.task_output)
+
     start_time = datetime.now(UTC)
-    status_interval = 100
+    report_name = _grade_report_name(course_id, start_time)
 
     enrolled_students = CourseEnrollment.users_enrolled_in(course_id)
-    num_total = enrolled_students.count()
-    num_attempted = 0
-    num_succeeded = 0
-    num_failed = 0
-    curr_step = "Calculating Grades"
-
-    def update_task_progress():
-        """Return a dict containing info about current task"""
-        current_time = datetime.now(UTC)
-        progress = {
+    if not enrolled_students.exists():
+        # There is nobody to grade, so just store an empty report.
+        GradesStore.from_config().store_rows(course_id, report_name + u".csv", [])
+        return {
             'action_name': action_name,
-            'attempted': num_attempted,
-            'succeeded': num_succeeded,
-            'failed': num_failed,
-            'total': num_total,
-            'duration_ms': int((current_time - start_time).total_seconds() * 1000),
-            'step': curr_step,
+            'attempted': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'skipped': 0,
+            'total': 0,
+            'duration_ms': int((datetime.now(UTC) - start_time).total_seconds() * 1000),
         }
-        _get_current_task().update_state(state=PROGRESS, meta=progress)
 
-        return progress
+    def _create_grading_subtask(student_list, initial_subtask_status):
+        """Creates a subtask to grade a given list of students."""
+        return grading_subtask.subtask(
+            (
+                entry_id,
+                course_id,
+                report_name,
+                [student['pk'] for student in student_list],
+                initial_subtask_status.to_dict(),
+            ),
+            task_id=initial_subtask_status.task_id,
+            routing_key=settings.GRADES_DOWNLOAD_ROUTING_KEY,
+        )
+
+    return queue_subtasks_for_query(
+        entry,
+        action_name,
+        _create_grading_subtask,
+        enrolled_students,
+        [],
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_QUERY,
+        settings.GRADES_DOWNLOAD_STUDENTS_PER_TASK,
+    )
+
+
+def grade_students_for_report(entry_id, course_id, report_name, student_ids, subtask_status_dict):
+    """
+    Grade the students whose ids are in `student_ids`, and store their rows as
+    one part of the grade report `report_name`. This is the body of the
+    subtasks queued by `push_grades_to_s3()`.
+
+    Once every subtask of the InstructorTask `entry_id` has finished, the last
+    one merges the parts into the final report. If grading the students fails
+    unexpectedly, the subtask is retried (up to the task's `max_retries`),
+    which grades just these students again; the parts stored by the other
+    subtasks are kept.
+
+    Returns the subtask status, as a dict.
+    """
+    subtask_status = SubtaskStatus.from_dict(subtask_status_dict)
+    current_task_id = subtask_status.task_id
+    TASK_LOG.info("Preparing to grade %d students as subtask %s for instructor task %d, status=%s",
+                  len(student_ids), current_task_id, entry_id, subtask_status)
+
+    # Raises an exception if this subtask has already been run, or is
+    # being run by another worker.
+    check_subtask_is_valid(entry_id, current_task_id, subtask_status)
+
+    try:
+        with dog_stats_api.timer('instructor_tasks.grades.time.subtask'):
+            num_succeeded, num_failed = _store_grade_report_part(entry_id, course_id, current_task_id, student_ids)
+    except Exception as exc:  # pylint: disable=broad-except
+        TASK_LOG.exception("Grading subtask %s for instructor task %d failed", current_task_id, entry_id)
+        current_task = _get_current_task()
+        if subtask_status.retried_withmax >= current_task.max_retries:
+            # We don't know how far grading got, so count all of the students as failed,
+            # and list them in the error report so the rest of the report can be merged.
+            subtask_status.increment(failed=len(student_ids), state=FAILURE)
+            _store_failed_grade_report_part(entry_id, course_id, current_task_id, student_ids, exc)
+            update_subtask_status(entry_id, current_task_id, subtask_status)
+            _merge_grade_report_if_complete(entry_id, course_id, report_name)
+            raise exc
+
+        subtask_status.increment(retried_withmax=1, state=RETRY)
+        # Update the InstructorTask *before* retrying, so that there is no race
+        # between this update and the one made by the retried subtask.
+        update_subtask_status(entry_id, current_task_id, subtask_status)
+        countdown = (2 ** (subtask_status.retried_withmax - 1)) * current_task.default_retry_delay
+        raise current_task.retry(
+            args=[entry_id, course_id, report_name, student_ids, subtask_status.to_dict()],
+            exc=exc,
+            countdown=countdown,
+        )
+
+    subtask_status.increment(succeeded=num_succeeded, failed=num_failed, state=SUCCESS)
+    update_subtask_status(entry_id, current_task_id, subtask_status)
+    TASK_LOG.info("Grading subtask %s for instructor task %d: succeeded, status=%s",
+                  current_task_id, entry_id, subtask_status)
+
+    _merge_grade_report_if_complete(entry_id, course_id, report_name)
+    return subtask_status.to_dict()
+
+
+# The kinds of row stored in the parts of a grade report.  The first value in
+# each row of a part is one of these.
+GRADE_REPORT_HEADER_ROW = 'header'
+GRADE_REPORT_GRADE_ROW = 'grade'
+GRADE_REPORT_ERROR_ROW = 'error'
+
+
+def _grade_report_name(course_id, start_time):
+    """Return the name of the grade report files, without a suffix."""
+    timestamp_str = start_time.strftime("%Y-%m-%d-%H%M")
+    course_id_prefix = urllib.quote(course_id.replace("/", "_"))
+    return u"{}_grade_report_{}".format(course_id_prefix, timestamp_str)
+
+
+def _grade_report_parts_id(course_id, entry_id):
+    """
+    Return the id under which parts of a grade report are stored in the
+    GradesStore. They are kept apart from the course's files so that they
+    aren't listed by `GradesStore.links_for(course_id)`.
+    """
+    return u"{}/grade_report_parts/{}".format(course_id, entry_id)
+
 
-    # Loop over all our students and build our CSV lists in memory
+def _store_grade_report_part(entry_id, course_id, part_name, student_ids):
+    """
+    Grade the students in `student_ids`, and store their grade (and error)
+    rows, in order of student id, as the part `part_name` of a grade report.
+
+    Returns a tuple of the number of students graded and the number that
+    couldn't be graded.
+    """
+    students = User.objects.filter(id__in=student_ids).order_by('id')
+    num_succeeded = 0
+    num_failed = 0
     header = None
     rows = []
-    err_rows = [["id", "username", "error_msg"]]
-    for student, gradeset, err_msg in iterate_grades_for(course_id, enrolled_students):
-        # Periodically update task status (this is a cache write)
-        if num_attempted % status_interval == 0:
-            update_task_progress()
-        num_attempted += 1
-
+    for student, gradeset, err_msg in iterate_bulk_grades_for(course_id, students):
         if gradeset:
             # We were able to successfully grade this student for this course.
             num_succeeded += 1
             if not header:
                 # Encode the header row in utf-8 encoding in case there are unicode characters
                 header = [section['label'].encode('utf-8') for section in gradeset[u'section_breakdown']]
-                rows.append(["id", "email", "username", "grade"] + header)
+                rows.append([GRADE_REPORT_HEADER_ROW] + header)
 
             percents = {
                 section['label']: section.get('percent', 0.0)
@@ -540,35 +666,151 @@ def push_grades_to_s3(_xmodule_instance_args, _entry_id, course_id, _task_input,
             # possible for a student to have a 0.0 show up in their row but
             # still have 100% for the course.
             row_percents = [percents.get(label, 0.0) for label in header]
-            rows.append([student.id, student.email, student.username, gradeset['percent']] + row_percents)
+            rows.append(
+                [GRADE_REPORT_GRADE_ROW, student.id, student.email, student.username, gradeset['percent']] +
+                row_percents
+            )
         else:
             # An empty gradeset means we failed to grade a student.
             num_failed += 1
-            err_rows.append([student.id, student.username, err_msg])
+            rows.append([GRADE_REPORT_ERROR_ROW, student.id, student.username, err_msg])
 
-    # By this point, we've got the rows we're going to stuff into our CSV files.
-    curr_step = "Uploading CSVs"
-    update_task_progress()
+    GradesStore.from_config().store_rows(
+        _grade_report_parts_id(course_id, entry_id),
+        part_name + u".csv",
+        rows
+    )
+    return num_succeeded, num_failed
+
+
+def _store_failed_grade_report_part(entry_id, course_id, part_name, student_ids, exc):
+    """
+    Store the part `part_name` of a grade report for a subtask that failed
+    for good, with an error row for each of the students in `student_ids`,
+    so that they are listed in the error report.
+    """
+    try:
+        err_msg = u"Grading failed: {}".format(exc)
+        students = User.objects.filter(id__in=student_ids).order_by('id').values_list('id', 'username')
+        GradesStore.from_config().store_rows(
+            _grade_report_parts_id(course_id, entry_id),
+            part_name + u".csv",
+            [[GRADE_REPORT_ERROR_ROW, student_id, username, err_msg.encode('utf-8')]
+             for student_id, username in students]
+        )
+    except Exception:  # pylint: disable=broad-except
+        TASK_LOG.exception("Unable to store the failed grade report part %s for instructor task %d",
+                           part_name, entry_id)
 
-    # Generate parts of the file name
-    timestamp_str = start_time.strftime("%Y-%m-%d-%H%M")
-    course_id_prefix = urllib.quote(course_id.replace("/", "_"))
 
-    # Perform the actual upload
+def _merge_grade_report_if_complete(entry_id, course_id, report_name):
+    """
+    Merge the parts of the grade report once all of the subtasks of the
+    InstructorTask `entry_id` have finished. The students of subtasks that
+    failed are listed in the error report. If the merge itself fails, the
+    InstructorTask is marked as failed.
+    """
+    entry = InstructorTask.objects.get(pk=entry_id)
+    num_subtasks = json.loads(entry.subtasks)['total']
+    if entry.num_subtasks_succeeded + entry.num_subtasks_failed < num_subtasks:
+        return
+
+    if entry.num_subtasks_failed > 0:
+        TASK_LOG.warning("Grade report %s for instructor task %d: %d of its subtasks failed",
+                         report_name, entry_id, entry.num_subtasks_failed)
+
+    # More than one subtask may see that they're all done, so only merge if
+    # no other subtask has started to.  cache.add fails if the key exists.
+    # Once the merge has succeeded, the lock is left to expire, so that no
+    # subtask that finds them all done later merges again.
+    lock_key = "grade-report-merge-{}".format(entry_id)
+    if not cache.add(lock_key, 'true', SUBTASK_LOCK_EXPIRE):
+        return
+
+    try:
+        with dog_stats_api.timer('instructor_tasks.grades.time.merge'):
+            merge_grade_report_parts(
+                entry_id, course_id, report_name,
+                InstructorSubtask.objects.filter(instructor_task=entry_id).values_list('task_id', flat=True)
+            )
+    except Exception as exc:  # pylint: disable=broad-except
+        # The subtasks have all succeeded (or failed for good), so the
+        # InstructorTask says it succeeded: record that the report was lost,
+        # and release the lock so that the merge can be run again.
+        TASK_LOG.exception("Unable to merge grade report %s for instructor task %d", report_name, entry_id)
+        cache.delete(lock_key)
+        entry = InstructorTask.objects.get(pk=entry_id)
+        entry.task_output = InstructorTask.create_output_for_failure(exc, traceback.format_exc())
+        entry.task_state = FAILURE
+        entry.save_now()
+
+
+def merge_grade_report_parts(entry_id, course_id, report_name, part_names):
+    """
+    Merge the parts `part_names` of the grade report `report_name` into the
+    grade report and, if there were errors, the error report, and then delete
+    the parts.
+
+    Rows are in order of student id. The grades columns are those of the
+    first header row found; rows from parts with a different header are
+    mapped to them, with a 0 for any that a part doesn't have. Parts that were
+    never stored (because their subtask couldn't even record its failure) are
+    skipped.
+    """
     grades_store = GradesStore.from_config()
-    grades_store.store_rows(
-        course_id,
-        u"{}_grade_report_{}.csv".format(course_id_prefix, timestamp_str),
-        rows
-    )
+    parts_id = _grade_report_parts_id(course_id, entry_id)
+    stored_filenames = set(filename for filename, _ in grades_store.links_for(parts_id))
+    missing_part_names = [
+        part_name for part_name in part_names if part_name + u".csv" not in stored_filenames
+    ]
+    if missing_part_names:
+        TASK_LOG.error("Grade report %s for instructor task %d is missing the parts %s",
+                       report_name, entry_id, missing_part_names)
+    part_names = [part_name for part_name in part_names if part_name not in missing_part_names]
+    header = []
+    err_rows = [["id", "username", "error_msg"]]
+
+    def part_grade_rows(part_name):
+        """
+        Yield a (student id, row) tuple for each grade row of a part,
+        collecting its error rows into `err_rows` along the way.
+        """
+        part_header = None
+        for row in grades_store.rows_for(parts_id, part_name + u".csv"):
+            row_kind, values = row[0], row[1:]
+            if row_kind == GRADE_REPORT_HEADER_ROW:
+                part_header = values
+                if not header:
+                    header.extend(values)
+            elif row_kind == GRADE_REPORT_ERROR_ROW:
+                err_rows.append(values)
+            else:
+                if part_header != header:
+                    percents = dict(zip(part_header, values[4:]))
+                    values = values[:4] + [percents.get(label, 0.0) for label in header]
+                yield int(values[0]), values
+
+    def report_rows():
+        """Yield the rows of the merged grade report."""
+        # The parts are each in order of student id, so merging them keeps
+        # that order without holding all of them in memory.
+        merged = heapq.merge(*[part_grade_rows(part_name) for part_name in part_names])
+        wrote_header = False
+        for _, row in merged:
+            if not wrote_header:
+                # By now every part has been started, so the header is known.
+                yield ["id", "email", "username", "grade"] + header
+                wrote_header = True
+            yield row
+        if not wrote_header:
+            # Nobody could be graded, but the report still gets its header.
+            yield ["id", "email", "username", "grade"] + header
+
+    grades_store.store_rows(course_id, report_name + u".csv", report_rows())
 
     # If there are any error rows (don't count the header), write them out as well
     if len(err_rows) > 1:
-        grades_store.store_rows(
-            course_id,
-            u"{}_grade_report_{}_err.csv".format(course_id_prefix, timestamp_str),
-            err_rows
-        )
+        grades_store.store_rows(course_id, report_name + u"_err.csv", err_rows)
 
-    # One last update before we close out...
-    return update_task_progress()
+    for part_name in part_names:
+        grades_store.delete(parts_id, part_name + u".csv")
@@ -1,13 +1,22 @@
 """
 Unit tests for instructor_task subtasks.
 """
+import json
 from uuid import uuid4
 
+from celery.states import SUCCESS, FAILURE, RETRY
 from mock import Mock, patch
 
 from student.models import CourseEnrollment
 
-from instructor_task.subtasks import queue_subtasks_for_query
+from instructor_task.models import InstructorTask, QUEUING
+from instructor_task.subtasks import (
+    queue_subtasks_for_query,
+    initialize_subtask_info,
+    update_subtask_status,
+    get_subtask_statuses,
+    SubtaskStatus,
+)
 from instructor_task.tests.factories import InstructorTaskFactory
 from instructor_task.tests.test_base import InstructorTaskCourseTestCase
 
@@ -93,3 +102,84 @@ class TestSubtasks(InstructorTaskCourseTestCase):
         self.assertEqual(len(mock_create_subtask_fcn_args[1][0][0]), 3)
         self.assertEqual(len(mock_create_subtask_fcn_args[2][0][0]), 4)
         self.assertEqual(len(mock_create_subtask_fcn_args[3][0][0]), 4)
+
+
+class TestUpdateSubtaskStatus(InstructorTaskCourseTestCase):
+    """Tests for updating the status of subtasks and their InstructorTask."""
+
+    def setUp(self):
+        super(TestUpdateSubtaskStatus, self).setUp()
+        self.initialize_course()
+        self.entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='bulk_course_email',
+        )
+        self.subtask_ids = ['subtask-1', 'subtask-2']
+        initialize_subtask_info(self.entry, 'emailed', 10, self.subtask_ids)
+
+    def _get_entry(self):
+        """Return the InstructorTask as it is now in the database."""
+        return InstructorTask.objects.get(id=self.entry.id)
+
+    def test_initialize(self):
+        entry = self._get_entry()
+        self.assertEquals(json.loads(entry.subtasks), {'total': 2})
+        statuses = get_subtask_statuses(entry.id)
+        self.assertEquals(sorted(statuses.keys()), self.subtask_ids)
+        self.assertEquals(statuses['subtask-1'].state, QUEUING)
+
+    def test_retry_does_not_update_parent(self):
+        status = SubtaskStatus.create('subtask-1', attempted=3, succeeded=3, state=RETRY, retried_nomax=1)
+        update_subtask_status(self.entry.id, 'subtask-1', status)
+        entry = self._get_entry()
+        self.assertEquals(entry.num_attempted, 0)
+        self.assertEquals(entry.num_subtasks_succeeded, 0)
+        self.assertEquals(get_subtask_statuses(entry.id)['subtask-1'].to_dict(), status.to_dict())
+
+    def test_counts_and_completion(self):
+        status = SubtaskStatus.create('subtask-1', attempted=5, succeeded=4, failed=1, state=SUCCESS)
+        update_subtask_status(self.entry.id, 'subtask-1', status)
+        entry = self._get_entry()
+        self.assertEquals(entry.num_subtasks_succeeded, 1)
+        self.assertNotEquals(entry.task_state, SUCCESS)
+        self.assertEquals(json.loads(entry.task_output)['succeeded'], 4)
+
+        status = SubtaskStatus.create('subtask-2', attempted=5, skipped=5, state=FAILURE)
+        update_subtask_status(self.entry.id, 'subtask-2', status)
+        entry = self._get_entry()
+        self.assertEquals(entry.num_subtasks_failed, 1)
+        self.assertEquals(entry.task_state, SUCCESS)
+        task_output = json.loads(entry.task_output)
+        self.assertEquals(task_output['attempted'], 10)
+        self.assertEquals(task_output['succeeded'], 4)
+        self.assertEquals(task_output['failed'], 1)
+        self.assertEquals(task_output['skipped'], 5)
+
+    def test_completed_subtask_counted_once(self):
+        status = SubtaskStatus.create('subtask-1', attempted=5, succeeded=5, state=SUCCESS)
+        update_subtask_status(self.entry.id, 'subtask-1', status)
+        update_subtask_status(self.entry.id, 'subtask-1', status)
+        entry = self._get_entry()
+        self.assertEquals(entry.num_subtasks_succeeded, 1)
+        self.assertEquals(entry.num_succeeded, 5)
+        self.assertNotEquals(entry.task_state, SUCCESS)
+
+    def test_unknown_subtask(self):
+        status = SubtaskStatus.create('subtask-3', state=SUCCESS)
+        with self.assertRaises(ValueError):
+            update_subtask_status(self.entry.id, 'subtask-3', status)
+
+    def test_initialize_many_subtasks(self):
+        # More subtasks than are inserted in one query (SQLite limits the
+        # variables in a query)
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=str(uuid4()),
+            task_key='dummy_task_key',
+            task_type='bulk_course_email',
+        )
+        subtask_ids = [str(uuid4()) for _ in range(250)]
+        initialize_subtask_info(entry, 'emailed', 1000, subtask_ids)
+        self.assertEquals(sorted(get_subtask_statuses(entry.id).keys()), sorted(subtask_ids))
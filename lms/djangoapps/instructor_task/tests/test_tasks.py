@@ -6,8 +6,13 @@ paths actually work.
 
 """
 import json
+import shutil
+from tempfile import mkdtemp
 from uuid import uuid4
 
+from django.core.cache import cache
+from django.test.utils import override_settings
+
 from mock import Mock, MagicMock, patch
 
 from celery.states import SUCCESS, FAILURE
@@ -18,11 +23,16 @@ from courseware.models import StudentModule
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory, CourseEnrollmentFactory
 
-from instructor_task.models import InstructorTask
-from instructor_task.tests.test_base import InstructorTaskModuleTestCase
+from instructor_task.models import InstructorTask, LocalFSGradesStore
+from instructor_task.tests.test_base import InstructorTaskCourseTestCase, InstructorTaskModuleTestCase
 from instructor_task.tests.factories import InstructorTaskFactory
-from instructor_task.tasks import rescore_problem, reset_problem_attempts, delete_problem_state
-from instructor_task.tasks_helper import UpdateProblemModuleStateError
+from instructor_task.tasks import rescore_problem, reset_problem_attempts, delete_problem_state, calculate_grades_csv
+from instructor_task.tasks_helper import (
+    UpdateProblemModuleStateError,
+    merge_grade_report_parts,
+    _grade_report_parts_id,
+    _store_grade_report_part,
+)
 
 PROBLEM_URL_NAME = "test_urlname"
 
@@ -437,3 +447,157 @@ class TestDeleteStateInstructorTask(TestInstructorTasks):
                 StudentModule.objects.get(course_id=self.course.id,
                                           student=student,
                                           module_state_key=self.problem_url)
+
+
+class TestGradeReportTask(InstructorTaskCourseTestCase):
+    """
+    Test generating grade reports with subtasks.
+    """
+    def setUp(self):
+        self.initialize_course()
+        self.grades_root = mkdtemp()
+        self.addCleanup(shutil.rmtree, self.grades_root)
+        self.grades_store = LocalFSGradesStore(self.grades_root)
+
+        settings_override = override_settings(
+            GRADES_DOWNLOAD={'STORAGE_TYPE': 'localfs', 'ROOT_PATH': self.grades_root},
+            GRADES_DOWNLOAD_STUDENTS_PER_TASK=2,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _run_task(self):
+        """Run a grade report task, and return its InstructorTask entry."""
+        task_id = str(uuid4())
+        entry = InstructorTaskFactory.create(
+            course_id=self.course.id,
+            task_id=task_id,
+            task_type='grade_course',
+            task_key='',
+            task_input='{}',
+        )
+        current_task = Mock()
+        current_task.request.id = task_id
+        current_task.max_retries = 0
+        with patch('instructor_task.tasks_helper._get_current_task') as mock_get_task:
+            mock_get_task.return_value = current_task
+            calculate_grades_csv.apply([entry.id, {}], task_id=task_id).get()
+        return InstructorTask.objects.get(id=entry.id)
+
+    def _report_rows(self):
+        """Return the rows of each file stored for the course, by file name."""
+        return {
+            filename: list(self.grades_store.rows_for(self.course.id, filename))
+            for filename, _ in self.grades_store.links_for(self.course.id)
+        }
+
+    def test_grade_report(self):
+        students = [self.create_student('student{}'.format(i)) for i in range(5)]
+        entry = self._run_task()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(json.loads(entry.subtasks)['total'], 3)
+        progress = json.loads(entry.task_output)
+        self.assertEqual(progress['succeeded'], 5)
+        self.assertEqual(progress['total'], 5)
+
+        reports = self._report_rows()
+        self.assertEqual(len(reports), 1)
+        rows = reports.values()[0]
+        self.assertEqual(rows[0][:4], ["id", "email", "username", "grade"])
+        self.assertEqual([row[0] for row in rows[1:]], [str(student.id) for student in students])
+
+        # The parts of the report have been deleted
+        parts_id = _grade_report_parts_id(self.course.id, entry.id)
+        self.assertEqual(self.grades_store.links_for(parts_id), [])
+
+    def test_grade_report_with_failed_subtask(self):
+        students = [self.create_student('student{}'.format(i)) for i in range(5)]
+        store_part = _store_grade_report_part
+
+        def store_part_or_fail(entry_id, course_id, part_name, student_ids):
+            """Fail to grade the chunk with the first student in it."""
+            if students[0].id in student_ids:
+                raise Exception("Grading failed")
+            return store_part(entry_id, course_id, part_name, student_ids)
+
+        with patch('instructor_task.tasks_helper._store_grade_report_part', side_effect=store_part_or_fail):
+            entry = self._run_task()
+
+        self.assertEqual(entry.task_state, SUCCESS)
+        reports = self._report_rows()
+        self.assertEqual(len(reports), 2)
+        report_rows = [rows for filename, rows in reports.items() if not filename.endswith('_err.csv')][0]
+        err_rows = [rows for filename, rows in reports.items() if filename.endswith('_err.csv')][0]
+        self.assertEqual([row[0] for row in report_rows[1:]], [str(student.id) for student in students[2:]])
+        self.assertEqual(
+            [row[:2] for row in err_rows[1:]],
+            [[str(student.id), student.username] for student in students[:2]]
+        )
+
+        # The parts of the report have been deleted, including the failed one
+        parts_id = _grade_report_parts_id(self.course.id, entry.id)
+        self.assertEqual(self.grades_store.links_for(parts_id), [])
+
+    def test_grade_report_merge_fails(self):
+        self.create_student('student')
+        with patch('instructor_task.tasks_helper.merge_grade_report_parts', side_effect=Exception("Merge failed")):
+            entry = self._run_task()
+
+        self.assertEqual(entry.task_state, FAILURE)
+        self.assertEqual(json.loads(entry.task_output)['message'], "Merge failed")
+        # The merge can be run again
+        self.assertIsNone(cache.get("grade-report-merge-{}".format(entry.id)))
+
+    def test_grade_report_with_no_students(self):
+        entry = self._run_task()
+        self.assertEqual(entry.task_state, SUCCESS)
+        self.assertEqual(self._report_rows().values(), [[]])
+
+    def test_merge_grade_report_parts(self):
+        parts_id = _grade_report_parts_id(self.course.id, 1)
+        self.grades_store.store_rows(parts_id, 'b.csv', [
+            ['header', 'HW 01', 'Final'],
+            ['grade', 2, 'b@example.com', 'b', 0.5, 0.25, 1.0],
+            ['error', 3, 'c', 'Oops'],
+            ['grade', 5, 'e@example.com', 'e', 0.0, 0.0, 0.0],
+        ])
+        self.grades_store.store_rows(parts_id, 'a.csv', [
+            ['header', 'Final', 'HW 01', 'Lab 01'],
+            ['grade', 1, 'a@example.com', 'a', 0.75, 0.5, 1.0, 0.5],
+            ['grade', 4, 'd@example.com', 'd', 1.0, 1.0, 1.0, 1.0],
+        ])
+
+        merge_grade_report_parts(1, self.course.id, 'report', ['a', 'b'])
+
+        self.assertEqual(self._report_rows(), {
+            'report.csv': [
+                ['id', 'email', 'username', 'grade', 'Final', 'HW 01', 'Lab 01'],
+                ['1', 'a@example.com', 'a', '0.75', '0.5', '1.0', '0.5'],
+                ['2', 'b@example.com', 'b', '0.5', '1.0', '0.25', '0.0'],
+                ['4', 'd@example.com', 'd', '1.0', '1.0', '1.0', '1.0'],
+                ['5', 'e@example.com', 'e', '0.0', '0.0', '0.0', '0.0'],
+            ],
+            'report_err.csv': [
+                ['id', 'username', 'error_msg'],
+                ['3', 'c', 'Oops'],
+            ],
+        })
+        self.assertEqual(self.grades_store.links_for(parts_id), [])
+
+    def test_merge_grade_report_parts_without_grades(self):
+        parts_id = _grade_report_parts_id(self.course.id, 1)
+        self.grades_store.store_rows(parts_id, 'a.csv', [
+            ['error', 1, 'a', 'Oops'],
+        ])
+
+        merge_grade_report_parts(1, self.course.id, 'report', ['a', 'missing'])
+
+        self.assertEqual(self._report_rows(), {
+            'report.csv': [['id', 'email', 'username', 'grade']],
+            'report_err.csv': [
+                ['id', 'username', 'error_msg'],
+                ['1', 'a', 'Oops'],
+            ],
+        })
+        self.assertEqual(self.grades_store.links_for(parts_id), [])
@@ -50,6 +50,11 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# Keep-alive connections to the comments service per process, and how many
+# independent comments service requests a view may make at once
+COMMENTS_SERVICE_POOL_SIZE = 10
+COMMENTS_SERVICE_CONCURRENT_REQUESTS = 4
+
 
 # Features
 FEATURES = {
@@ -218,6 +223,22 @@ FEATURES = {
 
     # Turn off account locking if failed login attempts exceeds a limit
     'ENABLE_MAX_FAILED_LOGIN_ATTEMPTS': False,
+
+    # Cache computed grades and progress summaries per student, invalidated
+    # when the student's scores or the course content change
+    'ENABLE_GRADE_CACHE': False,
+
+    # Report answer distributions from the answer counts kept as problems are
+    # submitted, rather than by reading every submitted StudentModule. Run the
+    # backfill_answer_counts command for existing courses before enabling.
+    'ENABLE_ANSWER_DISTRIBUTION_COUNTS': False,
+
+    # Keep the counts of blocks that count student submissions in a
+    # user_state_summary field (word clouds and polls) in sharded counter rows,
+    # rather than rewriting the whole field on every submission. After turning
+    # this off again, run `fold_summary_counters --stop`, or the fields miss
+    # the counts added since the counters were last folded.
+    'ENABLE_SUMMARY_COUNTERS': False,
 }
 
 # Used for A/B testing
@@ -324,6 +345,18 @@ BOOK_URL = 'https://mitxstatic.s3.amazonaws.com/book_images/'  # For AWS deploys
 # PRESS_URL = r''
 RSS_TIMEOUT = 600
 
+# Seconds to keep a student's cached grades (see FEATURES['ENABLE_GRADE_CACHE']).
+# This bounds staleness from things the cache doesn't track, like release dates.
+GRADE_CACHE_TIMEOUT = 60 * 60
+
+# The number of rows each answer count is spread over (see FEATURES['ENABLE_ANSWER_DISTRIBUTION_COUNTS']).
+ANSWER_COUNT_SHARDS = 8
+
+# The number of rows each count is spread over (see FEATURES['ENABLE_SUMMARY_COUNTERS']).
+# More shards let more submissions add to a count at once, at the cost of
+# reading more rows until the fold_summary_counters command folds them.
+SUMMARY_COUNTER_SHARDS = 8
+
 # Configuration option for when we want to grab server error pages
 STATIC_GRAB = False
 DEV_CONTENT = True
@@ -406,6 +439,13 @@ MODULESTORE = {
     }
 }
 CONTENTSTORE = None
+
+# XML modulestores load courses with this many processes in parallel, and keep
+# snapshots of the loaded courses in XML_MODULESTORE_SNAPSHOT_DIR, signed with
+# SECRET_KEY, to load unchanged courses from on restart (see XMLModuleStore)
+XML_MODULESTORE_LOAD_PROCESSES = None
+XML_MODULESTORE_SNAPSHOT_DIR = None
+
 DOC_STORE_CONFIG = {
     'host': 'localhost',
     'db': 'xmodule',
@@ -439,6 +479,10 @@ CODE_JAIL = {
         # How many CPU seconds can jailed code use?
         'CPU': 1,
     },
+
+    # How many sandboxes each process keeps started and waiting for code, with
+    # numpy and scipy already imported.  0 starts a sandbox for each execution.
+    'warm_workers': 0,
 }
 
 # Some courses are allowed to run unsafe code. This is a list of regexes, one
@@ -701,6 +745,8 @@ MIDDLEWARE_CLASSES = (
     # Detects user-requested locale from 'accept-language' header in http request
     'django.middleware.locale.LocaleMiddleware',
 
+    # queues tasks held until the request's transaction commits, so must come first
+    'courseware.after_commit.AfterCommitMiddleware',
     'django.middleware.transaction.TransactionMiddleware',
     # 'debug_toolbar.middleware.DebugToolbarMiddleware',
 
@@ -1019,6 +1065,10 @@ BULK_EMAIL_LOG_SENT_EMAILS = False
 # parallel, and what the SES rate is.
 BULK_EMAIL_RETRY_DELAY_BETWEEN_SENDS = 0.02
 
+# Number of SMTP connections each bulk email task sends over in parallel.
+# A task that has been retried for rate-related reasons uses just one.
+BULK_EMAIL_CONNECTIONS_PER_TASK = 1
+
 
 ############################## Video ##########################################
 
@@ -1245,9 +1295,24 @@ REGISTRATION_EXTRA_FIELDS = {
     'country': 'hidden',
 }
 
+###################### Answer Counts ######################
+# The queue for the tasks that count the answers of submitted problems
+ANSWER_COUNT_ROUTING_KEY = LOW_PRIORITY_QUEUE
+
 ###################### Grade Downloads ######################
 GRADES_DOWNLOAD_ROUTING_KEY = HIGH_MEM_QUEUE
 
+# Parameters for breaking down course enrollment into grading subtasks.
+GRADES_DOWNLOAD_STUDENTS_PER_TASK = 200
+GRADES_DOWNLOAD_STUDENTS_PER_QUERY = 2000
+
+# Initial delay used for retrying grading subtasks.  Additional retries use
+# longer delays.  Value is in seconds.
+GRADES_DOWNLOAD_DEFAULT_RETRY_DELAY = 30
+
+# Maximum number of retries per grading subtask.
+GRADES_DOWNLOAD_MAX_RETRIES = 3
+
 GRADES_DOWNLOAD = {
     'STORAGE_TYPE': 'localfs',
     'BUCKET': 'edx-grades',
@@ -2,14 +2,27 @@ from contextlib import contextmanager
 from dogapi import dog_stats_api
 import json
 import logging
+import os
 import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import RequestsCookieJar
+import sys
+import threading
+from multiprocessing.pool import ThreadPool
 from django.conf import settings
 from time import time
 from uuid import uuid4
+from django.utils import translation
 from django.utils.translation import get_language
 
 log = logging.getLogger(__name__)
 
+_SESSION_LOCK = threading.Lock()
+_SESSION = None
+_SESSION_PID = None
+_POOL = None
+_POOL_PID = None
+
 
 def strip_none(dic):
     return dict([(k, v) for k, v in dic.iteritems() if v is not None])
@@ -32,13 +45,97 @@ def merge_dict(dic1, dic2):
     return dict(dic1.items() + dic2.items())
 
 
+class _NoCookieJar(RequestsCookieJar):
+    """
+    A cookie jar which never keeps cookies. The session is shared by the
+    requests made for every user, so a cookie set in the response to one of
+    them mustn't be sent with the others.
+    """
+    def set_cookie(self, cookie, *args, **kwargs):
+        pass
+
+
+def get_session():
+    """
+    Return the requests Session the process uses for the comments service. Its
+    connections are kept alive and pooled (COMMENTS_SERVICE_POOL_SIZE of them),
+    so requests don't each open a new connection. It doesn't keep cookies.
+    Forked processes make their own session rather than sharing the parent's
+    sockets.
+    """
+    global _SESSION, _SESSION_PID  # pylint: disable=global-statement
+    with _SESSION_LOCK:
+        if _SESSION is None or _SESSION_PID != os.getpid():
+            pool_size = settings.COMMENTS_SERVICE_POOL_SIZE
+            session = requests.Session()
+            session.cookies = _NoCookieJar()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _SESSION, _SESSION_PID = session, os.getpid()
+        return _SESSION
+
+
+def _get_pool():
+    """
+    Return the process's pool of threads for perform_concurrently, or None if
+    requests shouldn't be made concurrently.
+    """
+    global _POOL, _POOL_PID  # pylint: disable=global-statement
+    num_threads = settings.COMMENTS_SERVICE_CONCURRENT_REQUESTS
+    if num_threads <= 1:
+        return None
+    with _SESSION_LOCK:
+        if _POOL is None or _POOL_PID != os.getpid():
+            _POOL, _POOL_PID = ThreadPool(num_threads), os.getpid()
+        return _POOL
+
+
+def perform_concurrently(*calls):
+    """
+    Make independent calls to the comments service (any callables which use
+    perform_request, e.g. `thread.retrieve`) concurrently, and return their
+    results in order. If any of them raise, the first exception is raised once
+    they have all finished.
+
+    The calls run in other threads with the current language active, so they
+    mustn't rely on other thread state (e.g. the database connection).
+    """
+    pool = _get_pool()
+    if pool is None or len(calls) <= 1:
+        return [call() for call in calls]
+
+    language = get_language()
+
+    def run(call):
+        """Make the call in a pool thread, returning its result or exception info."""
+        translation.activate(language)
+        try:
+            return True, call()
+        except Exception:  # pylint: disable=broad-except
+            return False, sys.exc_info()
+        finally:
+            translation.deactivate()
+
+    start = time()
+    outcomes = pool.map(run, calls)
+    dog_stats_api.histogram('comment_client.concurrent_requests.time', time() - start)
+    for succeeded, value in outcomes:
+        if not succeeded:
+            exc_type, exc_value, exc_traceback = value
+            raise exc_type, exc_value, exc_traceback
+    return [value for _, value in outcomes]
+
+
 @contextmanager
 def request_timer(request_id, method, url):
     start = time()
     yield
     end = time()
     duration = end - start
-    dog_stats_api.histogram('comment_client.request.time', duration, end)
+    dog_stats_api.histogram(
+        'comment_client.request.time', duration, end, tags=[u'method:{}'.format(method)]
+    )
     log.info(
         "comment_client_request_log: request_id={request_id}, method={method}, "
         "url={url}, duration={duration}".format(
@@ -67,7 +164,7 @@ def perform_request(method, url, data_or_params=None, *args, **kwargs):
         data = None
         params = merge_dict(data_or_params, request_id_dict)
     with request_timer(request_id, method, url):
-        response = requests.request(
+        response = get_session().request(
             method,
             url,
             data=data,